@@ -0,0 +1,333 @@
+"""
+Clipping Benchmark Suite
+Times every clipper in scalar and batch mode on seeded synthetic data and
+reports throughput and timing percentiles as JSON
+
+Usage:
+    python clip_benchmark.py                        print results
+    python clip_benchmark.py --output base.json     store a baseline
+    python clip_benchmark.py --check base.json      compare with a baseline
+Options: --size N (segments per set), --repeats R, --seed S, --tolerance T,
+         --min-ms M (smallest slowdown reported as a regression)
+"""
+
+import gc
+import json
+import math
+import platform
+import sys
+import time
+import numpy as np
+from clip_window import ClipWindow
+from cohensutherland import cohen_sutherland_clip, cohen_sutherland_clip_batch
+from cyrusbeck import ConvexWindow, cyrus_beck_clip, cyrus_beck_clip_batch
+from liangbarsky import liang_barsky_clip, liang_barsky_clip_batch
+from sutherlandhodgeman import (pack_polygons, star_polygon, sutherland_hodgeman_clip, sutherland_hodgeman_clip_batch,
+                                sutherland_hodgeman_clip_streaming, sutherland_hodgeman_clip_array)
+
+# Window and scene shared by all data sets, as in the clipping demos
+WINDOW = ClipWindow(100, 100, 500, 400)
+SCENE = ClipWindow(0, 0, 600, 500)
+
+
+def uniform_points(rng, n, window):
+    """n points uniformly distributed over a window"""
+    return np.column_stack([rng.uniform(window.x_min, window.x_max, n),
+                            rng.uniform(window.y_min, window.y_max, n)])
+
+
+def mix(rng, main, other, fraction):
+    """Replace a random fraction of the rows of main by the rows of other"""
+    replace = rng.random(len(main)) < fraction
+    main[replace] = other[replace]
+    return main
+
+
+def inside_segments(n, seed=0):
+    """Mostly segments with both endpoints inside the window"""
+    rng = np.random.default_rng(seed)
+    segments = np.column_stack([uniform_points(rng, n, WINDOW), uniform_points(rng, n, WINDOW)])
+    scattered = np.column_stack([uniform_points(rng, n, SCENE), uniform_points(rng, n, SCENE)])
+    return mix(rng, segments, scattered, 0.1)
+
+
+def outside_segments(n, seed=0):
+    """Mostly segments lying in one margin around the window, trivially rejected"""
+    rng = np.random.default_rng(seed)
+    margins = [ClipWindow(SCENE.x_min, SCENE.y_min, WINDOW.x_min, SCENE.y_max),
+               ClipWindow(WINDOW.x_max, SCENE.y_min, SCENE.x_max, SCENE.y_max),
+               ClipWindow(SCENE.x_min, SCENE.y_min, SCENE.x_max, WINDOW.y_min),
+               ClipWindow(SCENE.x_min, WINDOW.y_max, SCENE.x_max, SCENE.y_max)]
+    side = rng.integers(0, len(margins), n)
+    segments = np.empty((n, 4))
+    for i, margin in enumerate(margins):
+        rows = np.flatnonzero(side == i)
+        segments[rows] = np.column_stack([uniform_points(rng, len(rows), margin),
+                                          uniform_points(rng, len(rows), margin)])
+    scattered = np.column_stack([uniform_points(rng, n, SCENE), uniform_points(rng, n, SCENE)])
+    return mix(rng, segments, scattered, 0.1)
+
+
+def crossing_segments(n, seed=0):
+    """Segments from inside the window to a point beyond it, one or two boundary crossings"""
+    rng = np.random.default_rng(seed)
+    start = uniform_points(rng, n, WINDOW)
+    # Farther from the center than the window corners
+    center = np.array([(WINDOW.x_min + WINDOW.x_max) / 2, (WINDOW.y_min + WINDOW.y_max) / 2])
+    reach = math.hypot(WINDOW.width, WINDOW.height) / 2
+    angle = rng.uniform(0, 2 * math.pi, n)
+    radius = rng.uniform(1.05 * reach, 1.6 * reach, n)
+    end = center + radius[:, None] * np.column_stack([np.cos(angle), np.sin(angle)])
+    segments = np.column_stack([start, end])
+    # Half of them run the other way
+    flip = rng.random(n) < 0.5
+    segments[flip] = segments[flip][:, [2, 3, 0, 1]]
+    return segments
+
+
+def axis_parallel_segments(n, seed=0):
+    """Horizontal and vertical segments, exercising the parallel boundary cases"""
+    rng = np.random.default_rng(seed)
+    start = uniform_points(rng, n, SCENE)
+    end = uniform_points(rng, n, SCENE)
+    vertical = rng.random(n) < 0.5
+    end[vertical, 0] = start[vertical, 0]
+    end[~vertical, 1] = start[~vertical, 1]
+    return np.column_stack([start, end])
+
+
+def degenerate_segments(n, seed=0):
+    """Zero-length segments, segments along the window edges and through its corners"""
+    rng = np.random.default_rng(seed)
+    kind = rng.integers(0, 3, n)
+    segments = np.empty((n, 4))
+
+    points = np.flatnonzero(kind == 0)
+    segments[points, :2] = uniform_points(rng, len(points), SCENE)
+    segments[points, 2:] = segments[points, :2]
+
+    # Along one of the four boundary lines, partly beyond the corners
+    on_edge = np.flatnonzero(kind == 1)
+    t = rng.uniform(-0.25, 1.25, (len(on_edge), 2))
+    x = WINDOW.x_min + t * WINDOW.width
+    y = WINDOW.y_min + t * WINDOW.height
+    edge = rng.integers(0, 4, len(on_edge))
+    fixed_x = np.where(edge == 0, WINDOW.x_min, WINDOW.x_max)[:, None]
+    fixed_y = np.where(edge == 2, WINDOW.y_min, WINDOW.y_max)[:, None]
+    horizontal = edge >= 2
+    segments[on_edge, 0::2] = np.where(horizontal[:, None], x, fixed_x)
+    segments[on_edge, 1::2] = np.where(horizontal[:, None], fixed_y, y)
+
+    # Through a window corner at a random angle
+    through = np.flatnonzero(kind == 2)
+    corners = np.array([[WINDOW.x_min, WINDOW.y_min], [WINDOW.x_max, WINDOW.y_min],
+                        [WINDOW.x_max, WINDOW.y_max], [WINDOW.x_min, WINDOW.y_max]])
+    corner = corners[rng.integers(0, 4, len(through))]
+    angle = rng.uniform(0, 2 * math.pi, len(through))
+    offset = 50 * np.column_stack([np.cos(angle), np.sin(angle)])
+    segments[through] = np.column_stack([corner - offset, corner + offset])
+    return segments
+
+
+def star_polygons(count, vertices=64, seed=0):
+    """Star polygons of random size scattered over the scene, many crossing the window"""
+    rng = np.random.default_rng(seed)
+    centers = uniform_points(rng, count, SCENE)
+    sizes = rng.uniform(20, 150, count)
+    points = rng.integers(3, 9, count)
+    return [star_polygon(vertices, int(p), (cx, cy), (0.4 * s, s))
+            for (cx, cy), s, p in zip(centers.tolist(), sizes.tolist(), points.tolist())]
+
+
+def comb_polygon(teeth, corner, width, height):
+    """Concave comb: a base edge with a sawtooth of teeth along the top"""
+    x0, y0 = corner
+    top = np.linspace(x0 + width, x0, 2 * teeth + 1)
+    heights = np.where(np.arange(2 * teeth + 1) % 2 == 0, height, 0.3 * height)
+    return [[x0, y0], [x0 + width, y0]] + np.column_stack([top, y0 + heights]).tolist()
+
+
+def concave_polygons(count, teeth=8, seed=0):
+    """Comb polygons of random size scattered over the scene"""
+    rng = np.random.default_rng(seed)
+    corners = uniform_points(rng, count, ClipWindow(-100, -100, 600, 500))
+    widths = rng.uniform(50, 250, count)
+    heights = rng.uniform(30, 200, count)
+    return [comb_polygon(teeth, corner, w, h)
+            for corner, w, h in zip(corners.tolist(), widths.tolist(), heights.tolist())]
+
+
+SEGMENT_SETS = {
+    'inside': inside_segments,
+    'outside': outside_segments,
+    'crossing': crossing_segments,
+    'axis_parallel': axis_parallel_segments,
+    'degenerate': degenerate_segments,
+}
+
+POLYGON_SETS = {
+    'star': star_polygons,
+    'concave': concave_polygons,
+}
+
+
+def segment_cases():
+    """(name, window, scalar clip, batch clip) of every line clipper"""
+    return [
+        ('cohen_sutherland', WINDOW, cohen_sutherland_clip, cohen_sutherland_clip_batch),
+        ('liang_barsky', WINDOW, liang_barsky_clip, liang_barsky_clip_batch),
+        # The same rectangle as a convex window, so the results are comparable
+        ('cyrus_beck', ConvexWindow.from_transform(WINDOW, np.eye(3)), cyrus_beck_clip, cyrus_beck_clip_batch),
+    ]
+
+
+def time_runs(run, repeats):
+    """Wall times of repeats calls of run() after one warm-up call, and its result"""
+    result = run()
+    times = []
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return np.array(times), result
+
+
+def summarize(times, items, unit, accepted):
+    """JSON-ready statistics of one benchmark case"""
+    p50, p90, p99 = np.percentile(times, [50, 90, 99]) * 1000
+    return {
+        'items': int(items),
+        'unit': unit,
+        'accepted': int(accepted),
+        'throughput': items / float(np.median(times)),
+        'min_ms': float(times.min() * 1000),
+        'p50_ms': float(p50),
+        'p90_ms': float(p90),
+        'p99_ms': float(p99),
+    }
+
+
+def run_suite(size=20_000, repeats=10, seed=0):
+    """
+    Run every clipper on every data set
+
+    Args:
+        size: segments per segment set; the polygon sets hold size / 20
+              polygons
+        repeats: timed runs per case, the percentiles are taken over these
+        seed: seed of the data generators
+
+    Returns:
+        dict with 'meta' describing the run and 'results' mapping
+        'clipper/mode/data set' to the statistics of summarize()
+    """
+    results = {}
+    for data_name, generate in SEGMENT_SETS.items():
+        segments = generate(size, seed)
+        rows = segments.tolist()
+        for name, window, clip, clip_batch in segment_cases():
+            times, clipped = time_runs(lambda: [clip(*row, window) for row in rows], repeats)
+            accepted = sum(result is not None for result in clipped)
+            results[f'{name}/scalar/{data_name}'] = summarize(times, size, 'segments', accepted)
+
+            times, (clipped, valid) = time_runs(lambda: clip_batch(segments, window), repeats)
+            results[f'{name}/batch/{data_name}'] = summarize(times, size, 'segments', valid.sum())
+
+    count = max(size // 20, 1)
+    for data_name, generate in POLYGON_SETS.items():
+        polygons = generate(count, seed=seed)
+        vertices, offsets = pack_polygons(polygons)
+        for mode, clip in (('scalar', sutherland_hodgeman_clip),
+                           ('streaming', sutherland_hodgeman_clip_streaming),
+                           ('array', sutherland_hodgeman_clip_array)):
+            times, clipped = time_runs(lambda: [clip(p, WINDOW) for p in polygons], repeats)
+            accepted = sum(len(polygon) > 0 for polygon in clipped)
+            results[f'sutherland_hodgeman/{mode}/{data_name}'] = summarize(times, len(vertices), 'vertices', accepted)
+
+        times, (_, clipped_offsets) = time_runs(
+            lambda: sutherland_hodgeman_clip_batch(vertices, offsets, WINDOW), repeats)
+        accepted = np.count_nonzero(np.diff(clipped_offsets))
+        results[f'sutherland_hodgeman/batch/{data_name}'] = summarize(times, len(vertices), 'vertices', accepted)
+
+    meta = {
+        'size': size,
+        'repeats': repeats,
+        'seed': seed,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+    }
+    return {'meta': meta, 'results': results}
+
+
+def check_regressions(report, baseline, tolerance=0.5, min_ms=1.0):
+    """
+    Compare a suite report with a stored baseline
+
+    A case regresses when it accepted a different number of items, which
+    means the clipper output changed, or when its best time grew by more
+    than tolerance (0.5 = 50% slower) on top of the run-to-run noise and
+    by more than min_ms. The noise is the larger p90 / min spread of the
+    two runs, so cases that jitter between repeats need a larger change,
+    and min_ms keeps sub-millisecond cases from tripping on timer noise.
+    The best time is compared rather than the median, being the least
+    sensitive to other load.
+
+    Returns:
+        list of messages, one per regression; empty when everything passed
+    """
+    problems = []
+    for key in ('size', 'seed'):
+        if report['meta'][key] != baseline['meta'][key]:
+            problems.append(f"{key} is {report['meta'][key]}, baseline used {baseline['meta'][key]}")
+    for case, expected in baseline['results'].items():
+        current = report['results'].get(case)
+        if current is None:
+            problems.append(f"{case}: missing")
+            continue
+        if current['accepted'] != expected['accepted']:
+            problems.append(f"{case}: accepted {current['accepted']}, baseline {expected['accepted']}")
+        noise = max(run['p90_ms'] / run['min_ms'] - 1 for run in (current, expected))
+        ratio = current['min_ms'] / expected['min_ms']
+        if ratio > 1 + tolerance + noise and current['min_ms'] - expected['min_ms'] > min_ms:
+            problems.append(f"{case}: {current['min_ms']:.2f} ms, baseline "
+                            f"{expected['min_ms']:.2f} ms ({ratio:.2f}x)")
+    return problems
+
+
+def option(name, default, convert=str):
+    """Value following --name on the command line, or default"""
+    if name in sys.argv:
+        try:
+            return convert(sys.argv[sys.argv.index(name) + 1])
+        except (IndexError, ValueError):
+            pass
+    return default
+
+
+if __name__ == "__main__":
+    report = run_suite(size=option("--size", 20_000, int),
+                       repeats=option("--repeats", 10, int),
+                       seed=option("--seed", 0, int))
+
+    output = option("--output", None)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    baseline_file = option("--check", None)
+    if baseline_file:
+        with open(baseline_file) as f:
+            baseline = json.load(f)
+        problems = check_regressions(report, baseline, option("--tolerance", 0.5, float),
+                                     option("--min-ms", 1.0, float))
+        for problem in problems:
+            print(f"REGRESSION {problem}", file=sys.stderr)
+        print(f"{len(baseline['results'])} cases checked, {len(problems)} regressions", file=sys.stderr)
+        sys.exit(1 if problems else 0)
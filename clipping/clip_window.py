@@ -0,0 +1,98 @@
+"""
+Rectangular clipping window shared by the clipping algorithms
+Each clipping function takes the window to clip against, so several windows
+(viewport tiles, split screens) can be used in the same process
+"""
+
+import numpy as np
+
+
+class ClipWindow:
+    """Axis-aligned clipping rectangle [x_min, x_max] x [y_min, y_max]"""
+
+    def __init__(self, x_min, y_min, x_max, y_max):
+        """
+        Initialize clipping window
+
+        Args:
+            x_min, y_min: lower-left corner
+            x_max, y_max: upper-right corner
+        """
+        if x_min > x_max or y_min > y_max:
+            raise ValueError(f"Empty clipping window ({x_min}, {y_min}) to ({x_max}, {y_max})")
+        self.x_min = x_min
+        self.y_min = y_min
+        self.x_max = x_max
+        self.y_max = y_max
+
+    @property
+    def width(self):
+        return self.x_max - self.x_min
+
+    @property
+    def height(self):
+        return self.y_max - self.y_min
+
+    def bounds(self):
+        """Return (x_min, y_min, x_max, y_max)"""
+        return self.x_min, self.y_min, self.x_max, self.y_max
+
+    def contains(self, x, y):
+        """Check if points are inside the window, boundary included"""
+        return (x >= self.x_min) & (x <= self.x_max) & (y >= self.y_min) & (y <= self.y_max)
+
+    def intersection(self, other):
+        """Overlap of two windows, or None when they are disjoint"""
+        x_min, y_min = max(self.x_min, other.x_min), max(self.y_min, other.y_min)
+        x_max, y_max = min(self.x_max, other.x_max), min(self.y_max, other.y_max)
+        if x_min > x_max or y_min > y_max:
+            return None
+        return ClipWindow(x_min, y_min, x_max, y_max)
+
+    def difference(self, other):
+        """Up to four windows covering the part of this window outside other"""
+        overlap = self.intersection(other)
+        if overlap is None:
+            return [self]
+        pieces = [
+            (self.x_min, self.y_min, overlap.x_min, self.y_max),
+            (overlap.x_max, self.y_min, self.x_max, self.y_max),
+            (overlap.x_min, self.y_min, overlap.x_max, overlap.y_min),
+            (overlap.x_min, overlap.y_max, overlap.x_max, self.y_max),
+        ]
+        # Pieces of zero width are the shared boundary, not area outside other
+        return [ClipWindow(*piece) for piece in pieces if piece[0] < piece[2] and piece[1] < piece[3]]
+
+    def edges(self):
+        """The four boundary lines as zero-width windows"""
+        return [
+            ClipWindow(self.x_min, self.y_min, self.x_min, self.y_max),
+            ClipWindow(self.x_max, self.y_min, self.x_max, self.y_max),
+            ClipWindow(self.x_min, self.y_min, self.x_max, self.y_min),
+            ClipWindow(self.x_min, self.y_max, self.x_max, self.y_max),
+        ]
+
+    def outline(self):
+        """x and y lists of the closed window outline, for plotting"""
+        return ([self.x_min, self.x_max, self.x_max, self.x_min, self.x_min],
+                [self.y_min, self.y_min, self.y_max, self.y_max, self.y_min])
+
+    def __eq__(self, other):
+        return isinstance(other, ClipWindow) and self.bounds() == other.bounds()
+
+    def __hash__(self):
+        return hash(self.bounds())
+
+    def __repr__(self):
+        return f"ClipWindow({self.x_min}, {self.y_min}, {self.x_max}, {self.y_max})"
+
+
+def window_bounds(windows, dtype=np.float64):
+    """
+    Stack the bounds of K windows for broadcasting against N segments
+
+    Returns:
+        x_min, y_min, x_max, y_max: arrays of shape (K, 1) in dtype
+    """
+    bounds = np.array([window.bounds() for window in windows], dtype=dtype).reshape(-1, 4)
+    return tuple(bounds[:, i:i + 1] for i in range(4))
@@ -3,12 +3,15 @@ Cohen-Sutherland Line Clipping Algorithm
 Clips line segments against a rectangular clipping window
 """
 
+import sys
+import time
 import matplotlib.pyplot as plt
 import numpy as np
+from clip_window import ClipWindow, window_bounds
+from spatial_index import GridIndex, SpatialIndex
 
-# Define the clipping window
-X_MIN, Y_MIN = 100, 100
-X_MAX, Y_MAX = 500, 400
+# Default clipping window
+WINDOW = ClipWindow(100, 100, 500, 400)
 
 # Region codes
 INSIDE = 0  # 0000
@@ -17,26 +20,26 @@ RIGHT = 2   # 0010
 BOTTOM = 4  # 0100
 TOP = 8     # 1000
 
-def compute_code(x, y):
+def compute_code(x, y, window=WINDOW):
     """Compute the region code for a point (x, y)"""
     code = INSIDE
 
-    if x < X_MIN:
+    if x < window.x_min:
         code |= LEFT
-    elif x > X_MAX:
+    elif x > window.x_max:
         code |= RIGHT
 
-    if y < Y_MIN:
+    if y < window.y_min:
         code |= BOTTOM
-    elif y > Y_MAX:
+    elif y > window.y_max:
         code |= TOP
 
     return code
 
-def cohen_sutherland_clip(x1, y1, x2, y2):
+def cohen_sutherland_clip(x1, y1, x2, y2, window=WINDOW):
     """Cohen-Sutherland line clipping algorithm"""
-    code1 = compute_code(x1, y1)
-    code2 = compute_code(x2, y2)
+    code1 = compute_code(x1, y1, window)
+    code2 = compute_code(x2, y2, window)
     accept = False
 
     while True:
@@ -56,39 +59,278 @@ def cohen_sutherland_clip(x1, y1, x2, y2):
 
             # Find intersection point
             if code_out & TOP:
-                x = x1 + (x2 - x1) * (Y_MAX - y1) / (y2 - y1)
-                y = Y_MAX
+                x = x1 + (x2 - x1) * (window.y_max - y1) / (y2 - y1)
+                y = window.y_max
             elif code_out & BOTTOM:
-                x = x1 + (x2 - x1) * (Y_MIN - y1) / (y2 - y1)
-                y = Y_MIN
+                x = x1 + (x2 - x1) * (window.y_min - y1) / (y2 - y1)
+                y = window.y_min
             elif code_out & RIGHT:
-                y = y1 + (y2 - y1) * (X_MAX - x1) / (x2 - x1)
-                x = X_MAX
+                y = y1 + (y2 - y1) * (window.x_max - x1) / (x2 - x1)
+                x = window.x_max
             elif code_out & LEFT:
-                y = y1 + (y2 - y1) * (X_MIN - x1) / (x2 - x1)
-                x = X_MIN
+                y = y1 + (y2 - y1) * (window.x_min - x1) / (x2 - x1)
+                x = window.x_min
 
             # Replace the outside point with intersection point
             if code_out == code1:
                 x1, y1 = x, y
-                code1 = compute_code(x1, y1)
+                code1 = compute_code(x1, y1, window)
             else:
                 x2, y2 = x, y
-                code2 = compute_code(x2, y2)
+                code2 = compute_code(x2, y2, window)
 
     if accept:
         return x1, y1, x2, y2
     else:
         return None
 
-def plot_clipping(x1, y1, x2, y2, clipped, title, filename):
+def region_codes(x, y, x_min, y_min, x_max, y_max):
+    """Region codes of many points at once, bounds broadcast against the points"""
+    # A point cannot be both left and right (or below and above) the window,
+    # so the flags can be or-ed together without the elif chain
+    codes = (x < x_min).astype(np.uint8) * LEFT
+    codes |= (x > x_max).astype(np.uint8) * RIGHT
+    codes |= (y < y_min).astype(np.uint8) * BOTTOM
+    codes |= (y > y_max).astype(np.uint8) * TOP
+    return codes
+
+def compute_codes(x, y, window=WINDOW):
+    """Region codes of many points at once, same rules as compute_code"""
+    return region_codes(np.asarray(x), np.asarray(y), *window.bounds())
+
+def cohen_sutherland_clip_batch(segments, window=WINDOW):
+    """
+    Cohen-Sutherland clipping of many segments at once
+
+    Outcodes of all endpoints are computed in one pass and trivial accepts
+    and rejects are resolved by mask. Only the remaining segments go through
+    the intersection steps, which run vectorized over that remainder with the
+    same formulas as cohen_sutherland_clip, so the results match it exactly.
+
+    Args:
+        segments: array of shape (N, 4) with rows (x1, y1, x2, y2), or a
+                  SpatialIndex built with from_segments
+        window: ClipWindow to clip against
+
+    Returns:
+        clipped: float array of shape (N, 4); rejected rows are NaN
+        valid: bool array of shape (N,), False where the segment was rejected
+        ids: only for a SpatialIndex, the indices of the candidate segments
+             the rows belong to; segments outside the window are not clipped
+    """
+    if isinstance(segments, SpatialIndex):
+        ids = segments.query(window)
+        return (*cohen_sutherland_clip_batch(segments.segments[ids], window), ids)
+    clipped, valid = cohen_sutherland_clip_multi(segments, [window])
+    return clipped[0], valid[0]
+
+def cohen_sutherland_clip_multi(segments, windows):
+    """
+    Clip one set of segments against K windows in a single pass
+
+    The endpoint outcodes for every window come from one broadcast over the
+    segments, so the geometry is read once. Every (window, segment) pair
+    that is not trivially accepted or rejected then runs the intersection
+    steps of cohen_sutherland_clip_batch against its own window bounds.
+
+    Args:
+        segments: array of shape (N, 4) with rows (x1, y1, x2, y2)
+        windows: sequence of K ClipWindow objects
+
+    Returns:
+        clipped: float array of shape (K, N, 4); rejected rows are NaN
+        valid: bool array of shape (K, N)
+    """
+    segments = np.asarray(segments, dtype=float).reshape(-1, 4)
+    bounds = window_bounds(windows)
+    k, n = len(bounds[0]), len(segments)
+
+    code1 = region_codes(segments[:, 0], segments[:, 1], *bounds).reshape(-1)
+    code2 = region_codes(segments[:, 2], segments[:, 3], *bounds).reshape(-1)
+    clipped = np.broadcast_to(segments, (k, n, 4)).reshape(-1, 4).copy()
+    x1, y1, x2, y2 = clipped.T
+
+    valid = (code1 | code2) == 0
+    active = np.flatnonzero(~valid & ((code1 & code2) == 0))
+
+    while active.size:
+        c1, c2 = code1[active], code2[active]
+        ax1, ay1, ax2, ay2 = x1[active], y1[active], x2[active], y2[active]
+        # Bounds of the window each pair is clipped against
+        window = tuple(bound[active // n, 0] for bound in bounds)
+
+        # Same boundary priority as the scalar loop: top, bottom, right, left
+        code_out = np.where(c1 != 0, c1, c2)
+        top = (code_out & TOP) != 0
+        horizontal = top | ((code_out & BOTTOM) != 0)
+        right = ~horizontal & ((code_out & RIGHT) != 0)
+        y_edge = np.where(top, window[3], window[1])
+        x_edge = np.where(right, window[2], window[0])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = np.where(horizontal, ax1 + (ax2 - ax1) * (y_edge - ay1) / (ay2 - ay1), x_edge)
+            y = np.where(horizontal, y_edge, ay1 + (ay2 - ay1) * (x_edge - ax1) / (ax2 - ax1))
+
+        # Replace the outside point with the intersection point
+        first = code_out == c1
+        x1[active] = np.where(first, x, ax1)
+        y1[active] = np.where(first, y, ay1)
+        x2[active] = np.where(first, ax2, x)
+        y2[active] = np.where(first, ay2, y)
+        codes = region_codes(x, y, *window)
+        code1[active] = np.where(first, codes, c1)
+        code2[active] = np.where(first, c2, codes)
+
+        c1, c2 = code1[active], code2[active]
+        accept = (c1 | c2) == 0
+        valid[active[accept]] = True
+        active = active[~accept & ((c1 & c2) == 0)]
+
+    clipped[~valid] = np.nan
+    return clipped.reshape(k, n, 4), valid.reshape(k, n)
+
+class IncrementalClipper:
+    """
+    Clipper that keeps the clipped segments and updates them as the window moves
+
+    A segment's clipped result can only change when the window moves if
+    its bounding box is not inside both the old and the new window, and it
+    overlaps one of them. Those segments are exactly the ones whose box
+    overlaps the area gained or lost by the move or the boundary of the
+    overlap of the two windows, so they are found with a few spatial index
+    queries and only they are clipped again. The work per frame follows the
+    amount of change, not the size of the scene.
+    """
+
+    def __init__(self, segments, window=WINDOW, index=None):
+        """
+        Initialize clipper and clip against the first window
+
+        Args:
+            segments: array of shape (N, 4) with rows (x1, y1, x2, y2)
+            window: initial ClipWindow
+            index: SpatialIndex over segments; a GridIndex by default
+        """
+        self.index = index if index is not None else GridIndex.from_segments(segments)
+        self.segments = self.index.segments
+        self.window = window
+        self.clipped = np.full(self.segments.shape, np.nan)
+        self.valid = np.zeros(len(self.segments), dtype=bool)
+        self.reprocessed = self._reclip(self.index.query(window), window)
+
+    def affected(self, window):
+        """Indices of the segments whose clipped result may differ in window"""
+        overlap = self.window.intersection(window)
+        regions = self.window.difference(window) + window.difference(self.window)
+        if overlap is not None:
+            regions += overlap.edges()
+        if not regions:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate([self.index.query(region) for region in regions]))
+
+    def _reclip(self, ids, window):
+        clipped, valid = cohen_sutherland_clip_batch(self.segments[ids], window)
+        self.clipped[ids] = clipped
+        self.valid[ids] = valid
+        return len(ids)
+
+    def set_window(self, window):
+        """
+        Move the window and update the affected segments
+
+        Returns:
+            dict of int64 index arrays: 'added' segments that became visible,
+            'removed' segments that are no longer visible, and 'modified'
+            visible segments whose clipped endpoints changed
+        """
+        ids = self.affected(window)
+        was_valid = self.valid[ids]
+        was_clipped = self.clipped[ids]
+        self.window = window
+        self.reprocessed = self._reclip(ids, window)
+
+        valid = self.valid[ids]
+        changed = (self.clipped[ids] != was_clipped).any(axis=1)
+        return {
+            'added': ids[valid & ~was_valid],
+            'removed': ids[was_valid & ~valid],
+            'modified': ids[valid & was_valid & changed],
+        }
+
+    def visible(self):
+        """Indices and clipped coordinates of the visible segments"""
+        ids = np.flatnonzero(self.valid)
+        return ids, self.clipped[ids]
+
+def benchmark(n=1_000_000, seed=0):
+    """Time the scalar and batch clippers on random segments around the window"""
+    rng = np.random.default_rng(seed)
+    segments = rng.uniform(0, 600, size=(n, 4))
+
+    start = time.perf_counter()
+    clipped, valid = cohen_sutherland_clip_batch(segments)
+    batch_time = time.perf_counter() - start
+
+    sample = segments[:20_000]
+    start = time.perf_counter()
+    scalar = [cohen_sutherland_clip(*segment) for segment in sample.tolist()]
+    scalar_time = (time.perf_counter() - start) * n / len(sample)
+
+    matches = all(
+        (result is None and not ok) or (ok and tuple(row) == result)
+        for result, row, ok in zip(scalar, clipped[:len(sample)].tolist(), valid[:len(sample)])
+    )
+    print(f"{n} segments, {valid.sum()} accepted")
+    print(f"Scalar (extrapolated): {scalar_time:.2f}s, batch: {batch_time:.3f}s "
+          f"({scalar_time / batch_time:.0f}x), matches scalar: {matches}")
+
+    # Four viewport tiles covering the default window
+    tiles = [ClipWindow(x, y, x + 200, y + 150) for x in (100, 300) for y in (100, 250)]
+    start = time.perf_counter()
+    for tile in tiles:
+        cohen_sutherland_clip_batch(segments, tile)
+    separate_time = time.perf_counter() - start
+    start = time.perf_counter()
+    cohen_sutherland_clip_multi(segments, tiles)
+    multi_time = time.perf_counter() - start
+    print(f"{len(tiles)} tiles: one batch per tile {separate_time:.3f}s, multi-window {multi_time:.3f}s")
+
+    benchmark_incremental()
+
+def benchmark_incremental(n=2_000_000, frames=50, step=20.0):
+    """Pan a window across a large scene and compare full and incremental re-clipping"""
+    from spatial_index import random_scene
+
+    segments = random_scene(n)
+    windows = [ClipWindow(30_000.0 + i * step, 30_000.0, 50_000.0 + i * step, 45_000.0)
+               for i in range(frames)]
+    clipper = IncrementalClipper(segments, windows[0])
+
+    start = time.perf_counter()
+    reprocessed = 0
+    for window in windows[1:]:
+        diff = clipper.set_window(window)
+        reprocessed += clipper.reprocessed
+    incremental_time = (time.perf_counter() - start) / (frames - 1)
+
+    start = time.perf_counter()
+    for window in windows[1:]:
+        clipped, valid, ids = cohen_sutherland_clip_batch(clipper.index, window)
+    indexed_time = (time.perf_counter() - start) / (frames - 1)
+
+    matches = np.array_equal(ids[valid], clipper.visible()[0]) and \
+        np.array_equal(clipped[valid], clipper.visible()[1])
+    print(f"Panning over {n} segments, {valid.sum()} visible: full re-clip with index "
+          f"{indexed_time * 1000:.1f} ms, incremental {incremental_time * 1000:.1f} ms per frame "
+          f"({reprocessed / (frames - 1):.0f} segments reprocessed), matches full re-clip: {matches}")
+    print(f"Last frame diff: {len(diff['added'])} added, {len(diff['removed'])} removed, "
+          f"{len(diff['modified'])} modified")
+
+def plot_clipping(x1, y1, x2, y2, clipped, title, filename, window=WINDOW):
     """Plot the original line, clipping window, and clipped line"""
     plt.figure(figsize=(8, 6))
 
     # Plot clipping window
-    plt.plot([X_MIN, X_MAX, X_MAX, X_MIN, X_MIN],
-             [Y_MIN, Y_MIN, Y_MAX, Y_MAX, Y_MIN],
-             'k-', linewidth=2, label='Clipping Window')
+    plt.plot(*window.outline(), 'k-', linewidth=2, label='Clipping Window')
 
     # Plot original line
     plt.plot([x1, x2], [y1, y2], 'r--', linewidth=2, label='Original Line')
@@ -111,6 +353,10 @@ def plot_clipping(x1, y1, x2, y2, clipped, title, filename):
 
 # Example usage
 if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+        sys.exit()
+
     # Test cases
     test_lines = [
         (50, 150, 550, 350),    # Crosses right boundary
@@ -0,0 +1,241 @@
+"""
+Cyrus-Beck Line Clipping Algorithm
+Parametric line clipping against an arbitrary convex window, such as a
+viewport rotated or sheared with Transform2D
+"""
+
+import os
+import sys
+import time
+import matplotlib.pyplot as plt
+import numpy as np
+from clip_window import ClipWindow
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'transformation'))
+from transformations import Transform2D
+
+
+class ConvexWindow:
+    """
+    Convex clipping polygon with precomputed inward edge normals
+
+    A point P is inside edge i when normals[i] . P >= offsets[i], so every
+    edge test of the clipper is one dot product.
+    """
+
+    def __init__(self, vertices):
+        """
+        Initialize convex window
+
+        Args:
+            vertices: array of shape (n, 2), n >= 3, in either winding order
+        """
+        vertices = np.asarray(vertices, dtype=float).reshape(-1, 2)
+        if len(vertices) < 3:
+            raise ValueError("A convex window needs at least 3 vertices")
+        edges = np.roll(vertices, -1, axis=0) - vertices
+        area = np.sum(vertices[:, 0] * np.roll(vertices[:, 1], -1) - np.roll(vertices[:, 0], -1) * vertices[:, 1])
+        if area < 0:
+            # Store counterclockwise so the inward normal is the left normal
+            vertices = vertices[::-1].copy()
+            edges = np.roll(vertices, -1, axis=0) - vertices
+        turns = edges[:, 0] * np.roll(edges[:, 1], -1) - edges[:, 1] * np.roll(edges[:, 0], -1)
+        if area == 0 or np.any(turns < 0):
+            raise ValueError("Clipping window is not convex")
+        self.vertices = vertices
+        self.normals = np.column_stack([-edges[:, 1], edges[:, 0]])
+        self.offsets = np.einsum('ij,ij->i', self.normals, vertices)
+
+    @classmethod
+    def from_transform(cls, window, matrix):
+        """
+        Convex window of a rectangle under a 3x3 affine transformation
+
+        Args:
+            window: ClipWindow giving the rectangle
+            matrix: 3x3 matrix, e.g. from Transform2D.rotation
+        """
+        corners = np.array([[window.x_min, window.y_min], [window.x_max, window.y_min],
+                            [window.x_max, window.y_max], [window.x_min, window.y_max]], dtype=float)
+        return cls(Transform2D.apply_transformation(corners, matrix))
+
+    def outline(self):
+        """x and y lists of the closed window outline, for plotting"""
+        closed = np.vstack([self.vertices, self.vertices[:1]])
+        return closed[:, 0].tolist(), closed[:, 1].tolist()
+
+
+def rotated_window(window, angle):
+    """ConvexWindow of a rectangle rotated by angle degrees about its center"""
+    cx, cy = (window.x_min + window.x_max) / 2, (window.y_min + window.y_max) / 2
+    matrix = Transform2D.translation(cx, cy) @ Transform2D.rotation(angle) @ Transform2D.translation(-cx, -cy)
+    return ConvexWindow.from_transform(window, matrix)
+
+
+# Default clipping window: the usual rectangle rotated by 30 degrees
+WINDOW = rotated_window(ClipWindow(100, 100, 500, 400), 30)
+
+def cyrus_beck_clip(x1, y1, x2, y2, window=WINDOW):
+    """Cyrus-Beck line clipping algorithm"""
+    dx = x2 - x1
+    dy = y2 - y1
+
+    t_enter = 0.0
+    t_exit = 1.0
+
+    for (nx, ny), offset in zip(window.normals.tolist(), window.offsets.tolist()):
+        # Signed distance of the start point and its rate of change along the line
+        numerator = nx * x1 + ny * y1 - offset
+        denominator = nx * dx + ny * dy
+        if denominator == 0:
+            # Parallel to edge
+            if numerator < 0:
+                # Line is outside and parallel
+                return None
+        else:
+            t = -numerator / denominator
+            if denominator > 0:
+                # Entering
+                if t > t_enter:
+                    t_enter = t
+            else:
+                # Exiting
+                if t < t_exit:
+                    t_exit = t
+
+    if t_enter > t_exit:
+        # No valid intersection
+        return None
+
+    return x1 + dx * t_enter, y1 + dy * t_enter, x1 + dx * t_exit, y1 + dy * t_exit
+
+def cyrus_beck_clip_batch(segments, window=WINDOW, dtype=np.float64):
+    """
+    Cyrus-Beck clipping of many segments without a Python loop
+
+    The edges are visited in a short loop, each one updating t_enter and
+    t_exit of all segments at once with the precomputed normal, so the cost
+    per segment is that of Liang-Barsky with one more multiply per edge.
+
+    Args:
+        segments: array of shape (N, 4) with rows (x1, y1, x2, y2)
+        window: ConvexWindow to clip against
+        dtype: floating point type of the computation and the result
+
+    Returns:
+        clipped: array of shape (N, 4) in dtype; rejected rows are NaN
+        valid: bool array of shape (N,), False where the segment was rejected
+    """
+    segments = np.asarray(segments, dtype=dtype).reshape(-1, 4)
+    x1, y1, x2, y2 = segments.T
+    dx = x2 - x1
+    dy = y2 - y1
+
+    t_enter = np.zeros(len(segments), dtype=dtype)
+    t_exit = np.ones(len(segments), dtype=dtype)
+    valid = np.ones(len(segments), dtype=bool)
+    for (nx, ny), offset in zip(window.normals.tolist(), window.offsets.tolist()):
+        numerator = nx * x1 + ny * y1 - offset
+        denominator = nx * dx + ny * dy
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = -numerator / denominator
+        np.maximum(t_enter, t, out=t_enter, where=denominator > 0)
+        np.minimum(t_exit, t, out=t_exit, where=denominator < 0)
+        # Parallel to and outside this edge
+        valid &= (denominator != 0) | (numerator >= 0)
+    valid &= t_enter <= t_exit
+
+    clipped = np.stack([
+        x1 + dx * t_enter,
+        y1 + dy * t_enter,
+        x1 + dx * t_exit,
+        y1 + dy * t_exit,
+    ], axis=1)
+    clipped[~valid] = np.nan
+    return clipped, valid
+
+def benchmark(n=1_000_000, seed=0):
+    """Compare rotated-window clipping with rectangle clipping and the transform-back approach"""
+    from liangbarsky import liang_barsky_clip_batch
+
+    rng = np.random.default_rng(seed)
+    segments = rng.uniform(0, 600, size=(n, 4))
+    rectangle = ClipWindow(100, 100, 500, 400)
+
+    def best_time(clip, *args):
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            clip(*args)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    # Clipping in the rotated frame: rotate the geometry back, clip, rotate forward
+    cx, cy = 300, 250
+    forward = Transform2D.translation(cx, cy) @ Transform2D.rotation(30) @ Transform2D.translation(-cx, -cy)
+    backward = np.linalg.inv(forward)
+
+    def transform_back(segments):
+        points = Transform2D.apply_transformation(segments.reshape(-1, 2), backward).reshape(-1, 4)
+        clipped, valid = liang_barsky_clip_batch(points, rectangle)
+        return Transform2D.apply_transformation(clipped.reshape(-1, 2), forward).reshape(-1, 4), valid
+
+    print(f"{n} segments")
+    print(f"Liang-Barsky, rectangle: {best_time(liang_barsky_clip_batch, segments, rectangle) * 1000:.0f} ms")
+    print(f"Cyrus-Beck, rectangle: "
+          f"{best_time(cyrus_beck_clip_batch, segments, ConvexWindow.from_transform(rectangle, np.eye(3))) * 1000:.0f} ms")
+    print(f"Cyrus-Beck, rotated window: {best_time(cyrus_beck_clip_batch, segments, WINDOW) * 1000:.0f} ms")
+    print(f"Transform back + Liang-Barsky: {best_time(transform_back, segments) * 1000:.0f} ms")
+
+def plot_clipping(x1, y1, x2, y2, clipped, title, filename, window=WINDOW):
+    """Plot the original line, clipping window, and clipped line"""
+    plt.figure(figsize=(8, 6))
+
+    # Plot clipping window
+    plt.plot(*window.outline(), 'k-', linewidth=2, label='Clipping Window')
+
+    # Plot original line
+    plt.plot([x1, x2], [y1, y2], 'r--', linewidth=2, label='Original Line')
+
+    # Plot clipped line if exists
+    if clipped:
+        cx1, cy1, cx2, cy2 = clipped
+        plt.plot([cx1, cx2], [cy1, cy2], 'b-', linewidth=3, label='Clipped Line')
+
+    plt.xlim(0, 600)
+    plt.ylim(0, 500)
+    plt.xlabel('X')
+    plt.ylabel('Y')
+    plt.title(title)
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.axis('equal')
+    plt.savefig(f'plots/clipping/{filename}.png', dpi=150, bbox_inches='tight')
+    plt.close()
+
+# Example usage
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+        sys.exit()
+
+    # Test cases
+    test_lines = [
+        (50, 150, 550, 350),    # Crosses two edges
+        (150, 50, 350, 450),    # Crosses two edges
+        (50, 50, 550, 450),     # Diagonal through the window
+        (280, 230, 320, 270),   # Completely inside
+        (600, 500, 700, 600),   # Completely outside
+    ]
+
+    for i, (x1, y1, x2, y2) in enumerate(test_lines):
+        clipped = cyrus_beck_clip(x1, y1, x2, y2)
+        title = f"Cyrus-Beck Line Clipping - Test Case {i+1}"
+        filename = f"cyrus_beck_{i+1}"
+        plot_clipping(x1, y1, x2, y2, clipped, title, filename)
+        print(f"Test Case {i+1}: Original ({x1}, {y1}) to ({x2}, {y2})")
+        if clipped:
+            print(f"  Clipped: ({clipped[0]:.2f}, {clipped[1]:.2f}) to ({clipped[2]:.2f}, {clipped[3]:.2f})")
+        else:
+            print("  No intersection - line completely outside")
+        print()
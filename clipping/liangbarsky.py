@@ -3,14 +3,17 @@ Liang-Barsky Line Clipping Algorithm
 Parametric line clipping against a rectangular window
 """
 
+import sys
+import time
 import matplotlib.pyplot as plt
 import numpy as np
+from clip_window import ClipWindow, window_bounds
+from spatial_index import SpatialIndex
 
-# Define the clipping window
-X_MIN, Y_MIN = 100, 100
-X_MAX, Y_MAX = 500, 400
+# Default clipping window
+WINDOW = ClipWindow(100, 100, 500, 400)
 
-def liang_barsky_clip(x1, y1, x2, y2):
+def liang_barsky_clip(x1, y1, x2, y2, window=WINDOW):
     """Liang-Barsky line clipping algorithm"""
     dx = x2 - x1
     dy = y2 - y1
@@ -18,7 +21,7 @@ def liang_barsky_clip(x1, y1, x2, y2):
     # Parametric equations: x = x1 + dx*t, y = y1 + dy*t
     # Clipping boundaries
     p = [-dx, dx, -dy, dy]
-    q = [x1 - X_MIN, X_MAX - x1, y1 - Y_MIN, Y_MAX - y1]
+    q = [x1 - window.x_min, window.x_max - x1, y1 - window.y_min, window.y_max - y1]
 
     t_enter = 0.0
     t_exit = 1.0
@@ -52,14 +55,114 @@ def liang_barsky_clip(x1, y1, x2, y2):
 
     return x1_clip, y1_clip, x2_clip, y2_clip
 
-def plot_clipping(x1, y1, x2, y2, clipped, title, filename):
+def liang_barsky_clip_batch(segments, window=WINDOW, dtype=np.float64):
+    """
+    Liang-Barsky clipping of many segments without a Python loop
+
+    p and q are evaluated for all segments at once, one array per boundary.
+    t_enter and t_exit are max/min reductions over the entering and exiting
+    boundaries, and segments parallel to and outside a boundary are rejected
+    by mask.
+
+    Args:
+        segments: array of shape (N, 4) with rows (x1, y1, x2, y2), or a
+                  SpatialIndex built with from_segments
+        window: ClipWindow to clip against
+        dtype: np.float64 matches liang_barsky_clip exactly; np.float32
+               halves the memory traffic for large batches
+
+    Returns:
+        clipped: array of shape (N, 4) in dtype; rejected rows are NaN
+        valid: bool array of shape (N,), False where the segment was rejected
+        ids: only for a SpatialIndex, the indices of the candidate segments
+             the rows belong to; segments outside the window are not clipped
+    """
+    if isinstance(segments, SpatialIndex):
+        ids = segments.query(window)
+        return (*liang_barsky_clip_batch(segments.segments[ids], window, dtype), ids)
+    clipped, valid = liang_barsky_clip_multi(segments, [window], dtype)
+    return clipped[0], valid[0]
+
+def liang_barsky_clip_multi(segments, windows, dtype=np.float64):
+    """
+    Clip one set of segments against K windows in a single pass
+
+    The direction p of every segment is computed once; only q depends on
+    the window, so the (K, 1) window bounds broadcast against the segments.
+
+    Args:
+        segments: array of shape (N, 4) with rows (x1, y1, x2, y2)
+        windows: sequence of K ClipWindow objects
+        dtype: floating point type of the computation and the result
+
+    Returns:
+        clipped: array of shape (K, N, 4) in dtype; rejected rows are NaN
+        valid: bool array of shape (K, N)
+    """
+    segments = np.asarray(segments, dtype=dtype).reshape(-1, 4)
+    x_min, y_min, x_max, y_max = window_bounds(windows, dtype)
+    x1, y1, x2, y2 = segments.T
+    dx = x2 - x1
+    dy = y2 - y1
+
+    # p = (-dx, dx, -dy, dy) and q per boundary; for each axis the boundary
+    # with p < 0 is the entering one and the other is exiting
+    q_left, q_right = x1 - x_min, x_max - x1
+    q_bottom, q_top = y1 - y_min, y_max - y1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_left, t_right = q_left / -dx, q_right / dx
+        t_bottom, t_top = q_bottom / -dy, q_top / dy
+    t_enter = np.maximum(np.maximum(np.where(dx > 0, t_left, np.where(dx < 0, t_right, 0.0)),
+                                    np.where(dy > 0, t_bottom, np.where(dy < 0, t_top, 0.0))), 0.0)
+    t_exit = np.minimum(np.minimum(np.where(dx > 0, t_right, np.where(dx < 0, t_left, 1.0)),
+                                   np.where(dy > 0, t_top, np.where(dy < 0, t_bottom, 1.0))), 1.0)
+
+    # Segments parallel to a boundary and outside it
+    parallel_outside = ((dx == 0) & ((q_left < 0) | (q_right < 0))) | \
+                       ((dy == 0) & ((q_bottom < 0) | (q_top < 0)))
+    valid = ~parallel_outside & (t_enter <= t_exit)
+
+    clipped = np.stack([
+        x1 + dx * t_enter,
+        y1 + dy * t_enter,
+        x1 + dx * t_exit,
+        y1 + dy * t_exit,
+    ], axis=-1)
+    clipped[~valid] = np.nan
+    return clipped, valid
+
+def benchmark(n=1_000_000, seed=0):
+    """Time the scalar clipper against the batch clipper in float64 and float32"""
+    rng = np.random.default_rng(seed)
+    segments = rng.uniform(0, 600, size=(n, 4))
+
+    start = time.perf_counter()
+    scalar = [liang_barsky_clip(*segment) for segment in segments.tolist()]
+    scalar_time = time.perf_counter() - start
+
+    timings = {}
+    for dtype in (np.float64, np.float32):
+        start = time.perf_counter()
+        clipped, valid = liang_barsky_clip_batch(segments, dtype=dtype)
+        timings[np.dtype(dtype).name] = time.perf_counter() - start
+
+    clipped, valid = liang_barsky_clip_batch(segments)
+    matches = all(
+        (result is None and not ok) or (ok and tuple(row) == result)
+        for result, row, ok in zip(scalar, clipped.tolist(), valid)
+    )
+    print(f"{n} segments, {valid.sum()} accepted")
+    print(f"Scalar: {scalar_time:.2f}s")
+    for name, elapsed in timings.items():
+        print(f"Batch {name}: {elapsed:.3f}s ({scalar_time / elapsed:.0f}x)")
+    print(f"Batch float64 matches scalar: {matches}")
+
+def plot_clipping(x1, y1, x2, y2, clipped, title, filename, window=WINDOW):
     """Plot the original line, clipping window, and clipped line"""
     plt.figure(figsize=(8, 6))
 
     # Plot clipping window
-    plt.plot([X_MIN, X_MAX, X_MAX, X_MIN, X_MIN],
-             [Y_MIN, Y_MIN, Y_MAX, Y_MAX, Y_MIN],
-             'k-', linewidth=2, label='Clipping Window')
+    plt.plot(*window.outline(), 'k-', linewidth=2, label='Clipping Window')
 
     # Plot original line
     plt.plot([x1, x2], [y1, y2], 'r--', linewidth=2, label='Original Line')
@@ -82,6 +185,10 @@ def plot_clipping(x1, y1, x2, y2, clipped, title, filename):
 
 # Example usage
 if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+        sys.exit()
+
     # Test cases
     test_lines = [
         (50, 150, 550, 350),    # Crosses right boundary
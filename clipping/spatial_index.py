@@ -0,0 +1,278 @@
+"""
+Spatial indexes over segments and polygons
+A window query returns only the items whose bounding box overlaps the
+window, so the clippers can skip everything outside the visible area
+"""
+
+import sys
+import time
+from abc import ABC, abstractmethod
+import numpy as np
+
+
+def segment_boxes(segments):
+    """Bounding boxes (x_min, y_min, x_max, y_max) of an (N, 4) segment array"""
+    segments = np.asarray(segments).reshape(-1, 4)
+    x_low = np.minimum(segments[:, 0], segments[:, 2])
+    x_high = np.maximum(segments[:, 0], segments[:, 2])
+    y_low = np.minimum(segments[:, 1], segments[:, 3])
+    y_high = np.maximum(segments[:, 1], segments[:, 3])
+    return np.column_stack([x_low, y_low, x_high, y_high])
+
+
+def polygon_boxes(vertices, offsets):
+    """Bounding boxes of a ragged polygon set; empty polygons get an inverted box"""
+    vertices = np.asarray(vertices).reshape(-1, 2)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    boxes = np.empty((len(offsets) - 1, 4))
+    boxes[:, :2] = np.inf
+    boxes[:, 2:] = -np.inf
+    closed = np.flatnonzero(np.diff(offsets) > 0)
+    if len(closed):
+        starts = offsets[closed]
+        for column, (reduce, axis) in enumerate([(np.minimum, 0), (np.minimum, 1),
+                                                  (np.maximum, 0), (np.maximum, 1)]):
+            boxes[closed, column] = reduce.reduceat(vertices[:, axis], starts)
+    return boxes
+
+
+def boxes_overlap(boxes, window):
+    """Mask of the boxes overlapping the window, boundary included"""
+    return (boxes[:, 2] >= window.x_min) & (boxes[:, 0] <= window.x_max) & \
+           (boxes[:, 3] >= window.y_min) & (boxes[:, 1] <= window.y_max)
+
+
+class SpatialIndex(ABC):
+    """
+    Abstract base class of the spatial indexes
+
+    An index is built over the bounding boxes of either segments or
+    polygons and keeps a reference to that geometry, so clip functions
+    given an index can fetch the candidates of a window themselves.
+    """
+
+    def __init__(self, boxes, segments=None, vertices=None, offsets=None):
+        """
+        Initialize index
+
+        Args:
+            boxes: float array of shape (N, 4), one bounding box per item
+            segments: (N, 4) segment array the boxes came from, if any
+            vertices, offsets: ragged polygon set the boxes came from, if any
+        """
+        self.boxes = boxes
+        self.segments = segments
+        self.vertices = vertices
+        self.offsets = offsets
+
+    @classmethod
+    def from_segments(cls, segments, **options):
+        """Index an (N, 4) array of segments"""
+        segments = np.asarray(segments, dtype=float).reshape(-1, 4)
+        return cls(segment_boxes(segments), segments=segments, **options)
+
+    @classmethod
+    def from_polygons(cls, vertices, offsets, **options):
+        """Index a ragged polygon set given as vertices and offsets"""
+        vertices = np.asarray(vertices, dtype=float).reshape(-1, 2)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        return cls(polygon_boxes(vertices, offsets), vertices=vertices, offsets=offsets, **options)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    @abstractmethod
+    def query(self, window):
+        """Sorted int64 indices of the items whose box overlaps the window"""
+
+    def brute_force_query(self, window):
+        """Reference result of query() from testing every box"""
+        return np.flatnonzero(boxes_overlap(self.boxes, window))
+
+
+class GridIndex(SpatialIndex):
+    """
+    Uniform grid of buckets over the item bounding boxes
+
+    Every item is listed in each cell its box covers, stored CSR style as
+    one item array sorted by cell plus per-cell offsets. Items covering more
+    than max_cells cells (long segments, huge polygons) are kept in a
+    separate list that every query tests directly.
+    """
+
+    def __init__(self, boxes, cells=None, max_cells=16, **geometry):
+        """
+        Initialize grid
+
+        Args:
+            boxes: float array of shape (N, 4)
+            cells: number of cells per axis; about sqrt(N / 4) by default
+            max_cells: items covering more cells go to the oversize list
+            geometry: segments or vertices/offsets, see SpatialIndex
+        """
+        super().__init__(boxes, **geometry)
+        if cells is None:
+            cells = int(np.clip(np.sqrt(len(boxes) / 4), 1, 4096))
+        self.cells = cells
+        valid = boxes[:, 0] <= boxes[:, 2]
+        if valid.any():
+            self.origin = np.array([boxes[valid, 0].min(), boxes[valid, 1].min()])
+            extent = np.array([boxes[valid, 2].max(), boxes[valid, 3].max()]) - self.origin
+        else:
+            self.origin, extent = np.zeros(2), np.ones(2)
+        self.cell_size = np.maximum(extent, 1e-9) / cells
+
+        ids = np.flatnonzero(valid)
+        low = self._cell_coords(boxes[ids, :2])
+        high = self._cell_coords(boxes[ids, 2:])
+        width = high[:, 0] - low[:, 0] + 1
+        span = width * (high[:, 1] - low[:, 1] + 1)
+        oversize = span > max_cells
+        self.oversize = ids[oversize]
+
+        # One entry per (item, covered cell)
+        ids, low, width, span = ids[~oversize], low[~oversize], width[~oversize], span[~oversize]
+        starts = np.cumsum(span) - span
+        item = np.repeat(np.arange(len(ids)), span)
+        k = np.arange(len(item)) - starts[item]
+        cell = (low[item, 1] + k // width[item]) * cells + low[item, 0] + k % width[item]
+
+        order = np.argsort(cell, kind='stable')
+        self.cell_items = ids[item[order]]
+        self.cell_offsets = np.zeros(cells * cells + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cell, minlength=cells * cells), out=self.cell_offsets[1:])
+
+    def _cell_coords(self, points):
+        coords = np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+        return np.clip(coords, 0, self.cells - 1)
+
+    def query(self, window):
+        corner_low = np.array([window.x_min, window.y_min])
+        corner_high = np.array([window.x_max, window.y_max])
+        if len(self.cell_items) and np.all(corner_high >= self.origin) and \
+                np.all(corner_low <= self.origin + self.cell_size * self.cells):
+            (cx0, cy0), (cx1, cy1) = self._cell_coords(np.array([corner_low, corner_high]))
+            rows = np.arange(cy0, cy1 + 1) * self.cells
+            starts = self.cell_offsets[rows + cx0]
+            counts = self.cell_offsets[rows + cx1 + 1] - starts
+            total = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum(counts, out=total[1:])
+            positions = np.repeat(starts - total[:-1], counts) + np.arange(total[-1])
+            candidates = np.concatenate([self.cell_items[positions], self.oversize])
+        else:
+            candidates = self.oversize.copy()
+        # Items covering several cells are listed once per cell
+        candidates.sort()
+        candidates = candidates[np.diff(candidates, prepend=-1) != 0]
+        return candidates[boxes_overlap(self.boxes[candidates], window)]
+
+
+class PackedRTree(SpatialIndex):
+    """
+    Static R-tree packed bottom-up from items sorted along a Z-order curve
+
+    Each level stores the bounding boxes of groups of node_size children, so
+    a query walks the levels top-down keeping only overlapping nodes, with
+    one vectorized test per level.
+    """
+
+    def __init__(self, boxes, node_size=16, **geometry):
+        """
+        Initialize tree
+
+        Args:
+            boxes: float array of shape (N, 4)
+            node_size: children per node
+            geometry: segments or vertices/offsets, see SpatialIndex
+        """
+        super().__init__(boxes, **geometry)
+        self.node_size = node_size
+        ids = np.flatnonzero(boxes[:, 0] <= boxes[:, 2])
+
+        # Z-order of the box centers on a 2^16 grid
+        centers = (boxes[ids, :2] + boxes[ids, 2:]) / 2
+        if len(ids):
+            low, high = centers.min(axis=0), centers.max(axis=0)
+            grid = ((centers - low) / np.maximum(high - low, 1e-9) * 65535).astype(np.uint64)
+            z = self._interleave(grid[:, 0]) | (self._interleave(grid[:, 1]) << np.uint64(1))
+            ids = ids[np.argsort(z, kind='stable')]
+        self.order = ids
+
+        # levels[0] holds the item boxes in packed order, the last the root
+        self.levels = [boxes[self.order]]
+        while len(self.levels[-1]) > 1:
+            child = self.levels[-1]
+            starts = np.arange(0, len(child), node_size)
+            self.levels.append(np.column_stack([
+                np.minimum.reduceat(child[:, 0], starts),
+                np.minimum.reduceat(child[:, 1], starts),
+                np.maximum.reduceat(child[:, 2], starts),
+                np.maximum.reduceat(child[:, 3], starts),
+            ]))
+
+    @staticmethod
+    def _interleave(values):
+        # Spread the low 16 bits of values to the even bit positions
+        values = values & np.uint64(0xFFFF)
+        for shift, mask in ((8, 0x00FF00FF), (4, 0x0F0F0F0F), (2, 0x33333333), (1, 0x55555555)):
+            values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+        return values
+
+    def query(self, window):
+        nodes = np.flatnonzero(boxes_overlap(self.levels[-1], window))
+        for level in reversed(self.levels[:-1]):
+            # Children of the kept nodes, then keep those that overlap
+            first = nodes * self.node_size
+            counts = np.minimum(first + self.node_size, len(level)) - first
+            total = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum(counts, out=total[1:])
+            children = np.repeat(first - total[:-1], counts) + np.arange(total[-1])
+            nodes = children[boxes_overlap(level[children], window)]
+        return np.sort(self.order[nodes])
+
+
+def random_scene(n, size=100_000.0, max_length=50.0, seed=0):
+    """n short random segments spread over a size x size scene"""
+    rng = np.random.default_rng(seed)
+    start = rng.uniform(0, size, size=(n, 2))
+    end = start + rng.uniform(-max_length, max_length, size=(n, 2))
+    return np.column_stack([start, end])
+
+
+def benchmark(n=5_000_000, frames=20):
+    """Pan a window showing about 1% of a large scene, with and without an index"""
+    from clip_window import ClipWindow
+    from cohensutherland import cohen_sutherland_clip_batch
+
+    segments = random_scene(n)
+    print(f"{n} segments")
+    indexes = {}
+    for cls in (GridIndex, PackedRTree):
+        start = time.perf_counter()
+        indexes[cls.__name__] = cls.from_segments(segments)
+        print(f"{cls.__name__} build: {time.perf_counter() - start:.2f}s")
+
+    side = 10_000.0
+    windows = [ClipWindow(x, 40_000.0, x + side, 40_000.0 + side)
+               for x in np.linspace(0, 90_000.0, frames)]
+
+    start = time.perf_counter()
+    cohen_sutherland_clip_batch(segments, windows[0])
+    full_time = time.perf_counter() - start
+    print(f"No index: {full_time * 1000:.0f} ms per frame")
+    for name, index in indexes.items():
+        start = time.perf_counter()
+        for window in windows:
+            clipped, valid, ids = cohen_sutherland_clip_batch(index, window)
+        frame_time = (time.perf_counter() - start) / frames
+        matches = np.array_equal(index.query(windows[-1]), index.brute_force_query(windows[-1]))
+        print(f"{name}: {frame_time * 1000:.1f} ms per frame, {len(ids)} candidates, "
+              f"matches brute force: {matches}")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        # The clippers import this file as spatial_index, so the benchmark
+        # has to build that module's index classes rather than __main__'s
+        import spatial_index
+        spatial_index.benchmark()
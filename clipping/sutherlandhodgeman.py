@@ -3,46 +3,50 @@ Sutherland-Hodgeman Polygon Clipping Algorithm
 Clips polygons against a rectangular clipping window
 """
 
+import math
+import sys
+import time
 import matplotlib.pyplot as plt
 import numpy as np
+from clip_window import ClipWindow
+from spatial_index import SpatialIndex
 
-# Define the clipping window
-X_MIN, Y_MIN = 100, 100
-X_MAX, Y_MAX = 500, 400
+# Default clipping window
+WINDOW = ClipWindow(100, 100, 500, 400)
 
-def inside(p, edge):
+def inside(p, edge, window=WINDOW):
     """Check if point p is inside the clipping boundary for given edge"""
     x, y = p
     if edge == 'left':
-        return x >= X_MIN
+        return x >= window.x_min
     elif edge == 'right':
-        return x <= X_MAX
+        return x <= window.x_max
     elif edge == 'bottom':
-        return y >= Y_MIN
+        return y >= window.y_min
     elif edge == 'top':
-        return y <= Y_MAX
+        return y <= window.y_max
 
-def compute_intersection(p1, p2, edge):
+def compute_intersection(p1, p2, edge, window=WINDOW):
     """Compute intersection point of line segment p1p2 with the clipping boundary"""
     x1, y1 = p1
     x2, y2 = p2
 
     if edge == 'left':
-        x = X_MIN
-        y = y1 + (y2 - y1) * (X_MIN - x1) / (x2 - x1)
+        x = window.x_min
+        y = y1 + (y2 - y1) * (window.x_min - x1) / (x2 - x1)
     elif edge == 'right':
-        x = X_MAX
-        y = y1 + (y2 - y1) * (X_MAX - x1) / (x2 - x1)
+        x = window.x_max
+        y = y1 + (y2 - y1) * (window.x_max - x1) / (x2 - x1)
     elif edge == 'bottom':
-        y = Y_MIN
-        x = x1 + (x2 - x1) * (Y_MIN - y1) / (y2 - y1)
+        y = window.y_min
+        x = x1 + (x2 - x1) * (window.y_min - y1) / (y2 - y1)
     elif edge == 'top':
-        y = Y_MAX
-        x = x1 + (x2 - x1) * (Y_MAX - y1) / (y2 - y1)
+        y = window.y_max
+        x = x1 + (x2 - x1) * (window.y_max - y1) / (y2 - y1)
 
     return [x, y]
 
-def clip_polygon_to_edge(polygon, edge):
+def clip_polygon_to_edge(polygon, edge, window=WINDOW):
     """Clip polygon against a single edge"""
     output = []
 
@@ -52,36 +56,350 @@ def clip_polygon_to_edge(polygon, edge):
     s = polygon[-1]  # Last point
 
     for p in polygon:
-        if inside(p, edge):
-            if not inside(s, edge):
+        if inside(p, edge, window):
+            if not inside(s, edge, window):
                 # s outside, p inside: add intersection
-                output.append(compute_intersection(s, p, edge))
+                output.append(compute_intersection(s, p, edge, window))
             output.append(p)
-        elif inside(s, edge):
+        elif inside(s, edge, window):
             # s inside, p outside: add intersection
-            output.append(compute_intersection(s, p, edge))
+            output.append(compute_intersection(s, p, edge, window))
         s = p
 
     return output
 
-def sutherland_hodgeman_clip(polygon):
+def sutherland_hodgeman_clip(polygon, window=WINDOW):
     """Sutherland-Hodgeman polygon clipping algorithm"""
     # Clip against each edge in sequence
     edges = ['left', 'top', 'right', 'bottom']
 
     for edge in edges:
-        polygon = clip_polygon_to_edge(polygon, edge)
+        polygon = clip_polygon_to_edge(polygon, edge, window)
 
     return polygon
 
-def plot_clipping(original_polygon, clipped_polygon, title, filename):
+def clip_stage(vertices, axis, bound, keep_above):
+    """
+    Clip a stream of vertices against one boundary, yielding the output
+
+    The boundary test is fixed when the stage is built, so no edge name is
+    compared per vertex. The closing edge from the last vertex back to the
+    first is handled when the input runs out, which starts the output at a
+    different vertex than clip_polygon_to_edge but keeps the same cyclic
+    order.
+
+    Args:
+        vertices: iterable of (x, y) points
+        axis: 0 for a vertical boundary x = bound, 1 for y = bound
+        bound: boundary coordinate
+        keep_above: True keeps coordinates >= bound, False keeps <= bound
+    """
+    other = 1 - axis
+
+    def intersection(p1, p2):
+        c = p1[other] + (p2[other] - p1[other]) * (bound - p1[axis]) / (p2[axis] - p1[axis])
+        return [bound, c] if axis == 0 else [c, bound]
+
+    vertices = iter(vertices)
+    first = s = next(vertices, None)
+    if first is None:
+        return
+    first_inside = s_inside = first[axis] >= bound if keep_above else first[axis] <= bound
+    if first_inside:
+        yield first
+
+    # The loop is written out per direction to keep the test a single comparison
+    if keep_above:
+        for p in vertices:
+            if p[axis] >= bound:
+                if not s_inside:
+                    yield intersection(s, p)
+                    s_inside = True
+                yield p
+            elif s_inside:
+                yield intersection(s, p)
+                s_inside = False
+            s = p
+    else:
+        for p in vertices:
+            if p[axis] <= bound:
+                if not s_inside:
+                    yield intersection(s, p)
+                    s_inside = True
+                yield p
+            elif s_inside:
+                yield intersection(s, p)
+                s_inside = False
+            s = p
+
+    # Closing edge from the last vertex back to the first
+    if first_inside != s_inside:
+        yield intersection(s, first)
+
+def sutherland_hodgeman_stream(polygon, window=WINDOW):
+    """
+    Sutherland-Hodgeman clipping as a pipeline of four chained generators
+
+    Vertices stream through the left, top, right and bottom stages without
+    intermediate lists. The result is the polygon sutherland_hodgeman_clip
+    returns, possibly starting at a different vertex.
+    """
+    vertices = clip_stage(polygon, 0, window.x_min, True)
+    vertices = clip_stage(vertices, 1, window.y_max, False)
+    vertices = clip_stage(vertices, 0, window.x_max, False)
+    return clip_stage(vertices, 1, window.y_min, True)
+
+def sutherland_hodgeman_clip_streaming(polygon, window=WINDOW):
+    """Pipelined Sutherland-Hodgeman clipping, collected into a list"""
+    return list(sutherland_hodgeman_stream(polygon, window))
+
+def star_polygon(n, points=5, center=(300, 250), radii=(120, 300)):
+    """Star-shaped test polygon with n vertices and smooth lobes"""
+    angles = np.linspace(0, 2 * math.pi, n, endpoint=False)
+    inner, outer = radii
+    r = inner + (outer - inner) * (0.5 + 0.5 * np.cos(points * angles))
+    return np.column_stack([center[0] + r * np.cos(angles),
+                            center[1] + r * np.sin(angles)]).tolist()
+
+def pack_polygons(polygons):
+    """
+    Pack a list of polygons into the ragged layout used by the batch clipper
+
+    Returns:
+        vertices: float array of shape (V, 2)
+        offsets: int64 array of shape (P + 1,); polygon i owns
+                 vertices[offsets[i]:offsets[i + 1]]
+    """
+    counts = [len(polygon) for polygon in polygons]
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    vertices = np.array([p for polygon in polygons for p in polygon], dtype=float).reshape(-1, 2)
+    return vertices, offsets
+
+def unpack_polygons(vertices, offsets):
+    """Split a ragged polygon set back into a list of (n, 2) arrays"""
+    return np.split(vertices, offsets[1:-1])
+
+def clip_edge_batch(vertices, offsets, axis, bound, keep_above):
+    """
+    Clip every polygon of a ragged set against one boundary at once
+
+    Each vertex p is paired with its predecessor s in the same polygon (the
+    first vertex with the last). Like clip_polygon_to_edge, a pair emits the
+    intersection when it crosses the boundary and then p when p is inside.
+
+    Args:
+        vertices: float array of shape (V, 2)
+        offsets: int64 array of shape (P + 1,)
+        axis: 0 for a vertical boundary x = bound, 1 for y = bound
+        bound: boundary coordinate
+        keep_above: True keeps coordinates >= bound, False keeps <= bound
+
+    Returns:
+        vertices, offsets of the clipped polygons in the same layout
+    """
+    if len(vertices) == 0:
+        return vertices, offsets
+    closed = np.diff(offsets) > 0
+    starts, ends = offsets[:-1][closed], offsets[1:][closed]
+
+    c = vertices[:, axis]
+    inside = c >= bound if keep_above else c <= bound
+    prev_inside = np.roll(inside, 1)
+    prev_inside[starts] = inside[ends - 1]
+    crossing = np.flatnonzero(inside != prev_inside)
+
+    # Predecessor of each crossing vertex, wrapping at the polygon starts
+    prev = crossing - 1
+    k = np.minimum(np.searchsorted(starts, crossing), len(starts) - 1)
+    wraps = starts[k] == crossing
+    prev[wraps] = ends[k[wraps]] - 1
+
+    # Intersection of the crossing pairs, same formula as compute_intersection(s, p)
+    s = np.take(vertices, prev, axis=0)
+    p = np.take(vertices, crossing, axis=0)
+    other = 1 - axis
+    points = np.empty_like(p)
+    points[:, axis] = bound
+    points[:, other] = s[:, other] + (p[:, other] - s[:, other]) * (bound - s[:, axis]) / (p[:, axis] - s[:, axis])
+
+    # Kept vertices in order, with each intersection spliced in just before
+    # the vertex that ends its crossing pair
+    kept = np.flatnonzero(inside)
+    spliced = np.searchsorted(kept, crossing) + np.arange(len(crossing))
+    clipped = np.empty((len(kept) + len(crossing), 2), dtype=vertices.dtype)
+    clipped[spliced] = points
+    from_vertices = np.ones(len(clipped), dtype=bool)
+    from_vertices[spliced] = False
+    for column in range(2):
+        clipped[:, column][from_vertices] = vertices[:, column][inside]
+
+    # Output offsets count the kept vertices and intersections before each
+    # polygon boundary
+    return clipped, np.searchsorted(kept, offsets) + np.searchsorted(crossing, offsets)
+
+def clip_edges_batch(vertices, offsets, window):
+    """Run the left, top, right and bottom passes of clip_edge_batch"""
+    vertices, offsets = clip_edge_batch(vertices, offsets, 0, window.x_min, True)
+    vertices, offsets = clip_edge_batch(vertices, offsets, 1, window.y_max, False)
+    vertices, offsets = clip_edge_batch(vertices, offsets, 0, window.x_max, False)
+    return clip_edge_batch(vertices, offsets, 1, window.y_min, True)
+
+def gather_polygons(vertices, starts, counts):
+    """
+    Build a ragged polygon set from runs of vertices
+
+    Output polygon i is vertices[starts[i]:starts[i] + counts[i]].
+
+    Returns:
+        vertices, offsets of the gathered polygons
+    """
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    source = np.repeat(starts - offsets[:-1], counts) + np.arange(offsets[-1])
+    return np.take(vertices, source, axis=0), offsets
+
+def sutherland_hodgeman_clip_batch(vertices, offsets=None, window=WINDOW):
+    """
+    Sutherland-Hodgeman clipping of many polygons in one call
+
+    Polygons whose bounding box lies inside the window are kept as they are
+    and polygons entirely beyond one boundary are dropped. The four boundary
+    passes then run vectorized across the remaining polygons. Polygons
+    clipped away keep their slot with zero vertices, and every polygon has
+    the vertices sutherland_hodgeman_clip would return, in the same order.
+
+    Args:
+        vertices: array of shape (V, 2) with the vertices of all polygons,
+                  or a SpatialIndex built with from_polygons
+        offsets: int array of shape (P + 1,); polygon i owns
+                 vertices[offsets[i]:offsets[i + 1]]
+        window: ClipWindow to clip against
+
+    Returns:
+        vertices: float array of shape (V', 2)
+        offsets: int64 array of shape (P + 1,)
+        ids: only for a SpatialIndex, the indices of the candidate polygons
+             the result holds; polygons outside the window are not clipped
+    """
+    if isinstance(vertices, SpatialIndex):
+        index = vertices
+        ids = index.query(window)
+        candidates = gather_polygons(index.vertices, index.offsets[ids], np.diff(index.offsets)[ids])
+        return (*sutherland_hodgeman_clip_batch(*candidates, window), ids)
+    vertices = np.asarray(vertices, dtype=float).reshape(-1, 2)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    counts = np.diff(offsets)
+    closed = np.flatnonzero(counts > 0)
+    if len(closed) == 0:
+        return vertices[:0], np.zeros_like(offsets)
+
+    # Bounding boxes of the non-empty polygons, which sit back to back
+    starts = offsets[closed]
+    x, y = vertices[:, 0], vertices[:, 1]
+    x_low, x_high = np.minimum.reduceat(x, starts), np.maximum.reduceat(x, starts)
+    y_low, y_high = np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)
+    accept = (x_low >= window.x_min) & (x_high <= window.x_max) & \
+             (y_low >= window.y_min) & (y_high <= window.y_max)
+    reject = (x_high < window.x_min) | (x_low > window.x_max) | \
+             (y_high < window.y_min) | (y_low > window.y_max)
+    straddle = closed[~accept & ~reject]
+
+    clipped, clipped_offsets = clip_edges_batch(
+        *gather_polygons(vertices, offsets[straddle], counts[straddle]), window)
+
+    # Merge the untouched and the clipped polygons back in their order
+    result_counts = np.zeros_like(counts)
+    result_counts[closed[accept]] = counts[closed[accept]]
+    result_counts[straddle] = np.diff(clipped_offsets)
+    result_starts = offsets[:-1].copy()
+    result_starts[straddle] = len(vertices) + clipped_offsets[:-1]
+    return gather_polygons(np.concatenate([vertices, clipped]), result_starts, result_counts)
+
+def sutherland_hodgeman_clip_array(polygon, window=WINDOW):
+    """
+    Vectorized Sutherland-Hodgeman clipping of a single, possibly huge, polygon
+
+    Each boundary pass is computed with masks over consecutive vertex pairs
+    and the intersections are spliced in by index arithmetic (see
+    clip_edge_batch), so there is no Python iteration per vertex. The
+    vertices and their order match sutherland_hodgeman_clip.
+
+    Args:
+        polygon: array of shape (n, 2)
+        window: ClipWindow to clip against
+
+    Returns:
+        float array of shape (m, 2)
+    """
+    polygon = np.asarray(polygon, dtype=float).reshape(-1, 2)
+    vertices, _ = clip_edges_batch(polygon, np.array([0, len(polygon)]), window)
+    return vertices
+
+def coastline_polygon(n, center=(300, 250), radius=220, roughness=0.15, seed=0):
+    """Rough closed test polygon with n vertices, like a coastline or contour"""
+    rng = np.random.default_rng(seed)
+    angles = np.linspace(0, 2 * math.pi, n, endpoint=False)
+    # Random walk in the radius, bent back so the outline closes
+    walk = np.cumsum(rng.normal(0, 1, n))
+    walk -= np.linspace(0, walk[-1], n)
+    r = radius * (1 + roughness * walk / np.abs(walk).max())
+    return np.column_stack([center[0] + r * np.cos(angles),
+                            center[1] + r * np.sin(angles)])
+
+def building_polygons(count, seed=0):
+    """Small random convex polygons (3 to 8 vertices) scattered around the window"""
+    rng = np.random.default_rng(seed)
+    polygons = []
+    for cx, cy, size, n in zip(rng.uniform(0, 600, count), rng.uniform(0, 500, count),
+                               rng.uniform(2, 20, count), rng.integers(3, 9, count)):
+        angles = np.sort(rng.uniform(0, 2 * math.pi, n))
+        polygons.append(np.column_stack([cx + size * np.cos(angles),
+                                         cy + size * np.sin(angles)]).tolist())
+    return polygons
+
+def best_time(clip, *args, repeats=5):
+    """Best wall time of clip(*args) over a few runs, and its result"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = clip(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def benchmark(n=10_000, buildings=200_000, coastline=2_000_000):
+    """Time list-based, pipelined and batch clipping"""
+    polygon = star_polygon(n)
+    list_time, clipped = best_time(sutherland_hodgeman_clip, polygon)
+    stream_time, streamed = best_time(sutherland_hodgeman_clip_streaming, polygon)
+    print(f"{n}-vertex polygon, {len(clipped)} clipped vertices")
+    print(f"List passes: {list_time * 1000:.1f} ms, pipeline: {stream_time * 1000:.1f} ms "
+          f"({list_time / stream_time:.1f}x)")
+
+    polygons = building_polygons(buildings)
+    vertices, offsets = pack_polygons(polygons)
+    scalar_time, clipped = best_time(lambda: [sutherland_hodgeman_clip(p) for p in polygons], repeats=1)
+    batch_time, (clipped_vertices, clipped_offsets) = best_time(sutherland_hodgeman_clip_batch, vertices, offsets)
+    kept = np.count_nonzero(np.diff(clipped_offsets))
+    print(f"{buildings} polygons ({len(vertices)} vertices), {kept} left after clipping")
+    print(f"One call per polygon: {scalar_time * 1000:.0f} ms, batch: {batch_time * 1000:.1f} ms "
+          f"({scalar_time / batch_time:.0f}x)")
+
+    polygon = coastline_polygon(coastline)
+    points = polygon.tolist()
+    scalar_time, clipped = best_time(sutherland_hodgeman_clip, points, repeats=1)
+    array_time, clipped_array = best_time(sutherland_hodgeman_clip_array, polygon)
+    print(f"{coastline}-vertex coastline, {len(clipped_array)} clipped vertices, "
+          f"same vertices and order: {np.array_equal(clipped_array, clipped)}")
+    print(f"List passes: {scalar_time * 1000:.0f} ms, vectorized: {array_time * 1000:.1f} ms "
+          f"({scalar_time / array_time:.0f}x)")
+
+def plot_clipping(original_polygon, clipped_polygon, title, filename, window=WINDOW):
     """Plot the original polygon, clipping window, and clipped polygon"""
     plt.figure(figsize=(8, 6))
 
     # Plot clipping window
-    plt.plot([X_MIN, X_MAX, X_MAX, X_MIN, X_MIN],
-             [Y_MIN, Y_MIN, Y_MAX, Y_MAX, Y_MIN],
-             'k-', linewidth=2, label='Clipping Window')
+    plt.plot(*window.outline(), 'k-', linewidth=2, label='Clipping Window')
 
     # Plot original polygon
     if original_polygon:
@@ -109,6 +427,10 @@ def plot_clipping(original_polygon, clipped_polygon, title, filename):
 
 # Example usage
 if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+        sys.exit()
+
     # Test polygons
     test_polygons = [
         # Triangle partially outside
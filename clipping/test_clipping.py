@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Test script comparing the batch clippers with the scalar ones
+"""
+
+import numpy as np
+from clip_window import ClipWindow
+from clip_benchmark import SEGMENT_SETS, star_polygons, concave_polygons, check_regressions
+from cohensutherland import (cohen_sutherland_clip, cohen_sutherland_clip_batch,
+                             cohen_sutherland_clip_multi, IncrementalClipper)
+from liangbarsky import liang_barsky_clip, liang_barsky_clip_batch, liang_barsky_clip_multi
+from sutherlandhodgeman import (sutherland_hodgeman_clip, sutherland_hodgeman_clip_batch,
+                                sutherland_hodgeman_clip_array, sutherland_hodgeman_clip_streaming,
+                                sutherland_hodgeman_stream, pack_polygons, unpack_polygons,
+                                coastline_polygon)
+from spatial_index import SpatialIndex, GridIndex, PackedRTree, random_scene
+from cyrusbeck import ConvexWindow, cyrus_beck_clip, cyrus_beck_clip_batch, rotated_window
+
+# The demo window, degenerate windows and one beyond all of the data
+WINDOWS = [
+    ClipWindow(100, 100, 500, 400),
+    ClipWindow(300, 100, 300, 400),
+    ClipWindow(100, 250, 500, 250),
+    ClipWindow(100, 100, 100, 100),
+    ClipWindow(1000, 1000, 1200, 1100),
+]
+
+def segment_sets(n=500):
+    """Seeded segment sets of clip_benchmark plus segments far outside the window"""
+    sets = {name: make(n, seed=7) for name, make in SEGMENT_SETS.items()}
+    rng = np.random.default_rng(7)
+    sets['rejected'] = np.column_stack([rng.uniform(-900, -100, (n, 2)), rng.uniform(-900, -100, (n, 2))])
+    return sets
+
+def scalar_clip(clip, segments, window):
+    """Clip segment by segment into the (clipped, valid) layout of the batch clippers"""
+    clipped = np.full(segments.shape, np.nan)
+    valid = np.zeros(len(segments), dtype=bool)
+    for i, (x1, y1, x2, y2) in enumerate(segments.tolist()):
+        result = clip(x1, y1, x2, y2, window)
+        if result is not None:
+            clipped[i] = result
+            valid[i] = True
+    return clipped, valid
+
+def assert_same_clip(result, expected, message, exact=True):
+    """
+    Check a batch result against the scalar one, rejected rows included
+
+    The batch clippers use the scalar formulas, so their endpoints must be
+    bit-identical; exact=False only allows rounding differences between
+    two different algorithms.
+    """
+    clipped, valid = result
+    expected_clipped, expected_valid = expected
+    same = np.array_equal if exact else np.allclose
+    assert np.array_equal(valid, expected_valid), f"{message}: accepted segments differ"
+    assert np.all(np.isnan(clipped[~valid])), f"{message}: rejected rows should be NaN"
+    assert same(clipped[valid], expected_clipped[valid]), f"{message}: clipped endpoints differ"
+
+def test_clip_window():
+    """Test window construction, overlap, difference and edges"""
+    print("Testing clip window...")
+
+    try:
+        ClipWindow(10, 0, 0, 10)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Inverted window should be rejected")
+    assert ClipWindow(5, 5, 5, 5).width == 0, "Point window should be allowed"
+
+    a = ClipWindow(0, 0, 10, 8)
+    assert a.intersection(ClipWindow(4, 2, 20, 5)) == ClipWindow(4, 2, 10, 5), "Intersection incorrect"
+    assert a.intersection(ClipWindow(10, 8, 12, 9)) == ClipWindow(10, 8, 10, 8), "Touching windows share a corner"
+    assert a.intersection(ClipWindow(11, 0, 12, 8)) is None, "Disjoint windows should not intersect"
+
+    # The pieces and the overlap tile the window without overlapping
+    rng = np.random.default_rng(13)
+    points = rng.uniform(-2, 12, (5000, 2))
+    for other in [ClipWindow(4, 2, 20, 5), ClipWindow(2, 2, 6, 6), ClipWindow(-5, -5, 15, 15),
+                  ClipWindow(20, 20, 30, 30), ClipWindow(0, 0, 10, 8)]:
+        pieces = a.difference(other)
+        overlap = a.intersection(other)
+        area = sum(piece.width * piece.height for piece in pieces)
+        area += overlap.width * overlap.height if overlap is not None else 0
+        assert area == a.width * a.height, f"Difference with {other} does not cover the window"
+        x, y = points[:, 0], points[:, 1]
+        inside_pieces = sum((((x > p.x_min) & (x < p.x_max) & (y > p.y_min) & (y < p.y_max)).astype(int)
+                             for p in pieces), np.zeros(len(points), dtype=int))
+        assert inside_pieces.max() <= 1, f"Difference pieces with {other} overlap"
+        strictly_other = (x > other.x_min) & (x < other.x_max) & (y > other.y_min) & (y < other.y_max)
+        assert not np.any((inside_pieces > 0) & strictly_other), f"Difference with {other} overlaps other"
+    assert a.difference(ClipWindow(20, 20, 30, 30)) == [a], "Disjoint difference should be the window"
+    assert a.difference(ClipWindow(-5, -5, 15, 15)) == [], "Covered window should leave nothing"
+
+    edges = a.edges()
+    assert all(e.width == 0 or e.height == 0 for e in edges), "Edges should be zero-width windows"
+    assert set(edges) == {ClipWindow(0, 0, 0, 8), ClipWindow(10, 0, 10, 8),
+                          ClipWindow(0, 0, 10, 0), ClipWindow(0, 8, 10, 8)}, "Edges incorrect"
+    print("✓ Clip window test passed")
+
+def test_cohen_sutherland_batch():
+    """Test batch Cohen-Sutherland against the scalar clipper"""
+    print("Testing Cohen-Sutherland batch...")
+
+    for name, segments in segment_sets().items():
+        for window in WINDOWS:
+            assert_same_clip(cohen_sutherland_clip_batch(segments, window),
+                             scalar_clip(cohen_sutherland_clip, segments, window),
+                             f"Cohen-Sutherland {name} in {window}")
+
+    clipped, valid = cohen_sutherland_clip_batch(segment_sets()['rejected'])
+    assert not valid.any() and np.isnan(clipped).all(), "Segments outside the window were accepted"
+    print("✓ Cohen-Sutherland batch test passed")
+
+def test_cohen_sutherland_multi():
+    """Test multi-window Cohen-Sutherland against one batch call per window"""
+    print("Testing Cohen-Sutherland multi...")
+
+    for name, segments in segment_sets().items():
+        clipped, valid = cohen_sutherland_clip_multi(segments, WINDOWS)
+        assert clipped.shape == (len(WINDOWS), len(segments), 4), "Multi result shape incorrect"
+        for k, window in enumerate(WINDOWS):
+            assert_same_clip((clipped[k], valid[k]),
+                             scalar_clip(cohen_sutherland_clip, segments, window),
+                             f"Cohen-Sutherland multi {name} in {window}")
+    print("✓ Cohen-Sutherland multi test passed")
+
+def test_incremental_clipper():
+    """Test that a moving window keeps the same result as clipping from scratch"""
+    print("Testing incremental clipper...")
+
+    segments = random_scene(20_000, size=2_000.0, seed=3)
+    window = ClipWindow(500, 500, 900, 800)
+    clipper = IncrementalClipper(segments, window)
+    rng = np.random.default_rng(3)
+    for _ in range(10):
+        dx, dy = rng.uniform(-60, 60, 2)
+        window = ClipWindow(window.x_min + dx, window.y_min + dy, window.x_max + dx, window.y_max + dy)
+        clipper.set_window(window)
+        assert_same_clip((clipper.clipped, clipper.valid), cohen_sutherland_clip_batch(segments, window),
+                         f"Incremental clip in {window}")
+    print("✓ Incremental clipper test passed")
+
+def test_liang_barsky_batch():
+    """Test batch Liang-Barsky against the scalar clipper"""
+    print("Testing Liang-Barsky batch...")
+
+    for name, segments in segment_sets().items():
+        for window in WINDOWS:
+            expected = scalar_clip(liang_barsky_clip, segments, window)
+            assert_same_clip(liang_barsky_clip_batch(segments, window), expected,
+                             f"Liang-Barsky {name} in {window}")
+
+    # float32 only loses precision, segments clear of the boundaries agree
+    segments = segment_sets()['crossing']
+    clipped, valid = liang_barsky_clip_batch(segments, dtype=np.float32)
+    expected_clipped, expected_valid = scalar_clip(liang_barsky_clip, segments, WINDOWS[0])
+    assert clipped.dtype == np.float32, "float32 batch should give float32 output"
+    assert np.array_equal(valid, expected_valid), "float32 accepted segments differ"
+    assert np.allclose(clipped[valid], expected_clipped[valid], atol=1e-2), "float32 clipped endpoints differ"
+    print("✓ Liang-Barsky batch test passed")
+
+def test_liang_barsky_multi():
+    """Test multi-window Liang-Barsky against the scalar clipper"""
+    print("Testing Liang-Barsky multi...")
+
+    for name, segments in segment_sets().items():
+        clipped, valid = liang_barsky_clip_multi(segments, WINDOWS)
+        for k, window in enumerate(WINDOWS):
+            assert_same_clip((clipped[k], valid[k]),
+                             scalar_clip(liang_barsky_clip, segments, window),
+                             f"Liang-Barsky multi {name} in {window}")
+    print("✓ Liang-Barsky multi test passed")
+
+def same_cycle(result, expected):
+    """True when result lists the vertices of expected in the same cyclic order"""
+    result = np.array(result, dtype=float).reshape(-1, 2)
+    expected = np.array(expected, dtype=float).reshape(-1, 2)
+    if result.shape != expected.shape:
+        return False
+    return len(expected) == 0 or any(np.array_equal(np.roll(result, k, axis=0), expected)
+                                     for k in range(len(expected)))
+
+def test_sutherland_hodgeman_streaming():
+    """Test the generator pipeline against the scalar clipper"""
+    print("Testing Sutherland-Hodgeman streaming...")
+
+    polygons = [np.asarray(polygon).tolist() for polygon in
+                star_polygons(50, vertices=24, seed=9) + concave_polygons(50, seed=9)]
+    polygons.append(np.asarray(coastline_polygon(500, roughness=0.3, seed=9)).tolist())
+    # Empty, single point, two-point, fully inside and fully outside polygons
+    polygons += [[], [[300, 250]], [[150, 150], [600, 160]], [[200, 200], [300, 200], [250, 300]],
+                 [[-500, -500], [-400, -500], [-450, -400]]]
+    for window in WINDOWS:
+        for polygon in polygons:
+            expected = sutherland_hodgeman_clip(polygon, window)
+            assert same_cycle(sutherland_hodgeman_clip_streaming(polygon, window), expected), \
+                f"Streamed polygon clip differs in {window}"
+
+    # The stream accepts any iterable and is consumed lazily
+    stream = sutherland_hodgeman_stream(iter(polygons[0]), WINDOWS[0])
+    assert same_cycle(list(stream), sutherland_hodgeman_clip(polygons[0], WINDOWS[0])), \
+        "Stream from an iterator differs"
+    print("✓ Sutherland-Hodgeman streaming test passed")
+
+def test_sutherland_hodgeman_batch():
+    """Test ragged batch polygon clipping against the scalar clipper"""
+    print("Testing Sutherland-Hodgeman batch...")
+
+    polygons = star_polygons(100, vertices=24, seed=5) + concave_polygons(100, seed=5)
+    # Empty, degenerate and far away polygons keep their slot
+    polygons += [[], [[150, 150], [160, 160]], [[-500, -500], [-400, -500], [-450, -400]]]
+    vertices, offsets = pack_polygons(polygons)
+    for window in WINDOWS:
+        clipped, clipped_offsets = sutherland_hodgeman_clip_batch(vertices, offsets, window)
+        assert len(clipped_offsets) == len(offsets), "Batch clipping lost polygon slots"
+        for polygon, result in zip(polygons, unpack_polygons(clipped, clipped_offsets)):
+            expected = np.array(sutherland_hodgeman_clip(polygon, window), dtype=float).reshape(-1, 2)
+            assert result.shape == expected.shape and np.array_equal(result, expected), \
+                f"Batch polygon clip differs in {window}"
+
+    # Candidates from a spatial index are clipped the same way
+    index = GridIndex.from_polygons(vertices, offsets)
+    clipped, clipped_offsets, ids = sutherland_hodgeman_clip_batch(index, window=WINDOWS[0])
+    expected, expected_offsets = sutherland_hodgeman_clip_batch(vertices, offsets, WINDOWS[0])
+    expected_polygons = unpack_polygons(expected, expected_offsets)
+    for i, result in zip(ids, unpack_polygons(clipped, clipped_offsets)):
+        assert np.array_equal(result, expected_polygons[i]), "Indexed polygon clip differs"
+    assert all(len(expected_polygons[i]) == 0 for i in set(range(len(polygons))) - set(ids.tolist())), \
+        "Index dropped a visible polygon"
+    print("✓ Sutherland-Hodgeman batch test passed")
+
+def test_sutherland_hodgeman_array():
+    """Test single large polygon clipping against the scalar clipper"""
+    print("Testing Sutherland-Hodgeman array...")
+
+    for seed in range(3):
+        polygon = np.array(coastline_polygon(3000, roughness=0.3, seed=seed))
+        for window in WINDOWS:
+            result = sutherland_hodgeman_clip_array(polygon, window)
+            expected = np.array(sutherland_hodgeman_clip(polygon.tolist(), window), dtype=float).reshape(-1, 2)
+            assert result.shape == expected.shape and np.array_equal(result, expected), \
+                f"Array polygon clip differs in {window}"
+    print("✓ Sutherland-Hodgeman array test passed")
+
+def test_spatial_indexes():
+    """Test index queries against testing every bounding box"""
+    print("Testing spatial indexes...")
+
+    segments = random_scene(20_000, size=5_000.0, max_length=400.0, seed=11)
+    polygons = star_polygons(500, vertices=12, seed=11) + [[]]
+    vertices, offsets = pack_polygons(polygons)
+    rng = np.random.default_rng(11)
+    corners = rng.uniform(-500, 5_500, (40, 2))
+    sizes = rng.uniform(0, 800, (40, 2))
+    sizes[:10] = 0  # degenerate windows: points and lines
+    windows = [ClipWindow(x, y, x + w, y + h) for (x, y), (w, h) in zip(corners, sizes)]
+    windows.append(ClipWindow(-9000, -9000, -8000, -8000))
+
+    for kind in (GridIndex, PackedRTree):
+        for index in (kind.from_segments(segments), kind.from_polygons(vertices, offsets)):
+            for window in windows:
+                assert np.array_equal(index.query(window), index.brute_force_query(window)), \
+                    f"{kind.__name__} query differs from brute force in {window}"
+
+    # The base class has no query and cannot be built on its own
+    try:
+        SpatialIndex.from_segments(segments)
+        assert False, "SpatialIndex should be abstract"
+    except TypeError:
+        pass
+    print("✓ Spatial indexes test passed")
+
+def test_cyrus_beck_batch():
+    """Test batch Cyrus-Beck against the scalar clipper"""
+    print("Testing Cyrus-Beck batch...")
+
+    windows = [ConvexWindow.from_transform(WINDOWS[0], np.eye(3)),
+               rotated_window(WINDOWS[0], 30),
+               ConvexWindow([[200, 150], [450, 200], [400, 380], [250, 350], [180, 250]])]
+    for name, segments in segment_sets().items():
+        for window in windows:
+            assert_same_clip(cyrus_beck_clip_batch(segments, window),
+                             scalar_clip(cyrus_beck_clip, segments, window),
+                             f"Cyrus-Beck {name}")
+
+    # On the unrotated rectangle it agrees with Liang-Barsky
+    segments = segment_sets()['crossing']
+    assert_same_clip(cyrus_beck_clip_batch(segments, windows[0]), liang_barsky_clip_batch(segments),
+                     "Cyrus-Beck on the plain rectangle", exact=False)
+
+    # Degenerate windows have no interior to clip against
+    for degenerate in WINDOWS[1:4]:
+        try:
+            ConvexWindow.from_transform(degenerate, np.eye(3))
+        except ValueError:
+            continue
+        raise AssertionError(f"Degenerate window {degenerate} should be rejected")
+    print("✓ Cyrus-Beck batch test passed")
+
+def benchmark_report(cases, size=1000, seed=0):
+    """Synthetic suite report from {case: (min_ms, p90_ms, accepted)}"""
+    results = {case: {'items': size, 'unit': 'segments', 'accepted': accepted, 'min_ms': low,
+                      'p50_ms': low, 'p90_ms': high, 'p99_ms': high, 'throughput': size / low}
+               for case, (low, high, accepted) in cases.items()}
+    return {'meta': {'size': size, 'seed': seed}, 'results': results}
+
+def test_check_regressions():
+    """Test the benchmark regression check on synthetic reports"""
+    print("Testing benchmark regression check...")
+
+    baseline = benchmark_report({'steady': (10.0, 10.5, 50), 'noisy': (10.0, 16.0, 50),
+                                 'tiny': (0.2, 0.21, 50)})
+    assert check_regressions(baseline, baseline) == [], "A report regresses against itself"
+
+    # Small slowdowns, slowdowns within the noise and sub-millisecond ones pass
+    report = benchmark_report({'steady': (14.0, 14.5, 50), 'noisy': (20.0, 21.0, 50),
+                               'tiny': (0.6, 0.62, 50)})
+    assert check_regressions(report, baseline) == [], "Noise reported as a regression"
+
+    report = benchmark_report({'steady': (20.0, 20.5, 50), 'noisy': (40.0, 41.0, 50),
+                               'tiny': (2.0, 2.1, 50)})
+    problems = check_regressions(report, baseline)
+    assert sorted(p.split(':')[0] for p in problems) == ['noisy', 'steady', 'tiny'], \
+        f"Slowdowns missed: {problems}"
+    assert check_regressions(report, baseline, min_ms=5.0) != problems, "min_ms ignored"
+
+    # Changed output, missing cases and other data settings are always reported
+    report = benchmark_report({'steady': (10.0, 10.5, 49), 'noisy': (10.0, 16.0, 50)}, seed=1)
+    problems = check_regressions(report, baseline)
+    assert len(problems) == 3 and 'seed' in problems[0], f"Unexpected problems: {problems}"
+    assert any('accepted 49' in p for p in problems) and any('tiny: missing' in p for p in problems), \
+        f"Unexpected problems: {problems}"
+    print("✓ Benchmark regression check test passed")
+
+def run_all_tests():
+    """Run all test functions"""
+    print("Running Clipping Tests")
+    print("=" * 35)
+
+    try:
+        test_clip_window()
+        test_cohen_sutherland_batch()
+        test_cohen_sutherland_multi()
+        test_incremental_clipper()
+        test_liang_barsky_batch()
+        test_liang_barsky_multi()
+        test_sutherland_hodgeman_streaming()
+        test_sutherland_hodgeman_batch()
+        test_sutherland_hodgeman_array()
+        test_spatial_indexes()
+        test_cyrus_beck_batch()
+        test_check_regressions()
+
+        print("\n" + "=" * 35)
+        print("ALL TESTS PASSED! ✓")
+        print("Batch clippers match the scalar clippers.")
+        print("=" * 35)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    run_all_tests()
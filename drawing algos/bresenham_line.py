@@ -1,17 +1,28 @@
-from OpenGL.GL import *
-from OpenGL.GLUT import *
-from OpenGL.GLU import *
+try:
+    from OpenGL.GL import *
+    from OpenGL.GLUT import *
+    from OpenGL.GLU import *
+except ImportError:
+    # Without PyOpenGL only the headless framebuffer target is available
+    pass
+import sys
+import time
+import numpy as np
+from framebuffer import get_target, headless_frames, run_headless
+from gl_backend import (glFlush, glEnableClientState, glDisableClientState, glVertexPointer,
+                        glDrawArrays, GL_VERTEX_ARRAY, GL_INT, GL_POINTS)
 
 # Implement Bresenham Line Drawing algorithm for both slopes (|m|<1 and |m|>=1)
-def bresenham_line(x1, y1, x2, y2):
-    glBegin(GL_POINTS)
+def bresenham_points(x1, y1, x2, y2):
+    """Walk the error term one pixel at a time and return the pixels as a list"""
+    points = []
     dx = abs(x2 - x1)
     dy = abs(y2 - y1)
     sx = 1 if x1 < x2 else -1
     sy = 1 if y1 < y2 else -1
     err = dx - dy
     while True:
-        glVertex2f(x1, y1)
+        points.append((x1, y1))
         if x1 == x2 and y1 == y2:
             break
         e2 = 2 * err
@@ -21,25 +32,112 @@ def bresenham_line(x1, y1, x2, y2):
         if e2 < dx:
             err += dx
             y1 += sy
-    glEnd()
+    return points
 
-def display():
-    glClear(GL_COLOR_BUFFER_BIT)
-    glColor3f(1.0, 1.0, 1.0)
+def bresenham_line(x1, y1, x2, y2):
+    get_target().plot_points(bresenham_points(x1, y1, x2, y2))
+
+def bresenham_line_batch(segments):
+    """
+    Rasterize many segments at once
+
+    The error-term walk above always steps along the major axis, and steps
+    along the minor axis at step k exactly when the accumulated error crosses
+    half a pixel, so the minor offset has the closed form
+    ceil((2*k*minor - major) / (2*major)). Evaluating that for every step of
+    every segment gives the same pixels as bresenham_points.
+
+    Args:
+        segments: array of shape (N, 4) with integer endpoints x1, y1, x2, y2
+
+    Returns:
+        pixels: int32 array of shape (P, 2), the pixels of all segments in order
+        offsets: int64 array of shape (N + 1,); segment i owns
+                 pixels[offsets[i]:offsets[i + 1]]
+    """
+    segments = np.asarray(segments, dtype=np.int64).reshape(-1, 4)
+    x1, y1, x2, y2 = segments.T
+    dx = np.abs(x2 - x1)
+    dy = np.abs(y2 - y1)
+    sx = np.where(x1 < x2, 1, -1)
+    sy = np.where(y1 < y2, 1, -1)
+    major = np.maximum(dx, dy)
+    minor = np.minimum(dx, dy)
+
+    lengths = major + 1
+    offsets = np.zeros(len(segments) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    # Per-segment values are expanded to one entry per pixel with np.repeat,
+    # and k is the step index of each pixel within its own segment
+    def per_pixel(values):
+        return np.repeat(values, lengths)
+
+    k = np.arange(offsets[-1]) - per_pixel(offsets[:-1])
+    m = np.maximum(major, 1)
+    minor_steps = (k * per_pixel(2 * minor) + per_pixel(m - 1)) // per_pixel(2 * m)
+    x_major = per_pixel(dx >= dy)
+
+    pixels = np.empty((offsets[-1], 2), dtype=np.int32)
+    pixels[:, 0] = per_pixel(x1) + per_pixel(sx) * np.where(x_major, k, minor_steps)
+    pixels[:, 1] = per_pixel(y1) + per_pixel(sy) * np.where(x_major, minor_steps, k)
+    return pixels, offsets
+
+def draw_pixels(pixels):
+    """Submit a pixel array from bresenham_line_batch as one GL vertex array draw"""
+    pixels = np.ascontiguousarray(pixels, dtype=np.int32)
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glVertexPointer(2, GL_INT, 0, pixels)
+    glDrawArrays(GL_POINTS, 0, len(pixels))
+    glDisableClientState(GL_VERTEX_ARRAY)
+
+def benchmark(n_segments=100000, max_length=50, seed=0):
+    """Compare segments/second of the per-pixel walk and the batch rasterizer"""
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(0, 650, size=(n_segments, 2))
+    ends = starts + rng.integers(-max_length, max_length + 1, size=(n_segments, 2))
+    segments = np.hstack([starts, ends])
+
+    start = time.perf_counter()
+    for x1, y1, x2, y2 in segments.tolist():
+        bresenham_points(x1, y1, x2, y2)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bresenham_line_batch(segments)
+    batch_time = time.perf_counter() - start
+
+    print(f"Per-pixel loop: {n_segments / loop_time:,.0f} segments/s")
+    print(f"Batch:          {n_segments / batch_time:,.0f} segments/s")
+    print(f"Speedup:        {loop_time / batch_time:.1f}x")
+
+def draw_scene():
+    target = get_target()
+    target.clear()
+    target.set_color(1.0, 1.0, 1.0)
     # Draw a line with slope < 1
     bresenham_line(50, 50, 600, 150)
     # Draw a line with slope >= 1
     bresenham_line(50, 50, 150, 350)
+
+def display():
+    draw_scene()
     glFlush()
 
 def init():
     glClearColor(0.0, 0.0, 0.0, 1.0)
     gluOrtho2D(0, 650, 0, 400)
 
-glutInit()
-glutInitDisplayMode(GLUT_SINGLE | GLUT_RGB)
-glutInitWindowSize(800, 400)
-glutCreateWindow(b"Bresenham Line - OpenGL")
-init()
-glutDisplayFunc(display)
-glutMainLoop()
\ No newline at end of file
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+    elif "--headless" in sys.argv:
+        run_headless(draw_scene, "plots/drawing/bresenham_line.png", headless_frames())
+    else:
+        glutInit()
+        glutInitDisplayMode(GLUT_SINGLE | GLUT_RGB)
+        glutInitWindowSize(800, 400)
+        glutCreateWindow(b"Bresenham Line - OpenGL")
+        init()
+        glutDisplayFunc(display)
+        glutMainLoop()
\ No newline at end of file
@@ -1,41 +1,173 @@
-from OpenGL.GL import *
-from OpenGL.GLUT import *
-from OpenGL.GLU import *
+try:
+    from OpenGL.GL import *
+    from OpenGL.GLUT import *
+    from OpenGL.GLU import *
+except ImportError:
+    # Without PyOpenGL only the headless framebuffer target is available
+    pass
+import sys
+import time
+import numpy as np
+from framebuffer import get_target, headless_frames, run_headless
+from gl_backend import glFlush
+
+# 16.16 fixed-point format used by the integer DDA
+FRACTION_BITS = 16
+ONE = 1 << FRACTION_BITS
+HALF = ONE >> 1
 
 # Implement Digital Differential Analyzer Line drawing algorithm
-def dda_line(x1, y1, x2, y2):
-    glBegin(GL_POINTS)
+def dda_points(x1, y1, x2, y2):
+    points = []
     dx = x2 - x1
     dy = y2 - y1
     steps = max(abs(dx), abs(dy))
     if steps == 0:
-        glVertex2f(x1, y1)
+        points.append((x1, y1))
     else:
         x_inc = dx / steps
         y_inc = dy / steps
         x = x1
         y = y1
         for _ in range(int(steps) + 1):
-            glVertex2f(x, y)
+            points.append((x, y))
             x += x_inc
             y += y_inc
-    glEnd()
+    return points
 
-def display():
-    glClear(GL_COLOR_BUFFER_BIT)
-    glColor3f(1.0, 1.0, 1.0)
+def fixed_increment(delta, steps):
+    """Round-half-up 16.16 fixed-point value of delta / steps"""
+    divisor = 2 * max(steps, 1)
+    return (2 * (delta << FRACTION_BITS) + divisor // 2) // divisor
+
+def dda_fixed_points(x1, y1, x2, y2):
+    """
+    Fixed-point DDA samples of one line
+
+    The increment is dx / steps rounded to 16.16 fixed point and sample i
+    is start + i * increment, so every sample comes from exact integer
+    arithmetic instead of a running float sum and the result is the same
+    on every platform.
+
+    Args:
+        x1, y1, x2, y2: integer endpoints
+
+    Returns:
+        int32 array of shape (steps + 1, 2) with the rounded samples
+    """
+    dx = x2 - x1
+    dy = y2 - y1
+    steps = max(abs(dx), abs(dy))
+    i = np.arange(steps + 1, dtype=np.int64)
+    pixels = np.empty((steps + 1, 2), dtype=np.int32)
+    pixels[:, 0] = ((x1 << FRACTION_BITS) + HALF + i * fixed_increment(dx, steps)) >> FRACTION_BITS
+    pixels[:, 1] = ((y1 << FRACTION_BITS) + HALF + i * fixed_increment(dy, steps)) >> FRACTION_BITS
+    return pixels
+
+def dda_fixed_batch(segments):
+    """
+    Fixed-point DDA for many lines at once, same samples as dda_fixed_points
+
+    The samples of all lines are laid end to end as one piecewise linear
+    sequence, whose second difference is zero except at the first two
+    samples of each line. Only those O(N) entries are written and two
+    cumulative sums rebuild every sample in exact integer arithmetic, so
+    no per-pixel arrays are repeated from per-line values.
+
+    Args:
+        segments: array of shape (N, 4) with integer endpoints x1, y1, x2, y2
+
+    Returns:
+        pixels: int32 array of shape (P, 2), the samples of all lines in order
+        offsets: int64 array of shape (N + 1,); line i owns
+                 pixels[offsets[i]:offsets[i + 1]]
+    """
+    segments = np.asarray(segments, dtype=np.int64).reshape(-1, 4)
+    starts = (segments[:, :2] << FRACTION_BITS) + HALF
+    deltas = segments[:, 2:] - segments[:, :2]
+    steps = np.abs(deltas).max(axis=1)
+
+    divisor = 2 * np.maximum(steps, 1)[:, None]
+    increments = (2 * (deltas << FRACTION_BITS) + divisor // 2) // divisor
+
+    lengths = steps + 1
+    offsets = np.zeros(len(segments) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    first = offsets[:-1]
+
+    # First differences: each line starts with a jump from the last sample
+    # of the previous line, then steps by its increment
+    jumps = starts.copy()
+    jumps[1:] -= starts[:-1] + steps[:-1, None] * increments[:-1]
+    previous = np.zeros_like(jumps)
+    previous[1:] = np.where(steps[:-1, None] > 0, increments[:-1], jumps[:-1])
+
+    samples = np.zeros((offsets[-1], 2), dtype=np.int64)
+    samples[first] = jumps - previous
+    long = steps > 0
+    samples[first[long] + 1] = increments[long] - jumps[long]
+    np.cumsum(samples, axis=0, out=samples)
+    np.cumsum(samples, axis=0, out=samples)
+    samples >>= FRACTION_BITS
+    return samples.astype(np.int32), offsets
+
+def dda_line(x1, y1, x2, y2, fixed_point=False):
+    if fixed_point:
+        get_target().plot_points(dda_fixed_points(x1, y1, x2, y2))
+    else:
+        get_target().plot_points(dda_points(x1, y1, x2, y2))
+
+def benchmark(length=2000, lines=200, seed=0):
+    """Compare the per-step float loop with the fixed-point DDA on long lines"""
+    rng = np.random.default_rng(seed)
+    angles = rng.uniform(0, 2 * np.pi, lines)
+    starts = rng.integers(-10000, 10000, size=(lines, 2))
+    ends = starts + np.round(length * np.column_stack([np.cos(angles), np.sin(angles)])).astype(np.int64)
+    segments = np.hstack([starts, ends])
+
+    def best_time(run, repeat=5):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    rows = segments.tolist()
+    loop_time = best_time(lambda: [dda_points(*row) for row in rows])
+    fixed_time = best_time(lambda: [dda_fixed_points(*row) for row in rows])
+    batch_time = best_time(lambda: dda_fixed_batch(segments))
+
+    print(f"{lines} lines of {length} px")
+    print(f"Per-step float loop: {loop_time * 1000:.1f} ms")
+    print(f"Fixed-point per line: {fixed_time * 1000:.1f} ms ({loop_time / fixed_time:.1f}x)")
+    print(f"Fixed-point batch:    {batch_time * 1000:.1f} ms ({loop_time / batch_time:.1f}x)")
+
+def draw_scene():
+    target = get_target()
+    target.clear()
+    target.set_color(1.0, 1.0, 1.0)
     # Draw a single line from (100, 100) to (500, 300)
     dda_line(100, 100, 500, 300)
+
+def display():
+    draw_scene()
     glFlush()
 
 def init():
     glClearColor(0.0, 0.0, 0.0, 1.0)
     gluOrtho2D(0, 650, 0, 400)
 
-glutInit()
-glutInitDisplayMode(GLUT_SINGLE | GLUT_RGB)
-glutInitWindowSize(800, 400)
-glutCreateWindow(b"DDA Line - OpenGL")
-init()
-glutDisplayFunc(display)
-glutMainLoop()
\ No newline at end of file
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+    elif "--headless" in sys.argv:
+        run_headless(draw_scene, "plots/drawing/dda_line.png", headless_frames())
+    else:
+        glutInit()
+        glutInitDisplayMode(GLUT_SINGLE | GLUT_RGB)
+        glutInitWindowSize(800, 400)
+        glutCreateWindow(b"DDA Line - OpenGL")
+        init()
+        glutDisplayFunc(display)
+        glutMainLoop()
\ No newline at end of file
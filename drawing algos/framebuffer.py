@@ -0,0 +1,278 @@
+"""
+Render targets for the drawing algorithms
+The algorithms hand their pixels and polygons to the current render target,
+which is either immediate-mode OpenGL or a NumPy framebuffer for headless use
+"""
+
+import os
+import sys
+import time
+import numpy as np
+from gl_backend import (glBegin, glEnd, glVertex2f, glColor3f, glClear,
+                        glEnableClientState, glDisableClientState, glVertexPointer,
+                        glColorPointer, glDrawArrays, GL_POINTS, GL_TRIANGLES, GL_QUADS,
+                        GL_POLYGON, GL_COLOR_BUFFER_BIT, GL_VERTEX_ARRAY, GL_COLOR_ARRAY,
+                        GL_FLOAT)
+
+# Size of the gluOrtho2D world used by the demo scripts
+WIDTH, HEIGHT = 650, 400
+
+
+class GLTarget:
+    """Render target that draws through the immediate-mode GL facade"""
+
+    def clear(self):
+        glClear(GL_COLOR_BUFFER_BIT)
+
+    def set_color(self, r, g, b):
+        glColor3f(r, g, b)
+
+    def plot_points(self, points):
+        glBegin(GL_POINTS)
+        for x, y in points:
+            glVertex2f(x, y)
+        glEnd()
+
+    def fill_spans(self, ys, x_starts, x_ends):
+        # One quad per span covering pixels x_start..x_end of row y
+        glBegin(GL_QUADS)
+        for y, x0, x1 in zip(ys, x_starts, x_ends):
+            glVertex2f(x0, y)
+            glVertex2f(x1 + 1, y)
+            glVertex2f(x1 + 1, y + 1)
+            glVertex2f(x0, y + 1)
+        glEnd()
+
+    def fill_polygon(self, vertices):
+        glBegin(GL_POLYGON)
+        for x, y in vertices:
+            glVertex2f(x, y)
+        glEnd()
+
+    def fill_triangles(self, vertices, colors):
+        # The whole buffer goes out as one GL_TRIANGLES vertex array draw
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, np.ascontiguousarray(vertices, dtype=np.float32))
+        glColorPointer(3, GL_FLOAT, 0, np.ascontiguousarray(colors, dtype=np.float32))
+        glDrawArrays(GL_TRIANGLES, 0, len(vertices))
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+
+class Framebuffer:
+    """
+    RGBA framebuffer backed by a NumPy array
+
+    pixels has shape (height, width, 4) and row 0 is the bottom of the
+    image, so world coordinates map to pixels the same way as gluOrtho2D.
+    """
+
+    def __init__(self, width=WIDTH, height=HEIGHT, clear_color=(0.0, 0.0, 0.0, 1.0)):
+        """
+        Initialize framebuffer
+
+        Args:
+            width: width in pixels
+            height: height in pixels
+            clear_color: (r, g, b, a) floats in [0, 1] used by clear()
+        """
+        self.width = width
+        self.height = height
+        self.pixels = np.empty((height, width, 4), dtype=np.uint8)
+        self.clear_color = self._to_rgba(*clear_color)
+        self.color = self._to_rgba(1.0, 1.0, 1.0)
+        self.clear()
+
+    @staticmethod
+    def _to_rgba(r, g, b, a=1.0):
+        return np.round(np.clip([r, g, b, a], 0.0, 1.0) * 255).astype(np.uint8)
+
+    def clear(self):
+        self.pixels[:] = self.clear_color
+
+    def set_color(self, r, g, b, a=1.0):
+        self.color = self._to_rgba(r, g, b, a)
+
+    def plot_points(self, points):
+        """Write every point in an (n, 2) array in one bulk assignment"""
+        points = np.asarray(points)
+        if points.size == 0:
+            return
+        points = np.floor(points.reshape(-1, 2)).astype(np.int64)
+        x, y = points[:, 0], points[:, 1]
+        visible = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        self.pixels[y[visible], x[visible]] = self.color
+
+    def fill_spans(self, ys, x_starts, x_ends, colors=None):
+        """
+        Fill horizontal spans (y, x_start, x_end), both ends inclusive
+
+        colors optionally gives an (n, 3) float color per span; the spans are
+        then written in one bulk assignment instead of the current color
+        being copied row by row.
+        """
+        ys = np.asarray(ys, dtype=np.int64)
+        x_starts = np.maximum(np.asarray(x_starts, dtype=np.int64), 0)
+        x_ends = np.minimum(np.asarray(x_ends, dtype=np.int64), self.width - 1)
+        visible = (ys >= 0) & (ys < self.height) & (x_starts <= x_ends)
+        if colors is not None:
+            ys, x_starts, x_ends = ys[visible], x_starts[visible], x_ends[visible]
+            rgba = np.empty((len(ys), 4), dtype=np.uint8)
+            rgba[:, :3] = np.round(np.clip(np.asarray(colors, dtype=float)[visible], 0.0, 1.0) * 255)
+            rgba[:, 3] = 255
+            # Pixels are written as packed 32-bit words at flat row-major indices
+            lengths = x_ends - x_starts + 1
+            span = np.repeat(np.arange(len(ys)), lengths)
+            first = ys * self.width + x_starts - (np.cumsum(lengths) - lengths)
+            index = np.arange(lengths.sum()) + np.repeat(first, lengths)
+            self.pixels.view(np.uint32).reshape(-1)[index] = rgba.view(np.uint32).reshape(-1)[span]
+            return
+        color = self.color
+        for y, x0, x1 in zip(ys[visible].tolist(), x_starts[visible].tolist(),
+                             x_ends[visible].tolist()):
+            self.pixels[y, x0:x1 + 1] = color
+
+    def fill_polygon(self, vertices):
+        """Fill a polygon with the even-odd rule, sampling pixel centers"""
+        vertices = np.asarray(vertices, dtype=float).reshape(-1, 2)
+        if len(vertices) < 3:
+            return
+        x0, y0 = vertices[:, 0], vertices[:, 1]
+        x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+
+        row_min = max(int(np.ceil(y0.min() - 0.5)), 0)
+        row_max = min(int(np.floor(y0.max() - 0.5)), self.height - 1)
+        if row_min > row_max:
+            return
+        rows = np.arange(row_min, row_max + 1)
+        yc = rows[:, None] + 0.5
+
+        # Crossing of every scanline with every edge, half-open in y so
+        # shared vertices are counted once
+        crosses = (np.minimum(y0, y1) <= yc) & (yc < np.maximum(y0, y1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xc = x0 + (yc - y0) * (x1 - x0) / (y1 - y0)
+        xc = np.sort(np.where(crosses, xc, np.inf), axis=1)
+
+        # Consecutive crossings pair up into interior spans
+        starts, ends = xc[:, 0::2], xc[:, 1::2]
+        pairs = min(starts.shape[1], ends.shape[1])
+        starts, ends = starts[:, :pairs], ends[:, :pairs]
+        inside = np.isfinite(ends)
+        span_rows = np.broadcast_to(rows[:, None], starts.shape)[inside]
+        self.fill_spans(span_rows,
+                        np.ceil(starts[inside] - 0.5),
+                        np.ceil(ends[inside] - 0.5) - 1)
+
+    def fill_triangles(self, vertices, colors):
+        """
+        Fill a GL_TRIANGLES vertex buffer in one batched span pass
+
+        Args:
+            vertices: (3 * T, 2) array of triangle corners
+            colors: (3 * T, 3) per-vertex colors; each triangle is flat
+                shaded with the color of its first vertex
+        """
+        corners = np.asarray(vertices, dtype=float).reshape(-1, 3, 2)
+        colors = np.asarray(colors, dtype=float).reshape(-1, 3, 3)[:, 0]
+        x0, y0 = corners[:, :, 0], corners[:, :, 1]
+        x1, y1 = np.roll(x0, -1, axis=1), np.roll(y0, -1, axis=1)
+        low, high = np.minimum(y0, y1), np.maximum(y0, y1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = (x1 - x0) / (y1 - y0)
+
+        row_min = np.maximum(np.ceil(low.min(axis=1) - 0.5).astype(np.int64), 0)
+        row_max = np.minimum(np.floor(high.max(axis=1) - 0.5).astype(np.int64), self.height - 1)
+        rows_per = np.maximum(row_max - row_min + 1, 0)
+
+        # One scanline per (triangle, row) pair, crossed with the three edges
+        # under the same half-open rule as fill_polygon; a scanline crosses
+        # a triangle exactly twice or not at all
+        triangle = np.repeat(np.arange(len(corners)), rows_per)
+        rows = np.arange(rows_per.sum()) + np.repeat(row_min - (np.cumsum(rows_per) - rows_per), rows_per)
+        yc = rows + 0.5
+        starts = np.full(len(rows), np.inf)
+        ends = np.full(len(rows), -np.inf)
+        for edge in range(3):
+            crosses = (low[triangle, edge] <= yc) & (yc < high[triangle, edge])
+            xc = x0[triangle, edge] + (yc - y0[triangle, edge]) * slope[triangle, edge]
+            np.minimum(starts, xc, out=starts, where=crosses)
+            np.maximum(ends, xc, out=ends, where=crosses)
+
+        inside = starts <= ends
+        self.fill_spans(rows[inside],
+                        np.ceil(starts[inside] - 0.5),
+                        np.ceil(ends[inside] - 0.5) - 1,
+                        colors[triangle[inside]])
+
+    def image(self):
+        """Return the pixels top row first, as image writers expect"""
+        return np.flipud(self.pixels)
+
+    def save(self, filename):
+        """Save as .npy or as an image format matplotlib can write"""
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if filename.endswith('.npy'):
+            np.save(filename, self.image())
+        else:
+            import matplotlib.pyplot as plt
+            plt.imsave(filename, self.image())
+
+
+_target = GLTarget()
+
+
+def get_target():
+    """Return the render target the drawing algorithms draw into"""
+    return _target
+
+
+def set_target(target):
+    """Select the render target and return the previous one"""
+    global _target
+    previous = _target
+    _target = target
+    return previous
+
+
+def headless_frames(argv=None):
+    """Read the frame count from --frames N, defaulting to a single frame"""
+    argv = sys.argv if argv is None else argv
+    if "--frames" in argv:
+        try:
+            return int(argv[argv.index("--frames") + 1])
+        except (IndexError, ValueError):
+            pass
+    return 1
+
+
+def run_headless(draw, filename, frames=1, width=WIDTH, height=HEIGHT):
+    """
+    Render a scene into a Framebuffer without opening a window
+
+    Args:
+        draw: function drawing one frame into the current render target
+        filename: where the last frame is saved
+        frames: number of frames to render; above one the rate is reported
+
+    Returns:
+        the Framebuffer holding the last frame
+    """
+    framebuffer = Framebuffer(width, height)
+    previous = set_target(framebuffer)
+    try:
+        start = time.perf_counter()
+        for _ in range(frames):
+            draw()
+        elapsed = time.perf_counter() - start
+    finally:
+        set_target(previous)
+
+    framebuffer.save(filename)
+    if frames > 1:
+        print(f"{frames} frames in {elapsed:.3f}s "
+              f"({frames * 60 / elapsed:,.0f} images/minute)")
+    return framebuffer
@@ -0,0 +1,356 @@
+"""
+Thin facade over the immediate-mode GL calls used by the demos
+The demos import glBegin, glVertex2f, glColor3f and friends from here, so the
+same drawing code can either reach PyOpenGL or be recorded without a display
+to count draw calls per frame and replay the frame into a Framebuffer
+"""
+
+import numpy as np
+
+try:
+    from OpenGL import GL as _GL
+    from OpenGL import GLUT as _GLUT
+except ImportError:
+    # Without PyOpenGL only the recording backend is usable
+    _GL = _GLUT = None
+
+# Primitive modes, same values as the OpenGL enums
+GL_POINTS = 0x0000
+GL_LINES = 0x0001
+GL_LINE_LOOP = 0x0002
+GL_LINE_STRIP = 0x0003
+GL_TRIANGLES = 0x0004
+GL_TRIANGLE_STRIP = 0x0005
+GL_TRIANGLE_FAN = 0x0006
+GL_QUADS = 0x0007
+GL_QUAD_STRIP = 0x0008
+GL_POLYGON = 0x0009
+GL_COLOR_BUFFER_BIT = 0x4000
+
+# Client-side vertex arrays
+GL_INT = 0x1404
+GL_FLOAT = 0x1406
+GL_VERTEX_ARRAY = 0x8074
+GL_COLOR_ARRAY = 0x8076
+
+# GLUT fonts are opaque handles; the recorder only counts the calls using them
+if _GLUT is not None:
+    GLUT_BITMAP_HELVETICA_12 = _GLUT.GLUT_BITMAP_HELVETICA_12
+    GLUT_BITMAP_HELVETICA_18 = _GLUT.GLUT_BITMAP_HELVETICA_18
+else:
+    GLUT_BITMAP_HELVETICA_12 = 'helvetica-12'
+    GLUT_BITMAP_HELVETICA_18 = 'helvetica-18'
+
+
+class RealGL:
+    """Backend that forwards every call to PyOpenGL"""
+
+    def __getattr__(self, name):
+        module = _GLUT if name.startswith('glut') else _GL
+        return getattr(module, name)
+
+
+class RecordingGL:
+    """
+    Backend that captures immediate-mode drawing into arrays
+
+    Vertices and their current colors are appended to flat arrays and
+    every glBegin/glEnd pair or glDrawArrays call becomes a
+    (mode, first, count) primitive. Calls that do not draw anything are
+    only counted.
+    """
+
+    def __init__(self):
+        self.frames = []
+        self.begin_frame()
+
+    def begin_frame(self):
+        """Drop the current capture and start recording a new frame"""
+        self.calls = 0
+        self.cleared = False
+        self.color = (1.0, 1.0, 1.0)
+        self._vertices = []
+        self._colors = []
+        self.primitives = []
+        self._mode = None
+        self._first = 0
+        self._client_states = set()
+        self._vertex_pointer = None
+        self._color_pointer = None
+
+    def end_frame(self):
+        """Store the statistics of the recorded frame and return them"""
+        stats = {
+            'calls': self.calls,
+            'vertices': len(self._vertices),
+            'primitives': len(self.primitives),
+        }
+        self.frames.append(stats)
+        return stats
+
+    def glBegin(self, mode):
+        self.calls += 1
+        self._mode = int(mode)
+        self._first = len(self._vertices)
+
+    def glEnd(self):
+        self.calls += 1
+        self.primitives.append((self._mode, self._first, len(self._vertices) - self._first))
+        self._mode = None
+
+    def glVertex2f(self, x, y):
+        self.calls += 1
+        self._vertices.append((x, y))
+        self._colors.append(self.color)
+
+    def glColor3f(self, r, g, b):
+        self.calls += 1
+        self.color = (r, g, b)
+
+    def glClear(self, mask):
+        self.calls += 1
+        self.cleared = True
+
+    def glEnableClientState(self, array):
+        self.calls += 1
+        self._client_states.add(int(array))
+
+    def glDisableClientState(self, array):
+        self.calls += 1
+        self._client_states.discard(int(array))
+
+    def glVertexPointer(self, size, type, stride, pointer):
+        # Arrays are assumed tightly packed, as the demos submit them
+        self.calls += 1
+        self._vertex_pointer = np.asarray(pointer).reshape(-1, size)[:, :2]
+
+    def glColorPointer(self, size, type, stride, pointer):
+        self.calls += 1
+        self._color_pointer = np.asarray(pointer).reshape(-1, size)[:, :3]
+
+    def glDrawArrays(self, mode, first, count):
+        self.calls += 1
+        vertices = self._vertex_pointer[first:first + count]
+        if GL_COLOR_ARRAY in self._client_states:
+            colors = self._color_pointer[first:first + count].tolist()
+        else:
+            colors = [self.color] * len(vertices)
+        self.primitives.append((int(mode), len(self._vertices), len(vertices)))
+        self._vertices.extend(vertices.tolist())
+        self._colors.extend(colors)
+
+    def __getattr__(self, name):
+        # Everything else (glFlush, text, buffer swaps) is counted and ignored
+        if not name.startswith('gl'):
+            raise AttributeError(name)
+
+        def record_call(*args):
+            self.calls += 1
+        return record_call
+
+    def vertices(self):
+        """Captured vertices as a float array of shape (n, 2)"""
+        return np.array(self._vertices, dtype=float).reshape(-1, 2)
+
+    def colors(self):
+        """Color current at each captured vertex, shape (n, 3)"""
+        return np.array(self._colors, dtype=float).reshape(-1, 3)
+
+    def calls_per_frame(self):
+        return np.mean([frame['calls'] for frame in self.frames]) if self.frames else 0.0
+
+    def vertices_per_frame(self):
+        return np.mean([frame['vertices'] for frame in self.frames]) if self.frames else 0.0
+
+    def replay(self, framebuffer):
+        """
+        Draw the captured frame into a Framebuffer
+
+        Filled primitives are split into polygons and each one is flat shaded
+        with the color of its first vertex (GL_TRIANGLES in one batched
+        pass); lines are rasterized with Bresenham between rounded endpoints.
+        """
+        from bresenham_line import bresenham_line_batch
+
+        if self.cleared:
+            framebuffer.clear()
+        vertices = self.vertices()
+        colors = self.colors()
+        for mode, first, count in self.primitives:
+            v = vertices[first:first + count]
+            c = colors[first:first + count]
+            if count == 0:
+                continue
+            if mode == GL_POINTS:
+                for color in np.unique(c, axis=0):
+                    framebuffer.set_color(*color)
+                    framebuffer.plot_points(v[(c == color).all(axis=1)])
+            elif mode in (GL_LINES, GL_LINE_STRIP, GL_LINE_LOOP):
+                if mode == GL_LINES:
+                    starts, ends = np.arange(0, count - 1, 2), np.arange(1, count, 2)
+                else:
+                    starts = np.arange(count - 1 if mode == GL_LINE_STRIP else count)
+                    ends = (starts + 1) % count
+                rounded = np.floor(v + 0.5).astype(np.int64)
+                for s, e in zip(starts, ends):
+                    framebuffer.set_color(*c[s])
+                    pixels, _ = bresenham_line_batch(np.concatenate([rounded[s], rounded[e]]))
+                    framebuffer.plot_points(pixels)
+            elif mode == GL_TRIANGLES:
+                framebuffer.fill_triangles(v, c)
+            else:
+                for polygon in self._polygons(mode, count):
+                    framebuffer.set_color(*c[polygon[0]])
+                    framebuffer.fill_polygon(v[polygon])
+        return framebuffer
+
+    @staticmethod
+    def _polygons(mode, count):
+        # Vertex index lists of the filled pieces making up one primitive
+        if mode == GL_TRIANGLES:
+            return [[i, i + 1, i + 2] for i in range(0, count - 2, 3)]
+        if mode == GL_QUADS:
+            return [[i, i + 1, i + 2, i + 3] for i in range(0, count - 3, 4)]
+        if mode == GL_TRIANGLE_FAN:
+            return [[0, i, i + 1] for i in range(1, count - 1)]
+        if mode == GL_TRIANGLE_STRIP:
+            return [[i, i + 1, i + 2] for i in range(count - 2)]
+        if mode == GL_QUAD_STRIP:
+            return [[i, i + 1, i + 3, i + 2] for i in range(0, count - 3, 2)]
+        return [list(range(count))]
+
+
+_backend = RealGL()
+
+
+def get_backend():
+    """Return the backend the routed GL calls go to"""
+    return _backend
+
+
+def set_backend(backend):
+    """Select the backend for the routed GL calls and return the previous one"""
+    global _backend
+    previous = _backend
+    _backend = backend
+    return previous
+
+
+def record_frame(draw, recorder=None):
+    """
+    Run one frame of drawing code against a RecordingGL
+
+    Args:
+        draw: function issuing the GL calls of one frame, e.g. display()
+        recorder: RecordingGL to record into; a new one by default
+
+    Returns:
+        the recorder, holding the capture and its frame statistics
+    """
+    recorder = recorder if recorder is not None else RecordingGL()
+    previous = set_backend(recorder)
+    try:
+        recorder.begin_frame()
+        draw()
+        recorder.end_frame()
+    finally:
+        set_backend(previous)
+    return recorder
+
+
+def glBegin(mode):
+    _backend.glBegin(mode)
+
+def glEnd():
+    _backend.glEnd()
+
+def glVertex2f(x, y):
+    _backend.glVertex2f(x, y)
+
+def glColor3f(r, g, b):
+    _backend.glColor3f(r, g, b)
+
+def glClear(mask):
+    _backend.glClear(mask)
+
+def glPointSize(size):
+    _backend.glPointSize(size)
+
+def glEnableClientState(array):
+    _backend.glEnableClientState(array)
+
+def glDisableClientState(array):
+    _backend.glDisableClientState(array)
+
+def glVertexPointer(size, type, stride, pointer):
+    _backend.glVertexPointer(size, type, stride, pointer)
+
+def glColorPointer(size, type, stride, pointer):
+    _backend.glColorPointer(size, type, stride, pointer)
+
+def glDrawArrays(mode, first, count):
+    _backend.glDrawArrays(mode, first, count)
+
+def glFlush():
+    _backend.glFlush()
+
+def glRasterPos2f(x, y):
+    _backend.glRasterPos2f(x, y)
+
+def glutBitmapCharacter(font, character):
+    _backend.glutBitmapCharacter(font, character)
+
+def glutSwapBuffers():
+    _backend.glutSwapBuffers()
+
+
+# Demo scripts measured by the draw-call benchmark, relative to the repository root
+DEMOS = [
+    ('drawing algos', 'bresenham_line'),
+    ('drawing algos', 'dda_line'),
+    ('drawing algos', 'midpoint_circle'),
+    ('drawing algos', 'midpoint_ellipse'),
+    ('drawing algos', 'pie_chart'),
+    ('drawing algos', 'line_graph'),
+    ('name', 'name'),
+    ('transformation', 'translation_2d'),
+    ('transformation', 'rotation_2d'),
+    ('transformation', 'scaling_2d'),
+    ('transformation', 'reflection_2d'),
+    ('transformation', 'shearing_2d'),
+    ('transformation', 'composite_transformations'),
+]
+
+
+def benchmark(replay=False):
+    """Record one display() frame of every demo and report its draw calls"""
+    import importlib
+    import os
+    import sys
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    print(f"{'demo':<28}{'calls':>8}{'vertices':>10}{'primitives':>12}")
+    for directory, name in DEMOS:
+        sys.path.insert(0, os.path.join(root, directory))
+        try:
+            module = importlib.import_module(name)
+        except ImportError as error:
+            print(f"{name:<28}skipped ({error})")
+            continue
+        finally:
+            sys.path.pop(0)
+        recorder = record_frame(module.display)
+        stats = recorder.frames[-1]
+        print(f"{name:<28}{stats['calls']:>8}{stats['vertices']:>10}{stats['primitives']:>12}")
+        if replay:
+            from framebuffer import Framebuffer
+            width, height = getattr(module, 'WIDTH', 650), getattr(module, 'HEIGHT', 400)
+            recorder.replay(Framebuffer(width, height)).save(f"plots/replay/{name}.png")
+
+
+if __name__ == "__main__":
+    import sys
+    # The demos import this file as gl_backend, so the recording has to
+    # switch that module's backend rather than the one of __main__
+    import gl_backend
+    gl_backend.benchmark(replay="--replay" in sys.argv)
@@ -0,0 +1,20 @@
+"""
+OpenGL names for the demo scripts outside this directory
+The transformation and name demos take everything with `from gl_demo import *`:
+PyOpenGL when it is installed, for window setup in main(), with the
+immediate-mode calls of display() replaced by the gl_backend facade so
+their frames can be recorded without a display
+"""
+
+try:
+    from OpenGL.GL import *
+    from OpenGL.GLUT import *
+    from OpenGL.GLU import *
+except ImportError:
+    # Without PyOpenGL display() can still be recorded through gl_backend
+    pass
+
+from gl_backend import (glBegin, glEnd, glVertex2f, glColor3f, glClear, glPointSize, glFlush,
+                        glRasterPos2f, glutBitmapCharacter, glutSwapBuffers,
+                        GL_COLOR_BUFFER_BIT, GL_POINTS, GL_LINES, GL_LINE_LOOP, GL_TRIANGLES,
+                        GL_QUADS, GLUT_BITMAP_HELVETICA_12, GLUT_BITMAP_HELVETICA_18)
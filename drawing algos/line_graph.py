@@ -1,64 +1,274 @@
-from OpenGL.GL import *
-from OpenGL.GLUT import *
-from OpenGL.GLU import *
+try:
+    from OpenGL.GL import *
+    from OpenGL.GLUT import *
+    from OpenGL.GLU import *
+except ImportError:
+    # Without PyOpenGL only the headless framebuffer target is available
+    pass
+import sys
+import time
+import numpy as np
+from bresenham_line import bresenham_line_batch
+from framebuffer import Framebuffer, get_target, set_target, headless_frames, run_headless
+from gl_backend import glFlush
 
 # Implement the Line Function (DDA/BLA) for generating a line graph of a given set of data
 # Using Bresenham Line Algorithm (BLA)
-def bresenham_line(x1, y1, x2, y2):
-    glBegin(GL_POINTS)
-    dx = abs(x2 - x1)
-    dy = abs(y2 - y1)
-    sx = 1 if x1 < x2 else -1
-    sy = 1 if y1 < y2 else -1
-    err = dx - dy
-    while True:
-        glVertex2f(x1, y1)
-        if x1 == x2 and y1 == y2:
-            break
-        e2 = 2 * err
-        if e2 > -dy:
-            err -= dy
-            x1 += sx
-        if e2 < dx:
-            err += dx
-            y1 += sy
-    glEnd()
-
-def draw_line_graph(data_points):
-    # data_points is list of (x, y) tuples
+def pixel_x(i, offset_x, scale_x):
+    """Pixel column of sample index i"""
+    return np.floor(offset_x + i * scale_x + 0.5).astype(np.int64)
+
+def column_bounds(n, offset_x, scale_x):
+    """
+    Index range of the samples landing in each pixel column
+
+    The boundaries come from inverting pixel_x and are then nudged by one
+    sample where float rounding disagrees, so they match pixel_x exactly
+    without evaluating it for every sample.
+
+    Returns:
+        starts, ends: arrays with the samples of column k in starts[k]:ends[k]
+    """
+    first = int(pixel_x(0, offset_x, scale_x))
+    last = int(pixel_x(n - 1, offset_x, scale_x))
+    columns = np.arange(first + 1, last + 1)
+    edges = np.ceil((columns - 0.5 - offset_x) / scale_x).astype(np.int64)
+    edges = np.clip(edges, 1, n - 1)
+    edges -= pixel_x(edges - 1, offset_x, scale_x) >= columns
+    edges += pixel_x(edges, offset_x, scale_x) < columns
+    starts = np.concatenate([[0], edges])
+    ends = np.concatenate([edges, [n]])
+    keep = starts < ends
+    return starts[keep], ends[keep]
+
+def lttb_indices(ys, threshold):
+    """Largest-Triangle-Three-Buckets selection of threshold sample indices"""
+    n = len(ys)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    # The first and last samples are always kept; the rest are split
+    # into threshold - 2 buckets that each contribute one sample
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64).tolist() + [n]
+    selected = [0]
+    for b in range(threshold - 2):
+        start, end = edges[b], edges[b + 1]
+        # The average of the next bucket is the third corner of the triangle
+        next_start, next_end = edges[b + 1], edges[b + 2]
+        avg_i = (next_start + next_end - 1) / 2
+        avg_y = ys[next_start:next_end].mean()
+        a = selected[-1]
+        i = np.arange(start, end)
+        area = np.abs((a - avg_i) * (ys[start:end] - ys[a]) - (a - i) * (avg_y - ys[a]))
+        selected.append(start + int(np.argmax(area)))
+    selected.append(n - 1)
+    return np.array(selected)
+
+def decimate(ys, offset_x, scale_x, method='m4'):
+    """
+    Reduce a series to the samples that matter at screen resolution
+
+    Args:
+        ys: 1-D array of sample values
+        offset_x, scale_x: mapping from sample index to screen x
+        method: 'm4' keeps the first, last, min and max sample of every pixel
+                column, which rasterizes to exactly the same pixels as the full
+                series; 'minmax' keeps only the min and max; 'lttb' keeps
+                four points per column chosen by Largest-Triangle-Three-Buckets
+
+    Returns:
+        sorted array of the kept sample indices
+    """
+    n = len(ys)
+    starts, ends = column_bounds(n, offset_x, scale_x)
+    if method == 'lttb':
+        return lttb_indices(ys, 4 * len(starts))
+
+    kept = [np.array([0, n - 1])]
+    if method == 'm4':
+        kept += [starts, ends - 1]
+    elif method != 'minmax':
+        raise ValueError(f"Unknown decimation method: {method}")
+    mins = np.empty(len(starts), dtype=np.int64)
+    maxs = np.empty(len(starts), dtype=np.int64)
+    for k, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+        column = ys[start:end]
+        mins[k] = start + column.argmin()
+        maxs[k] = start + column.argmax()
+    kept += [mins, maxs]
+    return np.unique(np.concatenate(kept))
+
+def draw_line_graph(data_points, decimation='m4'):
+    # data_points is list of (x, y) tuples, an (n, 2) array, or a 1-D array of y values
     # Scale to fit in 0-650, 0-400
-    if len(data_points) < 2:
+    data = np.asarray(data_points, dtype=float)
+    ys = data[:, 1] if data.ndim == 2 else data
+    if len(ys) < 2:
         return
-    max_y = max(y for x, y in data_points)
-    min_y = min(y for x, y in data_points)
+    max_y = ys.max()
+    min_y = ys.min()
     scale_y = 300 / (max_y - min_y) if max_y != min_y else 1
     offset_y = 50
-    scale_x = 600 / (len(data_points) - 1) if len(data_points) > 1 else 1
+    scale_x = 600 / (len(ys) - 1)
     offset_x = 25
-    points = []
-    for i, (x, y) in enumerate(data_points):
-        px = offset_x + i * scale_x
-        py = offset_y + (y - min_y) * scale_y
-        points.append((px, py))
-    for i in range(len(points) - 1):
-        bresenham_line(points[i][0], points[i][1], points[i+1][0], points[i+1][1])
 
-def display():
-    glClear(GL_COLOR_BUFFER_BIT)
-    glColor3f(1.0, 1.0, 1.0)
+    # Long series are cut down to about four samples per pixel column
+    # before any segment is rasterized
+    if decimation is not None and len(ys) > 4 * 600:
+        indices = decimate(ys, offset_x, scale_x, decimation)
+    else:
+        indices = np.arange(len(ys))
+    points = np.column_stack([
+        pixel_x(indices, offset_x, scale_x),
+        np.floor(offset_y + (ys[indices] - min_y) * scale_y + 0.5).astype(np.int64),
+    ])
+    pixels, _ = bresenham_line_batch(np.hstack([points[:-1], points[1:]]))
+    get_target().plot_points(pixels)
+
+class LiveLineGraph:
+    """
+    Line graph of a live series kept in a fixed-capacity ring buffer
+
+    Appended samples only rasterize their own new segments. The whole graph
+    is rescaled and redrawn only when a sample falls outside the current y
+    range, which is padded by headroom so this stays rare, or when the buffer
+    is full and the window scrolls forward by scroll samples at once. Both
+    redraws cost O(capacity) and happen at most once every scroll samples
+    for a steady signal, so the per-sample cost stays constant.
+    """
+
+    def __init__(self, capacity=600, scroll=None, headroom=0.1):
+        """
+        Initialize live graph
+
+        Args:
+            capacity: number of samples visible across the graph, at least 2
+            scroll: samples dropped from the front when the buffer is full,
+                    from 1 to capacity (half the capacity by default)
+            headroom: fraction of the y range added above and below on rescale
+        """
+        if capacity < 2:
+            raise ValueError(f"Capacity must be at least 2 samples, got {capacity}")
+        scroll = scroll if scroll is not None else capacity // 2
+        if not 1 <= scroll <= capacity:
+            raise ValueError(f"Scroll must be between 1 and the capacity {capacity}, got {scroll}")
+        self.capacity = capacity
+        self.scroll = scroll
+        self.headroom = headroom
+        self.buffer = np.empty(capacity, dtype=float)
+        self.start = 0
+        self.count = 0
+        self.y_min = None
+        self.y_max = None
+        self.offset_x = 25
+        self.scale_x = 600 / (capacity - 1)
+        self.offset_y = 50
+        self.redraws = 0
+        self.incremental_draws = 0
+
+    def values(self):
+        """Visible samples, oldest first"""
+        slots = (self.start + np.arange(self.count)) % self.capacity
+        return self.buffer[slots]
+
+    def append(self, values):
+        """Append one sample or an array of samples and draw them; NaN and inf are rejected"""
+        values = np.atleast_1d(np.asarray(values, dtype=float))
+        if not np.isfinite(values).all():
+            raise ValueError("Samples must be finite")
+        dirty = False
+        while len(values):
+            if self.count == self.capacity:
+                self.start = (self.start + self.scroll) % self.capacity
+                self.count -= self.scroll
+                if self.count:
+                    self._rescale(self.values())
+                else:
+                    # Scrolled a whole window; the next chunk sets the y range
+                    self.y_min = self.y_max = None
+                dirty = True
+            room = self.capacity - self.count
+            chunk, values = values[:room], values[room:]
+            first = self.count
+            slots = (self.start + first + np.arange(len(chunk))) % self.capacity
+            self.buffer[slots] = chunk
+            self.count += len(chunk)
+
+            if self.y_min is None or chunk.min() < self.y_min or chunk.max() > self.y_max:
+                self._rescale(self.values())
+                dirty = True
+            if not dirty:
+                self._draw_slots(max(first - 1, 0), self.count)
+                self.incremental_draws += 1
+        if dirty:
+            self.redraw()
+
+    def redraw(self):
+        """Clear the target and draw every visible segment"""
+        get_target().clear()
+        self._draw_slots(0, self.count)
+        self.redraws += 1
+
+    def _rescale(self, ys):
+        low, high = ys.min(), ys.max()
+        pad = (high - low) * self.headroom
+        self.y_min, self.y_max = low - pad, high + pad
+
+    def _draw_slots(self, first, end):
+        # Segments joining visible samples first..end-1, in window order
+        if end - first < 2:
+            return
+        k = np.arange(first, end)
+        ys = self.buffer[(self.start + k) % self.capacity]
+        scale_y = 300 / (self.y_max - self.y_min) if self.y_max != self.y_min else 1
+        points = np.column_stack([
+            pixel_x(k, self.offset_x, self.scale_x),
+            np.floor(self.offset_y + (ys - self.y_min) * scale_y + 0.5).astype(np.int64),
+        ])
+        pixels, _ = bresenham_line_batch(np.hstack([points[:-1], points[1:]]))
+        get_target().plot_points(pixels)
+
+def benchmark_live(samples=100000, block=10, capacity=2000, seed=0):
+    """Time a random-walk telemetry stream appended block samples at a time"""
+    rng = np.random.default_rng(seed)
+    stream = rng.standard_normal(samples).cumsum()
+    graph = LiveLineGraph(capacity)
+    previous = set_target(Framebuffer())
+    try:
+        start = time.perf_counter()
+        for i in range(0, samples, block):
+            graph.append(stream[i:i + block])
+        elapsed = time.perf_counter() - start
+    finally:
+        set_target(previous)
+    print(f"{samples} samples in {elapsed:.3f}s ({samples / elapsed:,.0f} samples/s)")
+    print(f"Full redraws: {graph.redraws}, incremental draws: {graph.incremental_draws}")
+
+def draw_scene():
+    target = get_target()
+    target.clear()
+    target.set_color(1.0, 1.0, 1.0)
     # Sample data
     data = [(0, 1), (1, 3), (2, 2), (3, 5), (4, 4)]
     draw_line_graph(data)
+
+def display():
+    draw_scene()
     glFlush()
 
 def init():
     glClearColor(0.0, 0.0, 0.0, 1.0)
     gluOrtho2D(0, 650, 0, 400)
 
-glutInit()
-glutInitDisplayMode(GLUT_SINGLE | GLUT_RGB)
-glutInitWindowSize(800, 400)
-glutCreateWindow(b"Line Graph - OpenGL")
-init()
-glutDisplayFunc(display)
-glutMainLoop()
\ No newline at end of file
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark_live()
+    elif "--headless" in sys.argv:
+        run_headless(draw_scene, "plots/drawing/line_graph.png", headless_frames())
+    else:
+        glutInit()
+        glutInitDisplayMode(GLUT_SINGLE | GLUT_RGB)
+        glutInitWindowSize(800, 400)
+        glutCreateWindow(b"Line Graph - OpenGL")
+        init()
+        glutDisplayFunc(display)
+        glutMainLoop()
\ No newline at end of file
@@ -1,14 +1,53 @@
-from OpenGL.GL import *
-from OpenGL.GLUT import *
-from OpenGL.GLU import *
+try:
+    from OpenGL.GL import *
+    from OpenGL.GLUT import *
+    from OpenGL.GLU import *
+except ImportError:
+    # Without PyOpenGL only the headless framebuffer target is available
+    pass
+import sys
+import numpy as np
+from framebuffer import get_target, headless_frames, run_headless
+from gl_backend import glFlush
+from table_cache import TableCache
 
 # Implement Mid-point Circle Drawing Algorithm
+def midpoint_circle_points(xc, yc, r):
+    points = []
+    x = 0
+    y = r
+    p = 1 - r
+    plot_circle_points(points, xc, yc, x, y)
+    while x < y:
+        x += 1
+        if p < 0:
+            p += 2 * x + 1
+        else:
+            y -= 1
+            p += 2 * x - 2 * y + 1
+        plot_circle_points(points, xc, yc, x, y)
+    return points
+
 def midpoint_circle(xc, yc, r):
-    glBegin(GL_POINTS)
+    get_target().plot_points(circle_cache.offsets(r) + (xc, yc))
+
+def filled_circle_spans(xc, yc, r):
+    """
+    Horizontal spans of a filled circle from the midpoint decision loop
+
+    Each step (x, y) of the loop is the right end of rows y and x above and
+    below the center, so the loop yields the half-width of every row without
+    visiting interior pixels.
+
+    Returns:
+        ys, x_starts, x_ends: int64 arrays of length 2r + 1, ends inclusive
+    """
+    half = [0] * (r + 1)
     x = 0
     y = r
     p = 1 - r
-    plot_circle_points(xc, yc, x, y)
+    half[y] = max(half[y], x)
+    half[x] = max(half[x], y)
     while x < y:
         x += 1
         if p < 0:
@@ -16,34 +55,91 @@ def midpoint_circle(xc, yc, r):
         else:
             y -= 1
             p += 2 * x - 2 * y + 1
-        plot_circle_points(xc, yc, x, y)
-    glEnd()
-
-def plot_circle_points(xc, yc, x, y):
-    glVertex2f(xc + x, yc + y)
-    glVertex2f(xc - x, yc + y)
-    glVertex2f(xc + x, yc - y)
-    glVertex2f(xc - x, yc - y)
-    glVertex2f(xc + y, yc + x)
-    glVertex2f(xc - y, yc + x)
-    glVertex2f(xc + y, yc - x)
-    glVertex2f(xc - y, yc - x)
+        half[y] = max(half[y], x)
+        half[x] = max(half[x], y)
 
-def display():
-    glClear(GL_COLOR_BUFFER_BIT)
-    glColor3f(1.0, 1.0, 1.0)
+    dy = np.arange(-r, r + 1)
+    widths = np.array(half)[np.abs(dy)]
+    return yc + dy, xc - widths, xc + widths
+
+def midpoint_filled_circle(xc, yc, r):
+    get_target().fill_spans(*filled_circle_spans(xc, yc, r))
+
+def plot_circle_points(points, xc, yc, x, y):
+    points.extend([
+        (xc + x, yc + y),
+        (xc - x, yc + y),
+        (xc + x, yc - y),
+        (xc - x, yc - y),
+        (xc + y, yc + x),
+        (xc - y, yc + x),
+        (xc + y, yc - x),
+        (xc - y, yc - x),
+    ])
+
+def circle_offsets(r):
+    """Midpoint circle pixels of radius r around the origin, duplicates removed"""
+    return np.unique(np.array(midpoint_circle_points(0, 0, r), dtype=np.int32), axis=0)
+
+class CircleOffsetCache(TableCache):
+    """
+    LRU cache of midpoint circle pixel offsets keyed by radius
+
+    Each table holds the offsets of one radius from its center, with the
+    eight-way symmetry already expanded and duplicate pixels removed, so
+    drawing that radius anywhere is a single add.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        super().__init__(circle_offsets, max_bytes)
+
+    def offsets(self, r):
+        """Return the read-only int32 (n, 2) offset table for radius r"""
+        return self.get(r)
+
+
+circle_cache = CircleOffsetCache()
+
+def midpoint_circle_batch(centers, r):
+    """
+    Pixels of circles of radius r at many centers
+
+    Args:
+        centers: array of shape (K, 2) with integer centers
+
+    Returns:
+        int32 array of shape (K * n, 2); circle k owns rows k * n to (k + 1) * n
+    """
+    offsets = circle_cache.offsets(r)
+    centers = np.asarray(centers, dtype=np.int32).reshape(-1, 1, 2)
+    return (centers + offsets).reshape(-1, 2)
+
+def draw_circles(centers, r):
+    get_target().plot_points(midpoint_circle_batch(centers, r))
+
+def draw_scene():
+    target = get_target()
+    target.clear()
+    target.set_color(1.0, 1.0, 1.0)
     # Draw a circle at (325,200) with radius 100
     midpoint_circle(325, 200, 100)
+
+def display():
+    draw_scene()
     glFlush()
 
 def init():
     glClearColor(0.0, 0.0, 0.0, 1.0)
     gluOrtho2D(0, 650, 0, 400)
 
-glutInit()
-glutInitDisplayMode(GLUT_SINGLE | GLUT_RGB)
-glutInitWindowSize(800, 400)
-glutCreateWindow(b"Midpoint Circle - OpenGL")
-init()
-glutDisplayFunc(display)
-glutMainLoop()
\ No newline at end of file
+if __name__ == "__main__":
+    if "--headless" in sys.argv:
+        run_headless(draw_scene, "plots/drawing/midpoint_circle.png", headless_frames())
+    else:
+        glutInit()
+        glutInitDisplayMode(GLUT_SINGLE | GLUT_RGB)
+        glutInitWindowSize(800, 400)
+        glutCreateWindow(b"Midpoint Circle - OpenGL")
+        init()
+        glutDisplayFunc(display)
+        glutMainLoop()
\ No newline at end of file
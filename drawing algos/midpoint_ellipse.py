@@ -1,59 +1,171 @@
-from OpenGL.GL import *
-from OpenGL.GLUT import *
-from OpenGL.GLU import *
+try:
+    from OpenGL.GL import *
+    from OpenGL.GLUT import *
+    from OpenGL.GLU import *
+except ImportError:
+    # Without PyOpenGL only the headless framebuffer target is available
+    pass
+import sys
+import numpy as np
+from framebuffer import get_target, headless_frames, run_headless
+from gl_backend import glFlush
+from table_cache import TableCache
 
 # Implement Midpoint Ellipse drawing Algorithm
-def midpoint_ellipse(xc, yc, rx, ry):
-    glBegin(GL_POINTS)
+def midpoint_ellipse_quadrant(rx, ry, visit):
+    """
+    Run the midpoint ellipse loops around the origin, calling visit(x, y)
+    for every first-quadrant point
+
+    The decision parameters are kept multiplied by 4, which clears the 0.25
+    and 0.5 terms so the whole loop stays in integers.
+    """
+    rx2 = rx * rx
+    ry2 = ry * ry
     x = 0
     y = ry
-    p1 = ry**2 - rx**2 * ry + 0.25 * rx**2
-    dx = 2 * ry**2 * x
-    dy = 2 * rx**2 * y
+    p1 = 4 * ry2 - 4 * rx2 * ry + rx2
+    dx = 2 * ry2 * x
+    dy = 2 * rx2 * y
     while dx < dy:
-        plot_ellipse_points(xc, yc, x, y)
+        visit(x, y)
         x += 1
-        dx += 2 * ry**2
+        dx += 2 * ry2
         if p1 < 0:
-            p1 += dx + ry**2
+            p1 += 4 * (dx + ry2)
         else:
             y -= 1
-            dy -= 2 * rx**2
-            p1 += dx - dy + ry**2
-    p2 = ry**2 * (x + 0.5)**2 + rx**2 * (y - 1)**2 - rx**2 * ry**2
+            dy -= 2 * rx2
+            p1 += 4 * (dx - dy + ry2)
+    p2 = ry2 * (2 * x + 1)**2 + 4 * rx2 * (y - 1)**2 - 4 * rx2 * ry2
     while y >= 0:
-        plot_ellipse_points(xc, yc, x, y)
+        visit(x, y)
         y -= 1
-        dy -= 2 * rx**2
+        dy -= 2 * rx2
         if p2 > 0:
-            p2 += rx**2 - dy
+            p2 += 4 * (rx2 - dy)
         else:
             x += 1
-            dx += 2 * ry**2
-            p2 += dx - dy + rx**2
-    glEnd()
+            dx += 2 * ry2
+            p2 += 4 * (dx - dy + rx2)
 
-def plot_ellipse_points(xc, yc, x, y):
-    glVertex2f(xc + x, yc + y)
-    glVertex2f(xc - x, yc + y)
-    glVertex2f(xc + x, yc - y)
-    glVertex2f(xc - x, yc - y)
+def midpoint_ellipse_points(xc, yc, rx, ry):
+    points = []
+    midpoint_ellipse_quadrant(rx, ry, lambda x, y: plot_ellipse_points(points, xc, yc, x, y))
+    return points
 
-def display():
-    glClear(GL_COLOR_BUFFER_BIT)
-    glColor3f(1.0, 1.0, 1.0)
+def midpoint_ellipse(xc, yc, rx, ry):
+    get_target().plot_points(ellipse_cache.offsets(rx, ry) + (xc, yc))
+
+def filled_ellipse_spans(xc, yc, rx, ry):
+    """
+    Horizontal spans of a filled ellipse from the midpoint decision loops
+
+    Every quadrant point (x, y) the region loops visit is a candidate
+    right end of row y, so the widest x seen per row gives the span without
+    visiting interior pixels.
+
+    Returns:
+        ys, x_starts, x_ends: int64 arrays of length 2 * ry + 1, ends inclusive
+    """
+    half = [0] * (ry + 1)
+
+    def widen(x, y):
+        half[y] = max(half[y], x)
+
+    midpoint_ellipse_quadrant(rx, ry, widen)
+
+    rows = np.arange(-ry, ry + 1)
+    widths = np.array(half)[np.abs(rows)]
+    return yc + rows, xc - widths, xc + widths
+
+def midpoint_filled_ellipse(xc, yc, rx, ry):
+    get_target().fill_spans(*filled_ellipse_spans(xc, yc, rx, ry))
+
+def plot_ellipse_points(points, xc, yc, x, y):
+    points.extend([
+        (xc + x, yc + y),
+        (xc - x, yc + y),
+        (xc + x, yc - y),
+        (xc - x, yc - y),
+    ])
+
+def ellipse_offsets(rx, ry):
+    """Midpoint ellipse pixels around the origin, quadrants expanded and duplicates removed"""
+    quadrant = []
+    midpoint_ellipse_quadrant(rx, ry, lambda x, y: quadrant.append((x, y)))
+    quadrant = np.array(quadrant, dtype=np.int32)
+    signs = np.array([[1, 1], [-1, 1], [1, -1], [-1, -1]], dtype=np.int32)
+    return np.unique((quadrant[None, :, :] * signs[:, None, :]).reshape(-1, 2), axis=0)
+
+class EllipseOffsetCache(TableCache):
+    """LRU cache of midpoint ellipse pixel offsets keyed by (rx, ry)"""
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        super().__init__(ellipse_offsets, max_bytes)
+
+    def offsets(self, rx, ry):
+        """Return the read-only int32 (n, 2) offset table for radii rx, ry"""
+        return self.get(rx, ry)
+
+
+ellipse_cache = EllipseOffsetCache()
+
+def midpoint_ellipse_batch(centers, rx, ry):
+    """
+    Pixels of many ellipses in one call
+
+    Ellipses sharing a size are stamped from the cached offset table with
+    one broadcast add per distinct (rx, ry).
+
+    Args:
+        centers: array of shape (K, 2) with integer centers
+        rx, ry: radii shared by all ellipses, or arrays of shape (K,)
+
+    Returns:
+        int32 array of shape (P, 2), grouped by ellipse size
+    """
+    centers = np.asarray(centers, dtype=np.int32).reshape(-1, 2)
+    radii = np.empty((len(centers), 2), dtype=np.int64)
+    radii[:, 0] = rx
+    radii[:, 1] = ry
+    sizes, groups = np.unique(radii, axis=0, return_inverse=True)
+    groups = groups.reshape(-1)
+
+    pixels = []
+    for group, (size_x, size_y) in enumerate(sizes.tolist()):
+        offsets = ellipse_cache.offsets(size_x, size_y)
+        pixels.append((centers[groups == group, None, :] + offsets).reshape(-1, 2))
+    if not pixels:
+        return np.empty((0, 2), dtype=np.int32)
+    return np.concatenate(pixels)
+
+def draw_ellipses(centers, rx, ry):
+    get_target().plot_points(midpoint_ellipse_batch(centers, rx, ry))
+
+def draw_scene():
+    target = get_target()
+    target.clear()
+    target.set_color(1.0, 1.0, 1.0)
     # Draw an ellipse at (325,200) with rx=150, ry=100
     midpoint_ellipse(325, 200, 150, 100)
+
+def display():
+    draw_scene()
     glFlush()
 
 def init():
     glClearColor(0.0, 0.0, 0.0, 1.0)
     gluOrtho2D(0, 650, 0, 400)
 
-glutInit()
-glutInitDisplayMode(GLUT_SINGLE | GLUT_RGB)
-glutInitWindowSize(800, 400)
-glutCreateWindow(b"Midpoint Ellipse - OpenGL")
-init()
-glutDisplayFunc(display)
-glutMainLoop()
\ No newline at end of file
+if __name__ == "__main__":
+    if "--headless" in sys.argv:
+        run_headless(draw_scene, "plots/drawing/midpoint_ellipse.png", headless_frames())
+    else:
+        glutInit()
+        glutInitDisplayMode(GLUT_SINGLE | GLUT_RGB)
+        glutInitWindowSize(800, 400)
+        glutCreateWindow(b"Midpoint Ellipse - OpenGL")
+        init()
+        glutDisplayFunc(display)
+        glutMainLoop()
\ No newline at end of file
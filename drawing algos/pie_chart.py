@@ -1,47 +1,215 @@
-from OpenGL.GL import *
-from OpenGL.GLUT import *
-from OpenGL.GLU import *
+try:
+    from OpenGL.GL import *
+    from OpenGL.GLUT import *
+    from OpenGL.GLU import *
+except ImportError:
+    # Without PyOpenGL only the headless framebuffer target is available
+    pass
 import math
+import sys
+import time
+import numpy as np
+from framebuffer import Framebuffer, get_target, set_target, headless_frames, run_headless
+from gl_backend import glFlush
 
-# Implement the Pie chart
-def draw_pie_chart(data, colors):
-    # data is list of values, colors list of (r,g,b)
+# Shared unit-circle table; arc vertices are read from it at a stride chosen
+# per chart, so no chart calls cos/sin for its interior vertices
+TABLE_SIZE = 4096
+TABLE_STEP = 2 * math.pi / TABLE_SIZE
+UNIT_CIRCLE = np.column_stack([
+    np.cos(np.arange(TABLE_SIZE) * TABLE_STEP),
+    np.sin(np.arange(TABLE_SIZE) * TABLE_STEP),
+])
+
+def table_stride(radius, tolerance):
+    """
+    Table stride whose chords stay within tolerance pixels of the arc
+
+    A chord spanning angle t sits r * (1 - cos(t / 2)) inside the arc, so
+    the largest allowed step is t = 2 * acos(1 - tolerance / r).
+    """
+    if tolerance >= radius:
+        max_step = math.pi / 2
+    else:
+        max_step = min(2 * math.acos(1 - tolerance / radius), math.pi / 2)
+    return max(int(max_step / TABLE_STEP), 1)
+
+def merge_thin_slices(data, colors, radius):
+    """
+    Merge runs of consecutive slices whose arc is narrower than a pixel
+
+    A merged run is drawn in the color of its largest member.
+
+    Returns:
+        values, colors of the slices left to draw
+    """
     total = sum(data)
-    if total == 0:
-        return
-    start_angle = 0
-    glBegin(GL_TRIANGLE_FAN)
-    glVertex2f(325, 200)  # center
+    circumference = 2 * math.pi * radius
+    values, merged_colors = [], []
+    run_value, run_color, run_largest = 0, None, -1
     for value, color in zip(data, colors):
-        angle = 2 * math.pi * value / total
-        end_angle = start_angle + angle
-        glColor3f(*color)
-        # Draw the sector
-        steps = 20
-        for i in range(steps + 1):
-            a = start_angle + (end_angle - start_angle) * i / steps
-            x = 325 + 150 * math.cos(a)
-            y = 200 + 150 * math.sin(a)
-            glVertex2f(x, y)
-        start_angle = end_angle
-    glEnd()
+        if value * circumference / total >= 1:
+            if run_color is not None:
+                values.append(run_value)
+                merged_colors.append(run_color)
+                run_value, run_color, run_largest = 0, None, -1
+            values.append(value)
+            merged_colors.append(color)
+        elif value > 0:
+            run_value += value
+            if value > run_largest:
+                run_color, run_largest = color, value
+    if run_color is not None:
+        values.append(run_value)
+        merged_colors.append(run_color)
+    return values, merged_colors
 
-def display():
-    glClear(GL_COLOR_BUFFER_BIT)
+def tessellate_pie_charts(charts, tolerance=0.5):
+    """
+    Tessellate many pie charts into one ragged vertex array
+
+    Every slice becomes a fan polygon: the center, the exact start point of
+    its arc, the table vertices strictly inside the arc, and the exact end
+    point, so neighbouring slices share their boundary edge.
+
+    Args:
+        charts: iterable of (data, colors, cx, cy, radius)
+        tolerance: largest allowed distance in pixels between arc and chords
+
+    Returns:
+        vertices: float array of shape (V, 2)
+        offsets: int64 array of shape (S + 1,); slice s owns
+                 vertices[offsets[s]:offsets[s + 1]]
+        colors: float array of shape (S, 3), one color per slice
+    """
+    starts, ends, centers, radii, strides, colors = [], [], [], [], [], []
+    for data, chart_colors, cx, cy, radius in charts:
+        if sum(data) == 0:
+            continue
+        values, chart_colors = merge_thin_slices(data, chart_colors, radius)
+        bounds = 2 * math.pi * np.concatenate([[0], np.cumsum(values)]) / sum(values)
+        starts.append(bounds[:-1])
+        ends.append(bounds[1:])
+        centers += [(cx, cy)] * len(values)
+        radii += [radius] * len(values)
+        strides += [table_stride(radius, tolerance)] * len(values)
+        colors += list(chart_colors)
+    if not starts:
+        return np.empty((0, 2)), np.zeros(1, dtype=np.int64), np.empty((0, 3))
+
+    starts = np.concatenate(starts)
+    ends = np.concatenate(ends)
+    centers = np.array(centers, dtype=float)
+    radii = np.array(radii, dtype=float)
+    strides = np.array(strides, dtype=np.int64)
+
+    # Table vertices k * stride strictly inside (start, end)
+    step = strides * TABLE_STEP
+    first = np.floor(starts / step).astype(np.int64) + 1
+    last = np.ceil(ends / step).astype(np.int64) - 1
+    interior = np.maximum(last - first + 1, 0)
+
+    counts = interior + 3
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    slice_of = np.repeat(np.arange(len(counts)), counts)
+    j = np.arange(offsets[-1]) - offsets[slice_of]
+
+    table_index = ((first[slice_of] + j - 2) * strides[slice_of]) % TABLE_SIZE
+    unit = UNIT_CIRCLE[table_index]
+    is_start = j == 1
+    is_end = j == counts[slice_of] - 1
+    unit[is_start] = np.column_stack([np.cos(starts), np.sin(starts)])
+    unit[is_end] = np.column_stack([np.cos(ends), np.sin(ends)])
+    unit[j == 0] = 0.0
+
+    vertices = centers[slice_of] + radii[slice_of, None] * unit
+    return vertices, offsets, np.array(colors, dtype=float)
+
+def pie_triangles(vertices, offsets, colors):
+    """
+    Turn tessellated slices into a GL_TRIANGLES vertex buffer
+
+    Returns:
+        triangle_vertices: float32 array of shape (3 * T, 2)
+        triangle_colors: float32 array of shape (3 * T, 3), per vertex
+    """
+    fans = np.diff(offsets) - 2
+    fan_offsets = np.concatenate([[0], np.cumsum(fans)])
+    slice_of = np.repeat(np.arange(len(fans)), fans)
+    t = np.arange(fan_offsets[-1]) - fan_offsets[slice_of]
+    center = offsets[slice_of]
+    corners = np.column_stack([center, center + 1 + t, center + 2 + t]).reshape(-1)
+    return (vertices[corners].astype(np.float32),
+            np.repeat(colors[slice_of], 3, axis=0).astype(np.float32))
+
+def draw_pie_charts(charts, tolerance=0.5):
+    """
+    Render many pie charts into the current render target in one call
+
+    The slices go out as one triangle buffer: a single GL_TRIANGLES draw on
+    the GL target, or one batched span fill on a Framebuffer.
+    """
+    vertices, offsets, colors = tessellate_pie_charts(charts, tolerance)
+    get_target().fill_triangles(*pie_triangles(vertices, offsets, colors))
+
+# Implement the Pie chart
+def draw_pie_chart(data, colors, tolerance=0.5):
+    # data is list of values, colors list of (r,g,b)
+    draw_pie_charts([(data, colors, 325, 200, 150)], tolerance)
+
+def benchmark(charts=300, seed=0):
+    """Time a small-multiples dashboard of pie charts rendered in one call"""
+    rng = np.random.default_rng(seed)
+    palette = [(1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 1, 0), (1, 0, 1), (0, 1, 1)]
+    cols = 20
+    dashboard = []
+    for i in range(charts):
+        data = rng.integers(1, 100, size=rng.integers(2, 7)).tolist()
+        cx = 16 + (i % cols) * 32
+        cy = 16 + (i // cols) * 32
+        dashboard.append((data, palette, cx, cy, 14))
+
+    framebuffer = Framebuffer(cols * 32, (charts + cols - 1) // cols * 32)
+    previous = set_target(framebuffer)
+    try:
+        start = time.perf_counter()
+        vertices, offsets, colors = tessellate_pie_charts(dashboard)
+        tessellate_time = time.perf_counter() - start
+        draw_pie_charts(dashboard)
+        total_time = time.perf_counter() - start - tessellate_time
+    finally:
+        set_target(previous)
+    print(f"{charts} charts, {len(colors)} slices, {len(vertices)} vertices "
+          f"(fixed 20 steps per slice: {len(colors) * 22})")
+    print(f"Tessellation: {tessellate_time * 1000:.1f} ms, tessellate + fill: {total_time * 1000:.1f} ms")
+    framebuffer.save("plots/drawing/pie_dashboard.png")
+
+def draw_scene():
+    get_target().clear()
     # Sample data
     data = [10, 20, 30, 40]
     colors = [(1,0,0), (0,1,0), (0,0,1), (1,1,0)]
     draw_pie_chart(data, colors)
+
+def display():
+    draw_scene()
     glFlush()
 
 def init():
     glClearColor(0.0, 0.0, 0.0, 1.0)
     gluOrtho2D(0, 650, 0, 400)
 
-glutInit()
-glutInitDisplayMode(GLUT_SINGLE | GLUT_RGB)
-glutInitWindowSize(800, 400)
-glutCreateWindow(b"Pie Chart - OpenGL")
-init()
-glutDisplayFunc(display)
-glutMainLoop()
\ No newline at end of file
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+    elif "--headless" in sys.argv:
+        run_headless(draw_scene, "plots/drawing/pie_chart.png", headless_frames())
+    else:
+        glutInit()
+        glutInitDisplayMode(GLUT_SINGLE | GLUT_RGB)
+        glutInitWindowSize(800, 400)
+        glutCreateWindow(b"Pie Chart - OpenGL")
+        init()
+        glutDisplayFunc(display)
+        glutMainLoop()
\ No newline at end of file
@@ -0,0 +1,69 @@
+"""
+LRU cache of precomputed pixel tables
+Shared by the circle and ellipse rasterizers to reuse the pixel offsets of
+shapes that are drawn many times at different positions
+"""
+
+from collections import OrderedDict
+
+
+class TableCache:
+    """
+    LRU cache of read-only NumPy tables with a memory limit
+
+    Tables are built on a miss by build(*key) and evicted least recently
+    used first once their total size would exceed max_bytes.
+    """
+
+    def __init__(self, build, max_bytes=16 * 1024 * 1024):
+        """
+        Initialize cache
+
+        Args:
+            build: function returning the table for a key
+            max_bytes: memory limit for all cached tables together
+        """
+        self.build = build
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._tables = OrderedDict()
+
+    def get(self, *key):
+        """Return the table for key, building it on a miss"""
+        table = self._tables.get(key)
+        if table is not None:
+            self.hits += 1
+            self._tables.move_to_end(key)
+            return table
+
+        self.misses += 1
+        table = self.build(*key)
+        table.flags.writeable = False
+        if table.nbytes <= self.max_bytes:
+            while self.nbytes + table.nbytes > self.max_bytes:
+                _, evicted = self._tables.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+            self._tables[key] = table
+            self.nbytes += table.nbytes
+        return table
+
+    def clear(self):
+        """Drop all tables and reset the statistics"""
+        self._tables.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counts and memory use"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._tables),
+            'nbytes': self.nbytes,
+            'max_bytes': self.max_bytes,
+        }
@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+"""
+Test script comparing the batch rasterizers with the per-pixel ones
+"""
+
+import numpy as np
+import gl_backend
+from framebuffer import Framebuffer, GLTarget, set_target
+from bresenham_line import bresenham_points, bresenham_line_batch, draw_pixels
+from dda_line import dda_fixed_points, dda_fixed_batch
+from midpoint_circle import (midpoint_circle_points, circle_offsets, CircleOffsetCache,
+                             filled_circle_spans, midpoint_circle_batch)
+from midpoint_ellipse import (midpoint_ellipse_quadrant, midpoint_ellipse_points, ellipse_offsets,
+                              filled_ellipse_spans, midpoint_ellipse_batch)
+from table_cache import TableCache
+from line_graph import pixel_x, column_bounds, lttb_indices, decimate, draw_line_graph, LiveLineGraph
+from pie_chart import merge_thin_slices, tessellate_pie_charts, draw_pie_charts
+
+def random_segments(n, max_length, seed):
+    """Seeded integer segments in every octant, with points, axis-parallel and diagonal lines"""
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(-1000, 1000, size=(n, 2))
+    deltas = rng.integers(-max_length, max_length + 1, size=(n, 2))
+    kind = rng.integers(0, 5, n)
+    deltas[kind == 0] = 0
+    deltas[kind == 1, 1] = 0
+    deltas[kind == 2, 0] = 0
+    deltas[kind == 3, 1] = deltas[kind == 3, 0] * rng.choice([-1, 1], (kind == 3).sum())
+    return np.hstack([starts, starts + deltas])
+
+def test_bresenham_batch():
+    """Test batch Bresenham against the error-term walk"""
+    print("Testing Bresenham batch...")
+
+    for seed, max_length in [(0, 5), (1, 60), (2, 2000)]:
+        segments = random_segments(300, max_length, seed)
+        pixels, offsets = bresenham_line_batch(segments)
+        assert pixels.dtype == np.int32 and offsets.dtype == np.int64, "Batch output types incorrect"
+        assert len(offsets) == len(segments) + 1 and offsets[-1] == len(pixels), "Batch offsets incorrect"
+        for i, segment in enumerate(segments.tolist()):
+            expected = np.array(bresenham_points(*segment))
+            assert np.array_equal(pixels[offsets[i]:offsets[i + 1]], expected), \
+                f"Batch pixels differ for segment {segment}"
+
+    pixels, offsets = bresenham_line_batch(np.empty((0, 4), dtype=np.int64))
+    assert pixels.shape == (0, 2) and list(offsets) == [0], "Empty batch incorrect"
+    print("✓ Bresenham batch test passed")
+
+def test_draw_pixels_recording():
+    """Test that batch pixels submitted as a vertex array reach the recorder"""
+    print("Testing pixel array recording...")
+
+    pixels, _ = bresenham_line_batch(random_segments(50, 40, 3))
+    recorder = gl_backend.record_frame(lambda: draw_pixels(pixels))
+    assert recorder.primitives == [(gl_backend.GL_POINTS, 0, len(pixels))], "Recorded primitives incorrect"
+    assert np.array_equal(recorder.vertices(), pixels), "Recorded vertices differ from the pixels"
+    print("✓ Pixel array recording test passed")
+
+def test_record_frame():
+    """Test that record_frame captures one frame and restores the backend"""
+    print("Testing frame recording...")
+
+    def draw():
+        gl_backend.glClear(gl_backend.GL_COLOR_BUFFER_BIT)
+        gl_backend.glColor3f(1.0, 0.0, 0.0)
+        gl_backend.glBegin(gl_backend.GL_LINES)
+        gl_backend.glVertex2f(1, 2)
+        gl_backend.glVertex2f(30, 40)
+        gl_backend.glEnd()
+        gl_backend.glFlush()
+
+    previous = gl_backend.get_backend()
+    recorder = gl_backend.record_frame(draw)
+    assert gl_backend.get_backend() is previous, "Backend not restored"
+    assert recorder.cleared and recorder.primitives == [(gl_backend.GL_LINES, 0, 2)], "Capture incorrect"
+    assert np.array_equal(recorder.vertices(), [[1, 2], [30, 40]]), "Recorded vertices incorrect"
+    assert np.array_equal(recorder.colors(), [[1, 0, 0], [1, 0, 0]]), "Recorded colors incorrect"
+    assert recorder.frames == [{'calls': 7, 'vertices': 2, 'primitives': 1}], "Frame statistics incorrect"
+
+    # Recording into the same recorder starts a new capture and keeps the statistics
+    gl_backend.record_frame(draw, recorder)
+    assert len(recorder.frames) == 2 and len(recorder.vertices()) == 2, "Second frame incorrect"
+    assert recorder.calls_per_frame() == 7 and recorder.vertices_per_frame() == 2, "Averages incorrect"
+
+    def broken():
+        gl_backend.glBegin(gl_backend.GL_POINTS)
+        raise RuntimeError("draw failed")
+    try:
+        gl_backend.record_frame(broken)
+        assert False, "Drawing error swallowed"
+    except RuntimeError:
+        pass
+    assert gl_backend.get_backend() is previous, "Backend not restored after an error"
+    print("✓ Frame recording test passed")
+
+def test_replay():
+    """Test that replaying a recording matches drawing into the framebuffer directly"""
+    print("Testing recording replay...")
+
+    rng = np.random.default_rng(4)
+    triangles = rng.uniform(-20, 220, (60, 2))
+    triangle_colors = rng.uniform(0, 1, (60, 3))
+    quad = [(40.5, 30.25), (150.0, 45.0), (140.0, 120.5), (35.0, 110.0)]
+    line = (10, 190, 180, 150)
+    points = rng.integers(0, 200, (40, 2))
+
+    def draw():
+        gl_backend.glClear(gl_backend.GL_COLOR_BUFFER_BIT)
+        GLTarget().fill_triangles(triangles, triangle_colors)
+        gl_backend.glColor3f(0.0, 1.0, 0.0)
+        gl_backend.glBegin(gl_backend.GL_QUADS)
+        for x, y in quad:
+            gl_backend.glVertex2f(x, y)
+        gl_backend.glEnd()
+        gl_backend.glColor3f(0.0, 0.0, 1.0)
+        gl_backend.glBegin(gl_backend.GL_LINES)
+        gl_backend.glVertex2f(*line[:2])
+        gl_backend.glVertex2f(*line[2:])
+        gl_backend.glEnd()
+        gl_backend.glColor3f(1.0, 1.0, 0.0)
+        draw_pixels(points)
+
+    replayed = gl_backend.record_frame(draw).replay(Framebuffer(200, 200))
+
+    expected = Framebuffer(200, 200)
+    expected.fill_triangles(triangles, triangle_colors)
+    expected.set_color(0.0, 1.0, 0.0)
+    expected.fill_polygon(quad)
+    expected.set_color(0.0, 0.0, 1.0)
+    expected.plot_points(bresenham_points(*line))
+    expected.set_color(1.0, 1.0, 0.0)
+    expected.plot_points(points)
+    assert np.array_equal(replayed.pixels, expected.pixels), "Replayed frame differs"
+    print("✓ Recording replay test passed")
+
+def test_dda_fixed_batch():
+    """Test batch fixed-point DDA against the per-line fixed-point DDA"""
+    print("Testing fixed-point DDA batch...")
+
+    for seed, max_length in [(0, 5), (1, 60), (2, 2000)]:
+        segments = random_segments(300, max_length, seed)
+        pixels, offsets = dda_fixed_batch(segments)
+        assert pixels.dtype == np.int32 and offsets[-1] == len(pixels), "Batch output incorrect"
+        for i, segment in enumerate(segments.tolist()):
+            assert np.array_equal(pixels[offsets[i]:offsets[i + 1]], dda_fixed_points(*segment)), \
+                f"Batch samples differ for segment {segment}"
+
+    # Runs of single-pixel lines between long ones
+    segments = np.array([[0, 0, 0, 0], [5, 5, 5, 5], [3, -2, 900, 17], [7, 7, 7, 7], [-4, 8, -4, -500]])
+    pixels, offsets = dda_fixed_batch(segments)
+    assert np.array_equal(pixels, np.concatenate([dda_fixed_points(*s) for s in segments.tolist()])), \
+        "Batch samples differ around single-pixel lines"
+
+    pixels, offsets = dda_fixed_batch(np.empty((0, 4), dtype=np.int64))
+    assert pixels.shape == (0, 2) and list(offsets) == [0], "Empty batch incorrect"
+    print("✓ Fixed-point DDA batch test passed")
+
+def test_table_cache():
+    """Test LRU eviction order, the memory limit and the hit/miss counters"""
+    print("Testing table cache...")
+
+    built = []
+    def build(n):
+        built.append(n)
+        return np.zeros(n, dtype=np.uint8)
+
+    cache = TableCache(build, max_bytes=100)
+    first = cache.get(40)
+    cache.get(30)
+    assert cache.get(40) is first and not first.flags.writeable, "Cached table not reused"
+    cache.get(50)  # evicts 30, the least recently used
+    assert cache.stats()['nbytes'] == 90 and cache.stats()['entries'] == 2, "Eviction incorrect"
+    cache.get(40)
+    cache.get(50)
+    assert built == [40, 30, 50], f"Tables rebuilt on a hit: {built}"
+    cache.get(30)  # evicts 40, now the least recently used
+    cache.get(50)
+    cache.get(40)
+    assert built == [40, 30, 50, 30, 40], f"Eviction order incorrect: {built}"
+
+    # Tables above the limit are returned but never cached
+    cache.get(200)
+    cache.get(200)
+    assert built[-2:] == [200, 200] and cache.stats()['nbytes'] <= 100, "Oversized table cached"
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (4, 7), f"Counters incorrect: {stats}"
+    assert np.isclose(stats['hit_rate'], 4 / 11) and stats['max_bytes'] == 100, f"Stats incorrect: {stats}"
+    cache.clear()
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'hit_rate': 0.0, 'entries': 0, 'nbytes': 0,
+                             'max_bytes': 100}, "Clear did not reset the cache"
+    print("✓ Table cache test passed")
+
+def test_midpoint_circle():
+    """Test the circle offset cache, filled spans and batch against the decision loop"""
+    print("Testing midpoint circle...")
+
+    cache = CircleOffsetCache()
+    table = cache.offsets(10)
+    assert cache.offsets(10) is table and not table.flags.writeable, "Cached table not reused"
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1, "Cache statistics incorrect"
+    cache.offsets(11)
+    assert cache.stats()['misses'] == 2 and cache.stats()['entries'] == 2, "Second radius not cached"
+
+    for r in range(0, 60):
+        outline = np.array(midpoint_circle_points(7, -3, r))
+        assert set(map(tuple, circle_offsets(r) + (7, -3))) == set(map(tuple, outline.tolist())), \
+            f"Offsets of radius {r} differ from the outline"
+
+        # Every row spans exactly from the leftmost to the rightmost outline pixel
+        ys, x_starts, x_ends = filled_circle_spans(7, -3, r)
+        assert np.array_equal(ys, np.arange(-3 - r, -3 + r + 1)), f"Span rows of radius {r} incorrect"
+        for y, x0, x1 in zip(ys, x_starts, x_ends):
+            row = outline[outline[:, 1] == y, 0]
+            assert x0 == row.min() and x1 == row.max(), f"Span of row {y} at radius {r} incorrect"
+
+    centers = np.random.default_rng(6).integers(-500, 500, (20, 2))
+    for r in (0, 1, 5, 37):
+        pixels = midpoint_circle_batch(centers, r)
+        n = len(circle_offsets(r))
+        assert pixels.shape == (len(centers) * n, 2), f"Batch shape of radius {r} incorrect"
+        for k, (cx, cy) in enumerate(centers.tolist()):
+            assert set(map(tuple, pixels[k * n:(k + 1) * n].tolist())) == \
+                set(midpoint_circle_points(cx, cy, r)), f"Batch circle {k} of radius {r} incorrect"
+    print("✓ Midpoint circle test passed")
+
+def float_ellipse_quadrant(rx, ry):
+    """First-quadrant points of the original floating-point midpoint ellipse loops"""
+    points = []
+    x = 0
+    y = ry
+    p1 = ry**2 - rx**2 * ry + 0.25 * rx**2
+    dx = 2 * ry**2 * x
+    dy = 2 * rx**2 * y
+    while dx < dy:
+        points.append((x, y))
+        x += 1
+        dx += 2 * ry**2
+        if p1 < 0:
+            p1 += dx + ry**2
+        else:
+            y -= 1
+            dy -= 2 * rx**2
+            p1 += dx - dy + ry**2
+    p2 = ry**2 * (x + 0.5)**2 + rx**2 * (y - 1)**2 - rx**2 * ry**2
+    while y >= 0:
+        points.append((x, y))
+        y -= 1
+        dy -= 2 * rx**2
+        if p2 > 0:
+            p2 += rx**2 - dy
+        else:
+            x += 1
+            dx += 2 * ry**2
+            p2 += dx - dy + rx**2
+    return points
+
+def test_midpoint_ellipse():
+    """Test the integer ellipse loops, filled spans and batch against the float loops"""
+    print("Testing midpoint ellipse...")
+
+    for rx in range(60):
+        for ry in range(60):
+            points = []
+            midpoint_ellipse_quadrant(rx, ry, lambda x, y: points.append((x, y)))
+            assert points == float_ellipse_quadrant(rx, ry), f"Integer loops differ for rx={rx}, ry={ry}"
+
+    for rx, ry in [(0, 0), (1, 4), (9, 2), (23, 23), (59, 31), (12, 58)]:
+        outline = np.array(midpoint_ellipse_points(-4, 11, rx, ry))
+        ys, x_starts, x_ends = filled_ellipse_spans(-4, 11, rx, ry)
+        assert np.array_equal(ys, np.arange(11 - ry, 11 + ry + 1)), f"Span rows of {rx}x{ry} incorrect"
+        for y, x0, x1 in zip(ys, x_starts, x_ends):
+            row = outline[outline[:, 1] == y, 0]
+            assert x0 == row.min() and x1 == row.max(), f"Span of row {y} of {rx}x{ry} incorrect"
+
+    # Ellipses of mixed sizes come back grouped by size
+    rng = np.random.default_rng(8)
+    centers = rng.integers(-300, 300, (30, 2))
+    rx, ry = rng.integers(0, 4, 30) * 7, rng.integers(1, 3, 30) * 5
+    pixels = midpoint_ellipse_batch(centers, rx, ry)
+    expected = np.concatenate([ellipse_offsets(a, b) + c for c, a, b in zip(centers, rx, ry)])
+    assert pixels.dtype == np.int32 and len(pixels) == len(expected), "Batch size incorrect"
+    assert np.array_equal(pixels[np.lexsort(pixels.T)], expected[np.lexsort(expected.T)]), \
+        "Batch pixels incorrect"
+    shared = midpoint_ellipse_batch(centers[:3], 6, 4)
+    assert np.array_equal(shared, np.concatenate([ellipse_offsets(6, 4) + c for c in centers[:3]])), \
+        "Batch with shared radii incorrect"
+    assert midpoint_ellipse_batch(np.empty((0, 2)), 6, 4).shape == (0, 2), "Empty batch incorrect"
+    print("✓ Midpoint ellipse test passed")
+
+def render(draw, *args, **options):
+    """Framebuffer holding one call of a drawing function"""
+    framebuffer = Framebuffer()
+    previous = set_target(framebuffer)
+    try:
+        draw(*args, **options)
+    finally:
+        set_target(previous)
+    return framebuffer
+
+def test_line_graph_decimation():
+    """Test that M4 decimation leaves the rendered graph unchanged"""
+    print("Testing line graph decimation...")
+
+    rng = np.random.default_rng(10)
+    walk = np.cumsum(rng.normal(size=60_000))
+    walk[rng.integers(0, len(walk), 40)] += rng.normal(0, 200, 40)
+    steps = np.repeat(rng.normal(size=300), 100)
+    for ys in (walk, steps, np.sin(np.linspace(0, 400, 9_999))):
+        starts, ends = column_bounds(len(ys), 25, 600 / (len(ys) - 1))
+        columns = pixel_x(np.arange(len(ys)), 25, 600 / (len(ys) - 1))
+        assert starts[0] == 0 and ends[-1] == len(ys) and np.array_equal(starts[1:], ends[:-1]), \
+            "Column bounds do not partition the series"
+        column_of = np.repeat(np.arange(len(starts)), ends - starts)
+        assert np.array_equal(columns, columns[starts][column_of]) and np.all(np.diff(columns[starts]) > 0), \
+            "Column bounds differ from pixel_x"
+
+        full = render(draw_line_graph, ys, decimation=None)
+        assert np.array_equal(render(draw_line_graph, ys, decimation='m4').pixels, full.pixels), \
+            "M4 decimated graph differs from the full graph"
+        assert (full.pixels[..., 0] == 255).sum() > 600, "Graph not drawn"
+
+    try:
+        decimate(walk, 25, 0.01, method='average')
+        assert False, "Unknown decimation method accepted"
+    except ValueError:
+        pass
+    print("✓ Line graph decimation test passed")
+
+def test_lttb():
+    """Test the shape and endpoints of the LTTB selection"""
+    print("Testing LTTB...")
+
+    ys = np.cumsum(np.random.default_rng(12).normal(size=5_000))
+    for threshold in (3, 4, 100, 2_400, 4_999):
+        indices = lttb_indices(ys, threshold)
+        assert indices.shape == (threshold,), f"LTTB kept {len(indices)} samples, wanted {threshold}"
+        assert indices[0] == 0 and indices[-1] == len(ys) - 1, "LTTB dropped an endpoint"
+        assert np.all(np.diff(indices) > 0), "LTTB indices not strictly increasing"
+
+    # One sample per bucket, at the largest triangle with its neighbours
+    assert list(lttb_indices(np.array([0., 0, 5, 0, 0, 0, -5, 0, 0]), 4)) == [0, 2, 6, 8], \
+        "LTTB missed the peaks"
+    assert np.array_equal(lttb_indices(ys[:50], 50), np.arange(50)), "Short series not kept whole"
+    assert np.array_equal(lttb_indices(ys, 2), np.arange(len(ys))), "Threshold below three not ignored"
+    assert len(decimate(ys, 25, 600 / (len(ys) - 1), method='lttb')) == 4 * 601, "LTTB decimation size incorrect"
+    print("✓ LTTB test passed")
+
+def test_live_line_graph():
+    """Test that incremental drawing, scrolling and rescaling match a full redraw"""
+    print("Testing live line graph...")
+
+    stream = np.cumsum(np.random.default_rng(13).normal(size=1_000))
+    stream[700] += 500  # a spike far outside the y range
+    for capacity, scroll, block in [(600, None, 7), (100, 30, 1), (50, 50, 13), (2, 1, 9)]:
+        graph = LiveLineGraph(capacity, scroll, headroom=0.5)
+        framebuffer = Framebuffer()
+        previous = set_target(framebuffer)
+        try:
+            for start in range(0, len(stream), block):
+                end = min(start + block, len(stream))
+                graph.append(stream[start:end])
+                assert graph.count <= capacity, "Buffer over capacity"
+                assert np.array_equal(graph.values(), stream[end - graph.count:end]), \
+                    f"Visible samples incorrect after {end} samples"
+                assert graph.y_min <= graph.values().min() and graph.values().max() <= graph.y_max, \
+                    "Samples outside the y range"
+        finally:
+            set_target(previous)
+        # A two-sample window scrolls on every append and always redraws
+        assert graph.redraws > 0 and (graph.incremental_draws > 0 or capacity == 2), \
+            "Graph never drew incrementally"
+        assert np.array_equal(framebuffer.pixels, render(graph.redraw).pixels), \
+            f"Incremental drawing differs from a full redraw at capacity {capacity}"
+
+    for options in [{'capacity': 1}, {'capacity': 10, 'scroll': 0}, {'capacity': 10, 'scroll': 11}]:
+        try:
+            LiveLineGraph(**options)
+            assert False, f"Invalid graph accepted: {options}"
+        except ValueError:
+            pass
+
+    graph = LiveLineGraph(10)
+    render(graph.append, [1.0, 2.0])
+    for sample in (np.nan, np.inf, [3.0, -np.inf]):
+        try:
+            graph.append(sample)
+            assert False, f"Non-finite sample accepted: {sample}"
+        except ValueError:
+            pass
+    assert np.array_equal(graph.values(), [1.0, 2.0]), "Rejected samples changed the graph"
+    print("✓ Live line graph test passed")
+
+def test_merge_thin_slices():
+    """Test that runs of sub-pixel slices merge into their largest member"""
+    print("Testing thin slice merging...")
+
+    # At radius 10 a slice needs 1 / (20 pi) of the total to span a pixel
+    data = [50, 0.1, 0.2, 0, 0.05, 30, 0.01]
+    colors = ['a', 'b', 'c', 'd', 'e', 'f', 'g']
+    values, merged = merge_thin_slices(data, colors, 10)
+    assert np.allclose(values, [50, 0.35, 30, 0.01]) and merged == ['a', 'c', 'f', 'g'], \
+        f"Merged slices incorrect: {values} {merged}"
+    assert merge_thin_slices(data, colors, 1000) == ([50, 0.1, 0.2, 0.05, 30, 0.01],
+                                                     ['a', 'b', 'c', 'e', 'f', 'g']), \
+        "Slices wide enough to draw were merged"
+    print("✓ Thin slice merging test passed")
+
+def test_pie_charts():
+    """Test tessellated pie charts against the slice angles"""
+    print("Testing pie chart tessellation...")
+
+    data = [3, 0.001, 0.002, 1, 2, 4]
+    colors = [(1, 0, 0), (1, 0, 1), (0, 1, 1), (0, 1, 0), (0, 0, 1), (1, 1, 0)]
+    cx, cy, radius = 100.0, 90.0, 80.0
+    vertices, offsets, slice_colors = tessellate_pie_charts([(data, colors, cx, cy, radius)])
+    values = [3, 0.003, 1, 2, 4]
+    assert len(offsets) == len(values) + 1 and offsets[-1] == len(vertices), "Thin slices were not merged"
+    assert np.array_equal(slice_colors, colors[:1] + colors[2:]), "Slice colors incorrect"
+
+    # Each slice is its center, then arc points from its start to its end angle
+    bounds = 2 * np.pi * np.cumsum([0] + values) / sum(values)
+    for s in range(len(values)):
+        fan = vertices[offsets[s]:offsets[s + 1]] - (cx, cy)
+        assert np.allclose(fan[0], 0), "Slice does not start at the center"
+        assert np.allclose(np.hypot(*fan[1:].T), radius), "Arc vertices off the circle"
+        angles = np.unwrap(np.arctan2(fan[1:, 1], fan[1:, 0]) % (2 * np.pi))
+        assert np.isclose(angles[0], bounds[s]) and np.isclose(angles[-1], bounds[s + 1]), \
+            f"Slice {s} arc does not span its angle"
+        assert np.all(np.diff(angles) > 0), f"Slice {s} arc is not monotonic"
+
+    # Rendered pixels away from the slice boundaries take the color of their slice
+    framebuffer = Framebuffer(200, 180)
+    previous = set_target(framebuffer)
+    try:
+        draw_pie_charts([(data, colors, cx, cy, radius)])
+    finally:
+        set_target(previous)
+    y, x = np.mgrid[0:180, 0:200] + 0.5
+    distance = np.hypot(x - cx, y - cy)
+    angle = np.arctan2(y - cy, x - cx) % (2 * np.pi)
+    edge_gap = np.abs(angle[..., None] - bounds).min(axis=-1) * distance
+    interior = (distance < radius - 1.5) & (edge_gap > 1.5)
+    slice_of = np.searchsorted(bounds, angle, side='right') - 1
+    expected = (slice_colors * 255)[slice_of]
+    assert np.array_equal(framebuffer.pixels[..., :3][interior], expected[interior]), \
+        "Rendered slices do not match the slice angles"
+    assert not framebuffer.pixels[..., :3][distance > radius + 1.5].any(), "Pixels drawn outside the chart"
+
+    empty = tessellate_pie_charts([([0, 0], colors[:2], cx, cy, radius)])
+    assert len(empty[0]) == 0 and list(empty[1]) == [0], "Empty chart incorrect"
+    print("✓ Pie chart tessellation test passed")
+
+def even_odd_coverage(vertices, width, height):
+    """Pixels whose center is inside the polygon, counting crossings at or left of the center"""
+    vertices = np.asarray(vertices, dtype=float)
+    y, x = np.mgrid[0:height, 0:width] + 0.5
+    inside = np.zeros((height, width), dtype=bool)
+    for (x0, y0), (x1, y1) in zip(vertices, np.roll(vertices, -1, axis=0)):
+        if y0 == y1:
+            continue
+        crosses = (min(y0, y1) <= y) & (y < max(y0, y1))
+        inside ^= crosses & (x0 + (y - y0) * (x1 - x0) / (y1 - y0) <= x)
+    return inside
+
+def test_framebuffer_fills():
+    """Test span, polygon and triangle fills pixel by pixel"""
+    print("Testing framebuffer fills...")
+
+    # Spans are inclusive, clipped to the framebuffer and colored per span
+    framebuffer = Framebuffer(40, 30)
+    ys, x_starts, x_ends = [2, 5, -1, 30, 10, 12], [3, -5, 0, 30, 8, 7], [10, 4, 5, 35, 8, 6]
+    colors = [(1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 1, 1), (0, 0.5, 1), (1, 1, 0)]
+    framebuffer.fill_spans(ys, x_starts, x_ends, colors)
+    expected = np.zeros((30, 40, 3), dtype=np.uint8)
+    expected[2, 3:11] = (255, 0, 0)
+    expected[5, 0:5] = (0, 255, 0)
+    expected[10, 8] = (0, 128, 255)
+    assert np.array_equal(framebuffer.pixels[..., :3], expected), "Colored spans incorrect"
+    assert (framebuffer.pixels[..., 3] == 255).all(), "Span alpha incorrect"
+
+    # Without colors the spans take the current color
+    plain = Framebuffer(40, 30)
+    plain.set_color(1, 0, 0)
+    plain.fill_spans(ys[:1], x_starts[:1], x_ends[:1])
+    assert np.array_equal(plain.pixels[2], framebuffer.pixels[2]), "Spans in the current color incorrect"
+
+    # Polygons cover the pixels whose centers they contain, holes included
+    rng = np.random.default_rng(5)
+    polygons = [[(3.2, 4.7), (31.6, 4.7), (31.6, 22.1), (3.2, 22.1)],
+                [(2.3, 1.1), (37.8, 3.4), (20.2, 27.9), (19.7, 8.6), (8.1, 26.3)],
+                rng.uniform(-5, 45, (9, 2))]
+    for polygon in polygons:
+        framebuffer = Framebuffer(40, 30)
+        framebuffer.fill_polygon(polygon)
+        assert np.array_equal(framebuffer.pixels[..., 0] == 255, even_odd_coverage(polygon, 40, 30)), \
+            f"Polygon coverage incorrect for {np.round(polygon, 1).tolist()}"
+
+    # A jittered triangulated grid: shared edges leave no gaps or overlaps
+    # and every triangle matches filling it as a polygon
+    grid = np.stack(np.meshgrid(np.linspace(-4, 44, 7), np.linspace(-4, 34, 6)), axis=-1)
+    grid += rng.uniform(-2.5, 2.5, grid.shape)
+    quads = np.stack([grid[:-1, :-1], grid[:-1, 1:], grid[1:, 1:], grid[1:, :-1]], axis=2).reshape(-1, 4, 2)
+    triangles = np.concatenate([quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]], axis=1).reshape(-1, 3, 2)
+    colors = rng.uniform(0, 1, (len(triangles), 3))
+    framebuffer = Framebuffer(40, 30)
+    framebuffer.fill_triangles(triangles.reshape(-1, 2), np.repeat(colors, 3, axis=0))
+    expected = Framebuffer(40, 30)
+    coverage = np.zeros((30, 40), dtype=int)
+    for triangle, color in zip(triangles, colors):
+        expected.set_color(*color)
+        expected.fill_polygon(triangle)
+        coverage += even_odd_coverage(triangle, 40, 30)
+    assert (coverage == 1).all(), "Reference grid does not tile the framebuffer"
+    assert np.array_equal(framebuffer.pixels, expected.pixels), "Triangle fill differs from polygon fill"
+    print("✓ Framebuffer fills test passed")
+
+def run_all_tests():
+    """Run all test functions"""
+    print("Running Rasterizer Tests")
+    print("=" * 35)
+
+    try:
+        test_bresenham_batch()
+        test_framebuffer_fills()
+        test_draw_pixels_recording()
+        test_record_frame()
+        test_replay()
+        test_dda_fixed_batch()
+        test_table_cache()
+        test_midpoint_circle()
+        test_midpoint_ellipse()
+        test_line_graph_decimation()
+        test_lttb()
+        test_live_line_graph()
+        test_merge_thin_slices()
+        test_pie_charts()
+
+        print("\n" + "=" * 35)
+        print("ALL TESTS PASSED! ✓")
+        print("Batch rasterizers match the per-pixel ones.")
+        print("=" * 35)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    run_all_tests()
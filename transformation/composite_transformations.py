@@ -3,12 +3,14 @@ Composite 2D Transformations using OpenGL
 Demonstrates multiple transformations combined on geometric shapes
 """
 
-from OpenGL.GL import *
-from OpenGL.GLUT import *
-from OpenGL.GLU import *
 import math
+import os
 import sys
 
+# PyOpenGL and the recordable GL facade, shared with the other demos
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'drawing algos'))
+from gl_demo import *
+
 # Window dimensions
 WIDTH, HEIGHT = 800, 600
 
@@ -4,7 +4,7 @@ Test script to verify 2D transformations implementation
 """
 
 import numpy as np
-from transformations import Transform2D, Rectangle, Triangle, Line
+from transformations import Transform2D, TransformChain, Rectangle, Triangle, Line, ShapeBatch
 
 def test_homogeneous_coords():
     """Test homogeneous coordinate conversion"""
@@ -97,6 +97,147 @@ def test_apply_transformation():
     assert np.allclose(result, expected), "Apply transformation failed"
     print("✓ Apply transformation test passed")
 
+def test_affine_fast_path():
+    """Test out buffers, float32 and the projective fallback"""
+    print("Testing affine fast path...")
+
+    vertices = np.array([[1.0, 0.0], [0.0, 1.0], [2.0, 3.0]])
+    M = Transform2D.translation(1, 2) @ Transform2D.rotation(30)
+    expected = (np.hstack([vertices, np.ones((3, 1))]) @ M.T)[:, :2]
+
+    out = np.empty_like(vertices)
+    result = Transform2D.apply_transformation(vertices, M, out=out)
+    assert result is out and np.allclose(out, expected), "Transformation into out failed"
+
+    in_place = vertices.copy()
+    Transform2D.apply_transformation(in_place, M, out=in_place)
+    assert np.allclose(in_place, expected), "In-place transformation failed"
+
+    result32 = Transform2D.apply_transformation(vertices.astype(np.float32), M)
+    assert result32.dtype == np.float32, "float32 input should give float32 output"
+    assert np.allclose(result32, expected, atol=1e-5), "float32 transformation failed"
+
+    # Projective matrix: the result is divided by w
+    P = np.array([[1, 0, 0], [0, 1, 0], [1, 0, 1]], dtype=float)
+    result = Transform2D.apply_transformation(vertices, P)
+    assert np.allclose(result, vertices / (vertices[:, :1] + 1)), "Projective transformation failed"
+    print("✓ Affine fast path test passed")
+
+def test_lazy_shape_transformations():
+    """Test that shape operations are composed and applied on read"""
+    print("Testing lazy shape transformations...")
+
+    tri = Triangle((0, 0), (2, 0), (1, 2))
+    original = tri.current_vertices.copy()
+    tri.translate(1, 2)
+    tri.rotate(45)
+    tri.scale(2, 0.5)
+    tri.shear_x(0.3)
+    assert tri.pending_matrix is not None, "Operations should stay pending"
+
+    expected = original
+    for M in (Transform2D.translation(1, 2), Transform2D.rotation(45),
+              Transform2D.scaling(2, 0.5), Transform2D.shearing_x(0.3)):
+        expected = Transform2D.apply_transformation(expected, M)
+    assert np.allclose(tri.current_vertices, expected), "Lazy composition incorrect"
+    assert tri.pending_matrix is None, "Reading vertices should apply pending operations"
+
+    tri.reflect_x()
+    tri.reset()
+    assert tri.pending_matrix is None, "Reset should leave nothing pending"
+    assert np.allclose(tri.current_vertices, original), "Lazy reset failed"
+    tri.current_vertices[0] = [9, 9]
+    assert np.allclose(tri.original_vertices, original), "Reset should not share original vertices"
+    print("✓ Lazy shape transformations test passed")
+
+def test_shape_batch():
+    """Test batched transformation of many shapes"""
+    print("Testing shape batch...")
+
+    shapes = [Rectangle(0, 0, 2, 1), Triangle((0, 0), (2, 0), (1, 2)), Line((1, 1), (3, 2))]
+    batch = ShapeBatch.from_shapes(shapes)
+    assert len(batch) == 3 and list(batch.counts) == [4, 3, 2], "Batch layout incorrect"
+
+    # Per-shape translation, then one rotation for all shapes
+    batch.translate(np.array([1, 2, 3]), 0)
+    batch.rotate(90)
+    for i, (shape, tx) in enumerate(zip(shapes, [1, 2, 3])):
+        shape.translate(tx, 0)
+        shape.rotate(90)
+        assert np.allclose(batch[i], shape.current_vertices), "Batch transformation incorrect"
+
+    # Slices share vertices and matrices with the batch
+    tail = batch[1:]
+    assert np.shares_memory(tail.vertices, batch.vertices), "Slice should be a view"
+    tail.scale(2, 2)
+    assert np.allclose(batch[2], shapes[2].current_vertices * 2), "Slice transformation not shared"
+    assert np.allclose(batch[0], shapes[0].current_vertices), "Slice transformed other shapes"
+
+    # The caller's arrays are copied, not transformed in place
+    vertices = np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0]])
+    matrices = np.eye(3)[None].copy()
+    batch = ShapeBatch(vertices, [0, 3], matrices=matrices)
+    batch.translate(5, 5)
+    batch.current_vertices
+    assert np.allclose(vertices, [[0, 0], [1, 0], [0, 1]]), "Batch modified the input vertices"
+    assert np.allclose(matrices, np.eye(3)), "Batch modified the input matrices"
+
+    # Projective matrices are divided by w like the per-shape path
+    P = np.array([[1, 0, 0], [0, 1, 0], [1, 0, 1]], dtype=float)
+    square = Rectangle(0, 0, 1, 1)
+    batch = ShapeBatch.from_shapes([square, Line((0, 0), (1, 1))])
+    batch.apply_transformation(P)
+    square.apply_transformation(P)
+    assert np.allclose(batch[0], square.current_vertices), "Projective batch transformation failed"
+    print("✓ Shape batch test passed")
+
+def test_instanced_transformations():
+    """Test one shape placed under many matrices"""
+    print("Testing instanced transformations...")
+
+    tri = Triangle((0, 0), (2, 0), (1, 2))
+    matrices = np.stack([Transform2D.translation(k, 2 * k) @ Transform2D.rotation(10 * k) for k in range(50)])
+    expected = np.stack([Transform2D.apply_transformation(tri.current_vertices, M) for M in matrices])
+
+    result = tri.instances(matrices)
+    assert result.shape == (50, 3, 2) and np.allclose(result, expected), "Instanced transformation failed"
+
+    # 3 vertices * 2 coordinates * 8 bytes = 48 bytes per instance, 4 per chunk
+    chunks = [(start, chunk.copy()) for start, chunk in tri.iter_instances(matrices, max_bytes=200)]
+    assert all(len(chunk) <= 4 for _, chunk in chunks), "Chunk exceeds memory cap"
+    assert [start for start, _ in chunks] == list(range(0, 50, 4)), "Chunk starts incorrect"
+    assert np.allclose(np.concatenate([chunk for _, chunk in chunks]), expected), "Streamed instances incorrect"
+    print("✓ Instanced transformations test passed")
+
+def test_transform_chain():
+    """Test the cached composite of an editable chain"""
+    print("Testing transform chain...")
+
+    steps = [Transform2D.translation(k, -k) @ Transform2D.rotation(7 * k) @ Transform2D.scaling(1.1, 0.9)
+             for k in range(20)]
+    chain = TransformChain(steps)
+    assert np.allclose(chain.composite, Transform2D.composite_transformation(*steps)), "Chain composite incorrect"
+
+    # Edit, insert, remove and reorder steps like an editor would
+    chain[5] = steps[5] = Transform2D.shearing_x(0.5)
+    chain.insert(3, Transform2D.reflection_x())
+    steps.insert(3, Transform2D.reflection_x())
+    assert np.allclose(chain.pop(12), steps.pop(12)), "Chain pop returned wrong step"
+    chain.move(0, 15)
+    steps.insert(15, steps.pop(0))
+    chain.append(Transform2D.rotation(30))
+    steps.append(Transform2D.rotation(30))
+
+    expected = Transform2D.composite_transformation(*steps)
+    assert len(chain) == len(steps), "Chain length incorrect"
+    assert np.allclose(chain.composite, expected), "Edited chain composite incorrect"
+    assert np.allclose(chain.inverse @ expected, np.eye(3)), "Chain inverse incorrect"
+
+    # Changing a returned step must not reach the cached products
+    chain[0][0, 2] += 100
+    assert np.allclose(chain.composite, expected), "Chain step was modified in place"
+    print("✓ Transform chain test passed")
+
 def run_all_tests():
     """Run all test functions"""
     print("Running 2D Transformations Tests")
@@ -110,6 +251,11 @@ def run_all_tests():
         test_composite()
         test_shape_transformations()
         test_apply_transformation()
+        test_affine_fast_path()
+        test_lazy_shape_transformations()
+        test_shape_batch()
+        test_instanced_transformations()
+        test_transform_chain()
 
         print("\n" + "=" * 35)
         print("ALL TESTS PASSED! ✓")
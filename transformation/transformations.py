@@ -176,20 +176,125 @@ class Transform2D:
         ], dtype=float)
     
     @staticmethod
-    def apply_transformation(vertices, matrix):
+    def is_affine(matrix):
+        """
+        Check if a transformation matrix is affine
+
+        Args:
+            matrix: 3x3 transformation matrix
+
+        Returns:
+            True if the bottom row is (0, 0, 1), so w stays 1
+        """
+        return matrix[2, 0] == 0 and matrix[2, 1] == 0 and matrix[2, 2] == 1
+
+    @staticmethod
+    def apply_transformation(vertices, matrix, out=None):
         """
         Apply transformation matrix to vertices
-        
+
+        Affine matrices apply their 2x2 linear part and translation directly,
+        writing into one output array. Only projective matrices go through
+        homogeneous coordinates and the divide by w.
+
         Args:
             vertices: numpy array of shape (n, 2) with 2D points
             matrix: 3x3 transformation matrix
-            
+            out: optional float array of shape (n, 2) receiving the result;
+                 may be vertices itself to transform in place
+
         Returns:
-            numpy array of shape (n, 2) with transformed vertices
+            numpy array of shape (n, 2) with transformed vertices, in the
+            dtype of out if given, else float32 for float32 vertices and
+            float64 otherwise
+        """
+        vertices = np.asarray(vertices)
+        matrix = np.asarray(matrix)
+        if out is not None:
+            dtype = out.dtype
+        elif vertices.dtype == np.float32:
+            dtype = np.float32
+        else:
+            dtype = np.float64
+
+        if not Transform2D.is_affine(matrix):
+            homo_coords = Transform2D.homogeneous_coords(vertices)
+            transformed = homo_coords @ matrix.T
+            result = Transform2D.to_2d(transformed) / transformed[:, 2:]
+            if out is None:
+                return result.astype(dtype, copy=False)
+            out[...] = result
+            return out
+
+        matrix = matrix.astype(dtype, copy=False)
+        out = np.matmul(vertices, matrix[:2, :2].T, out=out, dtype=dtype)
+        out += matrix[:2, 2]
+        return out
+
+    @staticmethod
+    def apply_instanced(vertices, matrices, out=None):
         """
-        homo_coords = Transform2D.homogeneous_coords(vertices)
-        transformed = homo_coords @ matrix.T
-        return Transform2D.to_2d(transformed)
+        Apply K transformation matrices to the same vertices
+
+        Args:
+            vertices: numpy array of shape (n, 2) with 2D points
+            matrices: stack of shape (K, 3, 3), one matrix per instance
+            out: optional float array of shape (K, n, 2) receiving the result
+
+        Returns:
+            numpy array of shape (K, n, 2); instance k is vertices
+            transformed by matrices[k]
+        """
+        vertices = np.asarray(vertices)
+        matrices = np.asarray(matrices)
+        if out is not None:
+            dtype = out.dtype
+        elif vertices.dtype == np.float32:
+            dtype = np.float32
+        else:
+            dtype = np.float64
+
+        if not np.all(matrices[:, 2] == [0, 0, 1]):
+            homo_coords = Transform2D.homogeneous_coords(vertices)
+            transformed = homo_coords @ matrices.transpose(0, 2, 1)
+            result = transformed[:, :, :2] / transformed[:, :, 2:]
+            if out is None:
+                return result.astype(dtype, copy=False)
+            out[...] = result
+            return out
+
+        # (n, 2) @ (K, 2, 2) broadcasts to (K, n, 2)
+        matrices = matrices.astype(dtype, copy=False)
+        out = np.matmul(vertices, matrices[:, :2, :2].transpose(0, 2, 1), out=out, dtype=dtype)
+        out += matrices[:, None, :2, 2]
+        return out
+
+    @staticmethod
+    def iter_instanced(vertices, matrices, max_bytes=64 * 2**20):
+        """
+        Apply K matrices to the same vertices in chunks of bounded size
+
+        Every chunk is written into the same buffer of at most max_bytes
+        (but always at least one instance), so a chunk is only valid until
+        the next one is produced; copy it to keep it.
+
+        Args:
+            vertices: numpy array of shape (n, 2) with 2D points
+            matrices: stack of shape (K, 3, 3), one matrix per instance
+            max_bytes: memory cap of the chunk buffer
+
+        Yields:
+            (start, chunk): chunk of shape (k, n, 2) holds the instances of
+            matrices[start:start + k]
+        """
+        vertices = np.asarray(vertices)
+        dtype = np.float32 if vertices.dtype == np.float32 else np.float64
+        per_instance = max(vertices.shape[0] * 2 * np.dtype(dtype).itemsize, 1)
+        size = int(max(min(max_bytes // per_instance, len(matrices)), 1))
+        buffer = np.empty((size, vertices.shape[0], 2), dtype=dtype)
+        for start in range(0, len(matrices), size):
+            chunk = matrices[start:start + size]
+            yield start, Transform2D.apply_instanced(vertices, chunk, out=buffer[:len(chunk)])
     
     @staticmethod
     def composite_transformation(*matrices):
@@ -208,9 +313,133 @@ class Transform2D:
         return result
 
 
+class TransformChain:
+    """
+    Editable sequence of transformation matrices with a cached composite
+
+    The composite is steps[0] @ steps[1] @ ... like composite_transformation.
+    Prefix products P[i] = steps[0] @ ... @ steps[i - 1] and suffix products
+    S[i] = steps[i] @ ... are cached, and only the entries depending on a
+    changed step are invalidated: P[0..prefix_valid] and S[suffix_valid..]
+    stay correct. Tweaking one step frame after frame then costs three 3x3
+    products, and an insert, removal or move only recomputes the products
+    spanning the steps between the change and the still valid entries.
+    """
+
+    def __init__(self, matrices=()):
+        """
+        Initialize chain
+
+        Args:
+            matrices: initial 3x3 transformation matrices, applied last to first
+        """
+        self._steps = [np.array(matrix, dtype=float) for matrix in matrices]
+        n = len(self._steps)
+        self._prefix = [np.eye(3)] + [None] * n
+        self._suffix = [None] * n + [np.eye(3)]
+        self._prefix_valid = 0
+        self._suffix_valid = n
+        self._composite = None
+        self._inverse = None
+
+    def __len__(self):
+        return len(self._steps)
+
+    def __getitem__(self, i):
+        """Copy of step i; change steps through assignment so the caches follow"""
+        return self._steps[i].copy()
+
+    def __setitem__(self, i, matrix):
+        """Replace step i"""
+        i = range(len(self))[i]
+        self._steps[i] = np.array(matrix, dtype=float)
+        self._invalidate(i, i + 1)
+
+    def _invalidate(self, prefix_valid, suffix_valid):
+        # Keep the cache entries that do not depend on the changed steps
+        self._prefix_valid = min(self._prefix_valid, prefix_valid)
+        self._suffix_valid = max(self._suffix_valid, suffix_valid)
+        self._composite = None
+        self._inverse = None
+
+    def insert(self, i, matrix):
+        """Insert a step before step i, like list.insert"""
+        i = min(max(i + len(self) if i < 0 else i, 0), len(self))
+        self._steps.insert(i, np.array(matrix, dtype=float))
+        self._prefix.insert(i + 1, None)
+        self._suffix.insert(i, None)
+        # Suffixes after the new step shifted up by one but are still valid
+        self._suffix_valid += self._suffix_valid > i
+        self._invalidate(i, i + 1)
+
+    def append(self, matrix):
+        """Add a step at the end of the chain"""
+        self.insert(len(self), matrix)
+
+    def pop(self, i=-1):
+        """Remove step i and return it"""
+        i = range(len(self))[i]
+        matrix = self._steps.pop(i)
+        self._prefix.pop(i + 1)
+        self._suffix.pop(i)
+        # Suffixes after the removed step shifted down by one
+        self._suffix_valid -= self._suffix_valid > i
+        self._invalidate(i, i)
+        return matrix
+
+    def move(self, i, j):
+        """Move step i to position j"""
+        self.insert(j, self.pop(i))
+
+    def _prefix_product(self, i):
+        # P[i], extending the valid prefixes up to it
+        while self._prefix_valid < i:
+            k = self._prefix_valid
+            self._prefix[k + 1] = self._prefix[k] @ self._steps[k]
+            self._prefix_valid += 1
+        return self._prefix[i]
+
+    def _suffix_product(self, i):
+        # S[i], extending the valid suffixes down to it
+        while self._suffix_valid > i:
+            k = self._suffix_valid - 1
+            self._suffix[k] = self._steps[k] @ self._suffix[k + 1]
+            self._suffix_valid -= 1
+        return self._suffix[i]
+
+    @property
+    def composite(self):
+        """3x3 composite matrix of the whole chain"""
+        if self._composite is None:
+            # Rebuild the stale steps from both sides, so a later edit
+            # anywhere among them finds its prefix and suffix cached
+            low, high = self._prefix_valid, self._suffix_valid
+            if low < high:
+                self._prefix_product(high)
+                self._suffix_product(low)
+            split = self._prefix_valid
+            self._composite = self._prefix[split] @ self._suffix[split]
+        return self._composite
+
+    @property
+    def inverse(self):
+        """Inverse of the composite matrix"""
+        if self._inverse is None:
+            self._inverse = np.linalg.inv(self.composite)
+        return self._inverse
+
+    def apply(self, vertices, out=None):
+        """Apply the composite matrix to vertices, see Transform2D.apply_transformation"""
+        return Transform2D.apply_transformation(vertices, self.composite, out)
+
+
 class Shape2D:
     """
     Base class for 2D shapes
+
+    Transformations are not applied to the vertices right away but composed
+    into one pending matrix, which is applied in a single pass the next
+    time current_vertices is read.
     """
     
     def __init__(self, vertices, name="Shape"):
@@ -222,18 +451,47 @@ class Shape2D:
             name: name of the shape
         """
         self.original_vertices = vertices.copy()
-        self.current_vertices = vertices.copy()
+        self._vertices = vertices.copy()
+        self._pending = None
         self.name = name
+
+    @property
+    def current_vertices(self):
+        """Vertices with all pending transformations applied"""
+        if self._pending is not None:
+            self._vertices = Transform2D.apply_transformation(self._vertices, self._pending)
+            self._pending = None
+        return self._vertices
+
+    @current_vertices.setter
+    def current_vertices(self, vertices):
+        self._vertices = vertices
+        self._pending = None
+
+    @property
+    def pending_matrix(self):
+        """Composite of the transformations not yet applied, or None"""
+        return self._pending
     
     def apply_transformation(self, matrix):
         """Apply transformation matrix to shape"""
-        self.current_vertices = Transform2D.apply_transformation(
-            self.current_vertices, matrix
-        )
+        if self._pending is None:
+            self._pending = np.array(matrix, dtype=float)
+        else:
+            self._pending = matrix @ self._pending
     
     def reset(self):
         """Reset to original vertices"""
-        self.current_vertices = self.original_vertices.copy()
+        self._vertices = self.original_vertices.copy()
+        self._pending = None
+
+    def instances(self, matrices):
+        """Copies of the shape under each of K matrices, as a (K, n, 2) array"""
+        return Transform2D.apply_instanced(self.current_vertices, matrices)
+
+    def iter_instances(self, matrices, max_bytes=64 * 2**20):
+        """Chunks of instances() within a memory cap, see Transform2D.iter_instanced"""
+        return Transform2D.iter_instanced(self.current_vertices, matrices, max_bytes)
     
     def translate(self, tx, ty):
         """Apply translation"""
@@ -326,6 +584,163 @@ class Line(Shape2D):
         super().__init__(vertices, "Line")
 
 
+class ShapeBatch:
+    """
+    Many shapes stored as one vertex array, transformed together
+
+    Shape i owns vertices[offsets[i]:offsets[i + 1]] and has its own 3x3
+    matrix in the (K, 3, 3) stack. Like Shape2D, operations only update the
+    matrices; reading current_vertices applies them with one batched matmul
+    per group of shapes with the same vertex count. Slicing with a step of 1
+    returns a batch sharing the vertices and matrices of this one.
+    """
+
+    def __init__(self, vertices, offsets, names=None, matrices=None, copy=True):
+        """
+        Initialize batch
+
+        Args:
+            vertices: numpy array of shape (V, 2) with the vertices of all shapes
+            offsets: int array of shape (K + 1,) with offsets[0] == 0 and
+                     offsets[-1] == V
+            names: optional list of K shape names
+            matrices: optional (K, 3, 3) stack of pending transformations;
+                      identity matrices by default
+            copy: copy vertices and matrices, so the batch never writes to
+                  the caller's arrays; slices pass False to share them
+        """
+        if copy:
+            vertices = np.array(vertices, dtype=float)
+            matrices = np.array(matrices, dtype=float) if matrices is not None else None
+        self.vertices = np.ascontiguousarray(vertices, dtype=float).reshape(-1, 2)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        if len(self.offsets) == 0 or self.offsets[0] != 0 or self.offsets[-1] != len(self.vertices):
+            raise ValueError("offsets must run from 0 to the number of vertices")
+        if matrices is None:
+            matrices = np.tile(np.eye(3), (len(self.offsets) - 1, 1, 1))
+        self.matrices = matrices
+        self.names = names
+
+    @classmethod
+    def from_shapes(cls, shapes):
+        """Pack Shape2D objects into a batch"""
+        counts = [len(shape.current_vertices) for shape in shapes]
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        vertices = np.concatenate([shape.current_vertices for shape in shapes]) if shapes else np.empty((0, 2))
+        return cls(vertices, offsets, [shape.name for shape in shapes])
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, key):
+        """Vertices of shape key, or a batch of the shapes in slice key; both are views"""
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("ShapeBatch slices need a step of 1 to be views")
+            stop = max(start, stop)
+            first, last = self.offsets[start], self.offsets[stop]
+            names = self.names[start:stop] if self.names is not None else None
+            return ShapeBatch(self.vertices[first:last], self.offsets[start:stop + 1] - first,
+                              names, self.matrices[start:stop], copy=False)
+        i = range(len(self))[key]
+        return self.current_vertices[self.offsets[i]:self.offsets[i + 1]]
+
+    @property
+    def counts(self):
+        """Number of vertices of each shape"""
+        return np.diff(self.offsets)
+
+    @property
+    def current_vertices(self):
+        """Vertices with all pending transformations applied"""
+        identity = np.eye(3)
+        if not np.array_equal(self.matrices, np.broadcast_to(identity, self.matrices.shape)):
+            counts = self.counts
+            for count in np.unique(counts):
+                if count == 0:
+                    continue
+                # Shapes with the same vertex count form one (k, count, 2)
+                # stack for a batched matmul with their (k, 3, 3) matrices
+                shapes = np.flatnonzero(counts == count)
+                if len(shapes) == len(self):
+                    index = slice(None)
+                    points = self.vertices.reshape(len(self), count, 2)
+                else:
+                    index = self.offsets[shapes, None] + np.arange(count)
+                    points = self.vertices[index]
+                matrices = self.matrices[shapes]
+                transformed = points @ matrices[:, :2, :2].transpose(0, 2, 1)
+                transformed += matrices[:, None, :2, 2]
+                if not np.all(matrices[:, 2] == [0, 0, 1]):
+                    # Projective matrices: divide by w as Transform2D does
+                    w = points @ matrices[:, 2, :2, None] + matrices[:, None, 2, 2:]
+                    transformed /= w
+                # In place, so views of this batch and its parent see the result
+                if isinstance(index, slice):
+                    self.vertices[...] = transformed.reshape(-1, 2)
+                else:
+                    self.vertices[index] = transformed
+            self.matrices[...] = identity
+        return self.vertices
+
+    def apply_transformation(self, matrix):
+        """
+        Apply transformation matrix to every shape
+
+        Args:
+            matrix: 3x3 matrix for all shapes, or a (K, 3, 3) stack with one
+                    matrix per shape
+        """
+        np.matmul(matrix, self.matrices, out=self.matrices)
+
+    def _compose(self, a, b, c, d, tx=0.0, ty=0.0):
+        # Matrix [[a, b, tx], [c, d, ty], [0, 0, 1]] per shape; every entry
+        # may be a scalar or an array with one value per shape
+        stack = np.zeros((len(self), 3, 3))
+        stack[:, 0, 0], stack[:, 0, 1], stack[:, 0, 2] = a, b, tx
+        stack[:, 1, 0], stack[:, 1, 1], stack[:, 1, 2] = c, d, ty
+        stack[:, 2, 2] = 1
+        self.apply_transformation(stack)
+
+    def translate(self, tx, ty):
+        """Apply translation; tx and ty are scalars or one value per shape"""
+        self._compose(1, 0, 0, 1, tx, ty)
+
+    def rotate(self, angle, degrees=True):
+        """Apply rotation; angle is a scalar or one value per shape"""
+        if degrees:
+            angle = np.radians(angle)
+        cos_a = np.cos(angle)
+        sin_a = np.sin(angle)
+        self._compose(cos_a, -sin_a, sin_a, cos_a)
+
+    def scale(self, sx, sy):
+        """Apply scaling; sx and sy are scalars or one value per shape"""
+        self._compose(sx, 0, 0, sy)
+
+    def reflect_x(self):
+        """Apply reflection across x-axis"""
+        self.scale(1, -1)
+
+    def reflect_y(self):
+        """Apply reflection across y-axis"""
+        self.scale(-1, 1)
+
+    def reflect_origin(self):
+        """Apply reflection through origin"""
+        self.scale(-1, -1)
+
+    def shear_x(self, shear_factor):
+        """Apply shearing in x direction"""
+        self._compose(1, shear_factor, 0, 1)
+
+    def shear_y(self, shear_factor):
+        """Apply shearing in y direction"""
+        self._compose(1, 0, shear_factor, 1)
+
+
 def plot_shapes(shapes_list, title="2D Transformations", grid=True):
     """
     Plot multiple shapes
@@ -340,15 +755,17 @@ def plot_shapes(shapes_list, title="2D Transformations", grid=True):
     colors = plt.cm.tab10(np.linspace(0, 1, len(shapes_list)))
     
     for shape, color in zip(shapes_list, colors):
-        if len(shape.current_vertices) == 2:
+        # Reading current_vertices applies the pending transformations once
+        current = shape.current_vertices
+        if len(current) == 2:
             # Line
-            plt.plot(shape.current_vertices[:, 0], 
-                    shape.current_vertices[:, 1], 
+            plt.plot(current[:, 0], 
+                    current[:, 1], 
                     'o-', linewidth=2, markersize=8,
                     label=shape.name, color=color)
         else:
             # Polygon (close the shape)
-            vertices = np.vstack([shape.current_vertices, shape.current_vertices[0]])
+            vertices = np.vstack([current, current[0]])
             plt.plot(vertices[:, 0], vertices[:, 1], 'o-', linewidth=2, markersize=8,
                     label=shape.name, color=color)
             plt.fill(vertices[:, 0], vertices[:, 1], alpha=0.2, color=color)